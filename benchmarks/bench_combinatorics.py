@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: big factorials, the original path versus the combinatorics module
+
+The original factorial button computed math.factorial(n) and converted it
+to text for the display and history. It is timed against factorial_result
+(an approximation beyond the exact-digit limit), a repeat, and
+producing all digits on demand with str() versus exact_digits().
+
+Run with: python benchmarks/bench_combinatorics.py
+"""
+
+import math
+import sys
+import time
+
+import common
+import combinatorics
+
+SIZES = [1000, 20000, 100000]
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def original(n):
+    """The original factorial_input: exact value, then its full decimal text"""
+    return str(math.factorial(n))
+
+
+def main():
+    if hasattr(sys, 'set_int_max_str_digits'):
+        # The original path fails outright past Python 3.11's limit; lift it to time it
+        sys.set_int_max_str_digits(0)
+
+    rows = []
+    for n in SIZES:
+        before = timed(lambda: original(n))
+        combinatorics.log10_factorial.cache_clear()
+        after = timed(lambda: str(combinatorics.factorial_result(n)))
+        repeat = common.best_of(lambda: str(combinatorics.factorial_result(n)), number=100)
+        rows.append((f"{n:,}!", f"original {common.format_duration(before)} | "
+                                f"new {common.format_duration(after)} | "
+                                f"repeat {common.format_duration(repeat)}"))
+    common.print_table("Factorial button, result ready for display", rows)
+    print()
+
+    rows = []
+    for n in SIZES[1:]:
+        value = math.factorial(n)
+        text_time = timed(lambda: str(value))
+        digits_time = timed(lambda: combinatorics.exact_digits(value))
+        rows.append((f"{n:,}! ({combinatorics.int_digits(value):,} digits)",
+                     f"str() {common.format_duration(text_time)} | "
+                     f"exact_digits() {common.format_duration(digits_time)}"))
+    common.print_table("All decimal digits on demand", rows)
+    print()
+
+    modulus = 10 ** 9 + 7
+    common.print_table(f"Modular results, mod {modulus}", [
+        ("C(100000, 50000) exact, then mod",
+         common.format_duration(timed(lambda: math.comb(100000, 50000) % modulus))
+         if hasattr(math, 'comb') else "n/a"),
+        ("comb_mod(100000, 50000)",
+         common.format_duration(timed(lambda: combinatorics.comb_mod(100000, 50000, modulus)))),
+        ("comb_mod(10**18, 10**9)",
+         common.format_duration(timed(lambda: combinatorics.comb_mod(10 ** 18, 10 ** 9, modulus)))),
+    ])
+
+
+if __name__ == "__main__":
+    main()
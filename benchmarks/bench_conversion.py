@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: precomputed conversion table across every unit pair
+
+Compares ConversionTable.convert with the original perform_conversion
+logic (dict lookups plus the temperature if/elif chain) for all pairs of
+all categories, then times bulk conversion of one million values.
+
+Run with: python benchmarks/bench_conversion.py
+"""
+
+import math
+from array import array
+
+import common
+from calculator_core import CalculatorCore
+from unit_conversion import np
+
+
+def original_convert(rates_by_type, value, conv_type, from_unit, to_unit):
+    """The conversion logic perform_conversion used before the table existed"""
+    if conv_type == 'temperature':
+        if from_unit == 'C':
+            if to_unit == 'F':
+                return value * 9 / 5 + 32
+            elif to_unit == 'K':
+                return value + 273.15
+            return value
+        elif from_unit == 'F':
+            if to_unit == 'C':
+                return (value - 32) * 5 / 9
+            elif to_unit == 'K':
+                return (value - 32) * 5 / 9 + 273.15
+            return value
+        else:
+            if to_unit == 'C':
+                return value - 273.15
+            elif to_unit == 'F':
+                return (value - 273.15) * 9 / 5 + 32
+            return value
+    rates = rates_by_type[conv_type]
+    base_value = value / rates[from_unit]
+    return base_value * rates[to_unit]
+
+
+def main():
+    core = CalculatorCore(history_file=None, stats_file=None)
+    table = core.conversion_table
+    rates = core.conversion_rates
+
+    pairs = [(category, from_unit, to_unit)
+             for category in table.categories()
+             for from_unit in table.units(category)
+             for to_unit in table.units(category)]
+    for category, from_unit, to_unit in pairs:
+        expected = original_convert(rates, 37.5, category, from_unit, to_unit)
+        assert math.isclose(table.convert(37.5, category, from_unit, to_unit), expected,
+                            rel_tol=1e-9), (category, from_unit, to_unit)
+
+    def run_original():
+        for category, from_unit, to_unit in pairs:
+            original_convert(rates, 37.5, category, from_unit, to_unit)
+
+    convert = table.convert
+
+    def run_table():
+        for category, from_unit, to_unit in pairs:
+            convert(37.5, category, from_unit, to_unit)
+
+    baseline = common.best_of(run_original, number=2000) / len(pairs)
+    per_pair = common.best_of(run_table, number=2000) / len(pairs)
+    common.print_table(f"Single conversions, {len(pairs)} unit pairs, per conversion", [
+        ("original branching path", common.format_duration(baseline)),
+        ("precomputed table", f"{common.format_duration(per_pair)}  "
+                              f"({baseline / per_pair:5.1f}x)"),
+    ])
+
+    values = array('d', range(1000000))
+    rows = [
+        ("per-value original path",
+         common.format_duration(common.best_of(
+             lambda: [original_convert(rates, v, 'temperature', 'F', 'K') for v in values],
+             number=1, repeat=3))),
+        ("convert_many, stdlib array",
+         common.format_duration(common.best_of(
+             lambda: table.convert_many(values, 'temperature', 'F', 'K', use_numpy=False),
+             number=1, repeat=3))),
+    ]
+    if np is not None:
+        rows.append(("convert_many, NumPy",
+                     common.format_duration(common.best_of(
+                         lambda: table.convert_many(values, 'temperature', 'F', 'K',
+                                                    use_numpy=True),
+                         number=1, repeat=3))))
+    common.print_table("Bulk conversion of 1,000,000 values (F -> K)", rows)
+
+
+if __name__ == "__main__":
+    main()
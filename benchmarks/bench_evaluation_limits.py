@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: cost of the evaluation limits
+
+Compares cached evaluation with and without EvaluationLimits on ordinary
+expressions, and times how quickly runaway expressions are rejected.
+
+Run with: python benchmarks/bench_evaluation_limits.py
+"""
+
+import time
+
+import common
+from expression_engine import EvaluationLimits, ExpressionEngine
+
+EXPRESSIONS = [
+    "7+8*9",
+    "(1.5+2.25)*4/3",
+    "sqrt(16)+2**10",
+    "sin(0.5)**2+cos(0.5)**2",
+    "log10(1000)*log(2.718281828459045)",
+    "abs(-3.5)*pow(2,8)/100",
+    "atan(1)*4-pi",
+    "((((1+2)*3)-4)/5)**2",
+]
+
+RUNAWAY = [
+    "10**10**10",
+    "9**9**9",
+    "pow(10, 10**8)",
+    "(2**1000000)*(2**1000000)",
+    "(" * 500 + "1" + ")" * 500,
+]
+
+
+def main():
+    plain = ExpressionEngine()
+    limited = ExpressionEngine(limits=EvaluationLimits())
+
+    def run(engine):
+        def evaluate_all():
+            for expr in EXPRESSIONS:
+                engine.evaluate(expr)
+        return evaluate_all
+
+    count = len(EXPRESSIONS)
+    before = common.best_of(run(plain), number=2000) / count
+    after = common.best_of(run(limited), number=2000) / count
+    common.print_table(f"Cached evaluation, {count} expressions, per expression", [
+        ("no limits", common.format_duration(before)),
+        ("with limits", f"{common.format_duration(after)}  ({after / before - 1:+.0%})"),
+    ])
+    print()
+
+    rows = []
+    for expr in RUNAWAY:
+        start = time.perf_counter()
+        try:
+            limited.evaluate(expr)
+            outcome = "evaluated"
+        except Exception as e:
+            outcome = getattr(e, 'limit', None) or type(e).__name__
+        rows.append((expr if len(expr) < 30 else expr[:26] + "...",
+                     f"{common.format_duration(time.perf_counter() - start)}  {outcome}"))
+    common.print_table("Rejecting runaway expressions", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: compiled expression engine versus the original per-call eval path
+
+Run with: python benchmarks/bench_expression_engine.py
+"""
+
+import math
+
+import common
+from expression_engine import ExpressionEngine
+
+EXPRESSIONS = [
+    "7+8*9",
+    "(1.5+2.25)*4/3",
+    "sqrt(16)+2**10",
+    "sin(0.5)**2+cos(0.5)**2",
+    "log10(1000)*log(2.718281828459045)",
+    "abs(-3.5)*pow(2,8)/100",
+    "atan(1)*4-pi",
+    "((((1+2)*3)-4)/5)**2",
+]
+
+
+def eval_path(expr):
+    """The original calculate() implementation: rebuild namespace, eval the text"""
+    safe_dict = {
+        'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
+        'asin': math.asin, 'acos': math.acos, 'atan': math.atan,
+        'log': math.log, 'log10': math.log10,
+        'sqrt': math.sqrt, 'pi': math.pi, 'e': math.e,
+        'pow': pow, 'abs': abs
+    }
+    return eval(expr, {"__builtins__": {}}, safe_dict)
+
+
+def main():
+    engine = ExpressionEngine()
+    uncached = ExpressionEngine(cache_size=0)
+
+    for expr in EXPRESSIONS:
+        assert math.isclose(engine.evaluate(expr), eval_path(expr), rel_tol=1e-12), expr
+
+    def run_eval():
+        for expr in EXPRESSIONS:
+            eval_path(expr)
+
+    def run_engine_cached():
+        for expr in EXPRESSIONS:
+            engine.evaluate(expr)
+
+    def run_engine_uncached():
+        for expr in EXPRESSIONS:
+            uncached.evaluate(expr)
+
+    compiled = [engine.compile(expr) for expr in EXPRESSIONS]
+
+    def run_precompiled():
+        for expression in compiled:
+            expression.evaluate()
+
+    count = len(EXPRESSIONS)
+    baseline = common.best_of(run_eval, number=2000) / count
+    rows = [("eval() per call (baseline)", common.format_duration(baseline))]
+    for label, func in [("engine, cold (parse every call)", run_engine_uncached),
+                        ("engine, LRU cache hit", run_engine_cached),
+                        ("engine, precompiled object", run_precompiled)]:
+        per_expr = common.best_of(func, number=2000) / count
+        rows.append((label, f"{common.format_duration(per_expr)}  "
+                            f"({baseline / per_expr:5.1f}x vs eval)"))
+
+    common.print_table(f"Expression evaluation, {count} expressions, per expression", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: memoized scientific functions
+
+Evaluates compiled expressions over a stream of arguments, with and without
+a FunctionCache. In the repeated workload arguments come from a small set,
+as when the same values are typed again and again; in the unique workload
+every argument is new, so every lookup misses and only the overhead shows.
+
+Run with: python benchmarks/bench_function_cache.py
+"""
+
+from decimal import Decimal
+from fractions import Fraction
+
+import common
+from expression_engine import ExpressionEngine, FunctionCache
+from numeric_modes import get_mode
+
+EVALUATIONS = 2000
+DISTINCT = 50
+
+WORKLOADS = [
+    ("decimal", "sin(x)**2+log(x)+sqrt(x)", lambda i: Decimal(i) / 7 + 1),
+    # Float and fraction functions are faster than a cache lookup, so the
+    # modes leave them unmemoized and their timings should not change
+    ("fraction", "sqrt(x)+pow(x, 40)", lambda i: Fraction(i + 1, 7) ** 2),
+    ("float", "sin(x)+log10(x)+sqrt(x)", lambda i: i / 7 + 1),
+]
+
+
+def run(mode, expression, arguments, function_cache):
+    engine = ExpressionEngine(mode=get_mode(mode), function_cache=function_cache)
+    compiled = engine.compile(expression)
+    envs = [{'x': x} for x in arguments]
+
+    def evaluate_all():
+        if function_cache is not None:
+            function_cache.clear()
+        for env in envs:
+            compiled.evaluate(env)
+    return evaluate_all
+
+
+def main():
+    for mode, expression, argument in WORKLOADS:
+        rows = []
+        for label, indices in [("repeated", [i % DISTINCT for i in range(EVALUATIONS)]),
+                               ("unique", list(range(EVALUATIONS)))]:
+            arguments = [argument(i) for i in indices]
+            before = common.best_of(run(mode, expression, arguments, None), number=1, repeat=5)
+            cache = FunctionCache()
+            after = common.best_of(run(mode, expression, arguments, cache), number=1, repeat=5)
+            info = cache.cache_info()
+            rate = info['hits'] / max(1, info['hits'] + info['misses'])
+            rows.append((f"{label}, {len(set(indices))} distinct",
+                         f"{common.format_duration(before)} -> {common.format_duration(after)}"
+                         f"  ({before / after:4.1f}x, {rate:.0%} hits, "
+                         f"{info['evictions']} evictions)"))
+        common.print_table(f"{mode}: {expression}, {EVALUATIONS} evaluations", rows)
+        print()
+
+
+if __name__ == "__main__":
+    main()
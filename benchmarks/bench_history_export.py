@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: streaming history export and re-import
+
+Writes a persisted history log, then times a full export to every format
+through HistoryExporter, and reading the JSON Lines and columnar exports
+back into records.
+
+Run with: python benchmarks/bench_history_export.py
+"""
+
+import json
+import os
+import tempfile
+import time
+
+import common
+from history_export import HistoryExporter, WRITERS, read_columnar
+from history_record import HistoryRecord, CALCULATION, CONVERSION
+from history_store import HistoryLog
+
+ENTRIES = 200000
+
+
+def make_log(path, count):
+    log = HistoryLog(path)
+    start = time.time() - count
+    log.extend(
+        (HistoryRecord(f"Convert: {i}.0 m to ft", i * 3.28084, CONVERSION, start + i, 'ft')
+         if i % 5 == 0 else
+         HistoryRecord(f"{i}*sin({i % 97})", i * 0.5 if i % 3 else i, CALCULATION, start + i)
+         ).to_dict() for i in range(count))
+    return log
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        log = make_log(os.path.join(directory, 'history.jsonl'), ENTRIES)
+
+        def batches():
+            for entries, done, total in log.iter_batches():
+                yield list(map(HistoryRecord.from_dict, entries)), done, total
+
+        rows = []
+        for fmt in WRITERS:
+            path = os.path.join(directory, f'export.{fmt}')
+            elapsed, exporter = timed(lambda: HistoryExporter(batches(), path, fmt).start())
+            elapsed += timed(exporter.wait)[0]
+            assert exporter.rows == ENTRIES and exporter.error is None, fmt
+            rows.append((fmt, f"{common.format_duration(elapsed)}  "
+                              f"{os.path.getsize(path) / 2 ** 20:7.1f} MiB"))
+        log.close()
+        common.print_table(f"Export of {ENTRIES:,} persisted entries (read + write)", rows)
+
+        def read_jsonl():
+            with open(os.path.join(directory, 'export.jsonl'), 'rb') as f:
+                return [HistoryRecord.from_dict(json.loads(line)) for line in f]
+
+        jsonl_time, from_jsonl = timed(read_jsonl)
+        columnar_time, from_columnar = timed(
+            lambda: list(read_columnar(os.path.join(directory, 'export.hcol'))))
+        assert from_jsonl == from_columnar
+        common.print_table(f"Re-import of {ENTRIES:,} entries", [
+            ("JSON Lines", common.format_duration(jsonl_time)),
+            ("columnar", f"{common.format_duration(columnar_time)}  "
+                         f"({jsonl_time / columnar_time:4.1f}x)"),
+        ])
+
+
+if __name__ == "__main__":
+    main()
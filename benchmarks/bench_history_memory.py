@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: memory used by one million history entries
+
+Compares the original layout (a dict of four strings per entry, with the
+timestamp and result pre-formatted) with HistoryRecord (__slots__, epoch
+timestamp, kind code, native result). Expressions are the same strings in
+both layouts; the second table leaves them out to show the per-entry
+overhead alone. Build times include tracemalloc overhead.
+
+Run with: python benchmarks/bench_history_memory.py
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+
+import common
+from history_record import HistoryRecord, CALCULATION, CONVERSION
+
+ENTRIES = 1000000
+
+
+def make_expressions(count):
+    return [f"Convert: {i}.0 m to ft" if i % 5 == 0 else f"{i}*sin({i % 97})"
+            for i in range(count)]
+
+
+def legacy_entries(expressions):
+    """Entries as add_history used to build them"""
+    history = []
+    start = time.time()
+    for i, expression in enumerate(expressions):
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start + i))
+        if i % 5 == 0:
+            history.append({'expression': expression, 'result': f"{i * 3.28084:.4f} ft",
+                            'timestamp': timestamp, 'type': 'conversion'})
+        else:
+            history.append({'expression': expression, 'result': str(i * 0.5),
+                            'timestamp': timestamp, 'type': 'calculation'})
+    return history
+
+
+def record_entries(expressions):
+    history = []
+    start = time.time()
+    for i, expression in enumerate(expressions):
+        if i % 5 == 0:
+            history.append(HistoryRecord(expression, i * 3.28084, CONVERSION, start + i, 'ft'))
+        else:
+            history.append(HistoryRecord(expression, i * 0.5, CALCULATION, start + i))
+    return history
+
+
+def measure(build, expressions):
+    """Return (bytes allocated by build, seconds taken) with expressions preallocated"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    history = build(expressions)
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del history
+    return size, elapsed
+
+
+def main():
+    expressions = make_expressions(ENTRIES)
+    expression_bytes = sum(map(sys.getsizeof, expressions))
+
+    legacy_size, legacy_time = measure(legacy_entries, expressions)
+    record_size, record_time = measure(record_entries, expressions)
+
+    def row(size, elapsed, total=True):
+        size = size + expression_bytes if total else size
+        return (f"{size / 2 ** 20:8.1f} MiB  {size / ENTRIES:6.1f} B/entry  "
+                f"built in {common.format_duration(elapsed)}")
+
+    common.print_table(f"History memory, {ENTRIES:,} entries, including expressions", [
+        ("dict of strings", row(legacy_size, legacy_time)),
+        ("HistoryRecord", row(record_size, record_time)),
+    ])
+    common.print_table("Per-entry overhead, excluding expressions", [
+        ("dict of strings", row(legacy_size, legacy_time, total=False)),
+        ("HistoryRecord", row(record_size, record_time, total=False)),
+        ("saving", f"{legacy_size / record_size:8.1f}x"),
+    ])
+
+
+if __name__ == "__main__":
+    main()
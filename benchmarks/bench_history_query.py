@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: indexed history queries
+
+Builds a synthetic history of 300,000 calculations and conversions, then
+compares HistoryIndex queries with a plain scan over the list of dicts.
+
+Run with: python benchmarks/bench_history_query.py
+"""
+
+import time
+
+import common
+from history_index import HistoryIndex, numeric_result, time_bound
+from history_record import HistoryRecord, CALCULATION, CONVERSION, KINDS
+
+ENTRIES = 300000
+
+
+def make_history(count):
+    """Return a synthetic history spread evenly over 2025, oldest first"""
+    start = time_bound('2025')
+    step = (time_bound('2025', end=True) - start) / count
+    history = []
+    for i in range(count):
+        timestamp = start + i * step
+        if i % 5 == 0:
+            history.append(HistoryRecord(f"Convert: {i}.0 m to ft", i * 3.28084,
+                                         CONVERSION, timestamp, 'ft'))
+        else:
+            history.append(HistoryRecord(f"{i}*sin({i % 97})", i * 0.5,
+                                         CALCULATION, timestamp))
+    return history
+
+
+def scan(history, entry_type=None, since=None, until=None, min_result=None,
+         max_result=None, text=None):
+    """Answer a query the way a linear filter over history would"""
+    kind = None if entry_type is None else KINDS[entry_type]
+    start = None if since is None else time_bound(since)
+    end = None if until is None else time_bound(until, end=True)
+    matches = []
+    for record in history:
+        if kind is not None and record.kind != kind:
+            continue
+        if start is not None and record.timestamp < start:
+            continue
+        if end is not None and record.timestamp >= end:
+            continue
+        if min_result is not None or max_result is not None:
+            value = numeric_result(record.result)
+            if value is None or (min_result is not None and value < min_result) \
+                    or (max_result is not None and value > max_result):
+                continue
+        if text is not None and text not in record.expression.lower():
+            continue
+        matches.append(record)
+    return matches
+
+
+def main():
+    history = make_history(ENTRIES)
+    start = time.perf_counter()
+    index = HistoryIndex(history)
+    build = time.perf_counter() - start
+    common.print_table(f"Index build, {ENTRIES:,} entries", [
+        ("HistoryIndex(history)", common.format_duration(build)),
+    ])
+
+    queries = [
+        ("type", dict(entry_type='conversion')),
+        ("time range (one month)", dict(since='2025-03-01', until='2025-03-31')),
+        ("result range", dict(min_result=1000, max_result=1100)),
+        ("type + time + result", dict(entry_type='calculation', since='2025-06-01',
+                                      until='2025-06-30', min_result=80000)),
+        ("substring", dict(text='sin(42)')),
+        ("time range + substring", dict(since='2025-11-01', text='sin(42)')),
+    ]
+    rows = []
+    for label, filters in queries:
+        assert index.query(**filters) == scan(history, **filters), label
+        baseline = common.best_of(lambda: scan(history, **filters), number=1, repeat=3)
+        indexed = common.best_of(lambda: index.query(**filters), number=5, repeat=3)
+        rows.append((label, f"{common.format_duration(baseline)} -> "
+                            f"{common.format_duration(indexed)}  ({baseline / indexed:6.1f}x)"))
+    common.print_table(f"Queries, linear scan -> index, {ENTRIES:,} entries", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: per-operation history redraw cost against history size
+
+Compares the original update_history_display (delete everything, insert
+the last 50 entries) with the incremental HistoryView, and measures a
+scroll redraw of the virtualized view deep inside large histories.
+Needs a display; under CI run it with xvfb-run.
+
+Run with: python benchmarks/bench_history_redraw.py
+"""
+
+import random
+import tkinter as tk
+from tkinter import scrolledtext
+
+import common
+from history_record import HistoryRecord
+from history_view import HistoryView, format_entry
+
+SIZES = [100, 1000, 10000, 100000]
+
+
+def make_history(size):
+    return [HistoryRecord(f"{i}*2+sin({i})", i * 2) for i in range(size)]
+
+
+def legacy_redraw(widget, history):
+    """The original update_history_display body"""
+    widget.delete('1.0', tk.END)
+    for record in reversed(history[-50:]):
+        widget.insert(tk.END, format_entry(record))
+
+
+def main():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Skipped: no display available ({e})")
+        return
+    root.withdraw()
+
+    legacy = scrolledtext.ScrolledText(root, height=15, width=50, font=('Courier', 9))
+    legacy.grid(row=0, column=0)
+    view = HistoryView(root, height=15, width=50, font=('Courier', 9))
+    view.grid(row=0, column=1)
+    root.update()
+
+    rows = []
+    for size in SIZES:
+        history = make_history(size)
+        entry = history[-1]
+
+        def legacy_op():
+            history.append(entry)
+            legacy_redraw(legacy, history)
+            legacy.update_idletasks()
+
+        view.set_source(history)
+
+        def incremental_op():
+            history.append(entry)
+            view.entry_added()
+            view.text.update_idletasks()
+
+        positions = [random.randrange(len(history)) for _ in range(200)]
+
+        def scroll_op():
+            view.first = positions.pop() if positions else 0
+            view.render()
+            view.text.update_idletasks()
+
+        legacy_cost = common.best_of(legacy_op, number=100, repeat=3)
+        view.set_source(history)
+        incremental_cost = common.best_of(incremental_op, number=100, repeat=3)
+        scroll_cost = common.best_of(scroll_op, number=50, repeat=3)
+        rows.append((f"{size:>7} entries",
+                     f"legacy {common.format_duration(legacy_cost)} | "
+                     f"incremental {common.format_duration(incremental_cost)} | "
+                     f"scroll {common.format_duration(scroll_cost)}"))
+
+    common.print_table("History redraw cost per operation", rows)
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: cost of the latency instrumentation
+
+Times cached evaluations and conversions through the core with
+instrumentation off and on, against calling the engine and conversion
+table directly. Off, the core adds its usual dispatch plus one flag test,
+a few tens of nanoseconds; on, each call also pays for two clock reads
+and a locked histogram update.
+
+Run with: python benchmarks/bench_instrumentation.py
+"""
+
+import common
+from calculator_core import CalculatorCore, normalize_expression
+from instrumentation import Instrumentation
+
+NUMBER = 20000
+
+
+def main():
+    core = CalculatorCore(history_file=None, stats_file=None, instruments=Instrumentation())
+    expression = "sqrt(16)+2**10"
+    core.evaluate(expression)
+    engine = core.engine
+    table = core.conversion_table
+
+    rows = []
+    for label, direct, through_core in [
+            ("evaluate (cached)",
+             lambda: engine.evaluate(normalize_expression(expression)),
+             lambda: core.evaluate(expression)),
+            ("convert",
+             lambda: table.convert(5.0, 'length', 'km', 'mi'),
+             lambda: core.convert(5.0, 'length', 'km', 'mi'))]:
+        baseline = common.best_of(direct, number=NUMBER)
+        core.instruments.enabled = False
+        off = common.best_of(through_core, number=NUMBER)
+        core.instruments.enabled = True
+        on = common.best_of(through_core, number=NUMBER)
+        rows.append((label, f"direct {common.format_duration(baseline)}   "
+                            f"off {common.format_duration(off)}   "
+                            f"on {common.format_duration(on)}"))
+    common.print_table(f"Per call, best of 5 x {NUMBER}", rows)
+
+
+if __name__ == "__main__":
+    main()
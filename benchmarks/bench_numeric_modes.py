@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: float, decimal and fraction numeric modes
+
+Times cached evaluation of arithmetic and scientific expressions and a
+currency conversion in each mode. Float mode is also timed on an engine
+that has never had a mode set, to show that the modes do not slow down
+the default path.
+
+Run with: python benchmarks/bench_numeric_modes.py
+"""
+
+import common
+from calculator_core import CalculatorCore
+from expression_engine import ExpressionEngine
+from numeric_modes import get_mode
+
+ARITHMETIC = [
+    "7+8*9",
+    "(1.5+2.25)*4/3",
+    "0.1+0.2-0.3",
+    "((((1+2)*3)-4)/5)**2",
+]
+
+SCIENTIFIC = [
+    "sqrt(2)",
+    "sin(0.5)**2+cos(0.5)**2",
+    "log10(1000)*log(2)",
+    "atan(1)*4-pi",
+]
+
+
+def time_expressions(engine, expressions, number):
+    def run():
+        for expr in expressions:
+            engine.evaluate(expr)
+    return common.best_of(run, number=number) / len(expressions)
+
+
+def time_conversion(core, number):
+    return common.best_of(lambda: core.convert(100, 'currency', 'EUR', 'RON'), number=number)
+
+
+def main():
+    plain = ExpressionEngine()
+    modes = [("float", get_mode('float')),
+             ("decimal, 28 digits", get_mode('decimal', 28)),
+             ("decimal, 100 digits", get_mode('decimal', 100)),
+             ("fraction", get_mode('fraction'))]
+
+    for title, expressions, number in [("Arithmetic", ARITHMETIC, 2000),
+                                       ("Scientific functions", SCIENTIFIC, 50)]:
+        rows = [("float, no mode set", common.format_duration(
+            time_expressions(plain, expressions, number)))]
+        for label, mode in modes:
+            engine = ExpressionEngine(mode=mode)
+            rows.append((label, common.format_duration(
+                time_expressions(engine, expressions, number))))
+        common.print_table(f"{title}, cached, per expression", rows)
+        print()
+
+    core = CalculatorCore(history_file=None, stats_file=None)
+    rows = []
+    for label, name, precision in [("float", 'float', None),
+                                   ("decimal, 28 digits", 'decimal', 28),
+                                   ("fraction", 'fraction', None)]:
+        core.set_numeric_mode(name, precision)
+        result = core.convert(core.numeric_mode.number('100'), 'currency', 'EUR', 'RON')
+        rows.append((label, f"{common.format_duration(time_conversion(core, 2000))}  {result}"))
+    common.print_table("Currency conversion 100 EUR -> RON, per call", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: constant folding and shared subexpressions
+
+Long machine-generated formulas, built the way the scientific buttons used
+to build them: pi and e spelled out as literals, and the same terms
+repeated. Each formula is compiled and evaluated once (a bulk batch of
+calculations), and compiled once and evaluated for many values of x (a
+sweep), with the optimizer on and off. Float expressions evaluated only
+once are not optimized, so the bulk float row should not change.
+
+Run with: python benchmarks/bench_optimizer.py
+"""
+
+import math
+import random
+
+import common
+from expression_engine import ExpressionEngine, count_nodes, optimize, parse
+from numeric_modes import get_mode
+
+FORMULAS = 200
+TERMS = 12
+POINTS = 2000
+
+PI = str(math.pi)
+E = str(math.e)
+
+
+def generate_formula(rng):
+    """Return a sum of terms drawn from a small pool, so terms repeat"""
+    pool = [
+        f"sin(x*{PI}/180)", f"cos(x*{PI}/180)", "sqrt(x**2+1)",
+        f"{E}**2", f"log(x+{E})", f"(2*{PI})", f"tan(x/4+{PI}/8)",
+        f"{rng.randint(1, 9)}*x", f"abs(x-{rng.randint(1, 9)})",
+    ]
+    terms = []
+    for _ in range(TERMS):
+        a, b = rng.choice(pool), rng.choice(pool)
+        terms.append(f"{a}*{b}" if rng.random() < 0.5 else f"{a}/({b}+{PI})")
+    return "+".join(terms)
+
+
+def bulk(mode, formulas, optimized):
+    def run():
+        engine = ExpressionEngine(mode=get_mode(mode), optimize=optimized)
+        env = {'x': engine.mode.from_number(0.5)}
+        for formula in formulas:
+            engine.evaluate(formula, env)
+    return run
+
+
+def sweep(mode, formula, optimized):
+    engine = ExpressionEngine(mode=get_mode(mode), optimize=optimized)
+    compiled = engine.compile(formula, optimized=True)
+    envs = [{'x': engine.mode.from_number(i / POINTS + 0.5)} for i in range(POINTS)]
+
+    def run():
+        for env in envs:
+            compiled.evaluate(env)
+    return run
+
+
+def main():
+    rng = random.Random(20)
+    formulas = [generate_formula(rng) for _ in range(FORMULAS)]
+    tree = parse(formulas[0])
+    body, lets = optimize(tree)
+    print(f"Example formula: {len(formulas[0])} characters, {count_nodes(tree)} nodes; "
+          f"optimized to {count_nodes(body) + sum(count_nodes(node) for _, node in lets)} "
+          f"nodes with {len(lets)} shared subexpressions")
+    print()
+
+    for mode in ("float", "decimal", "fraction"):
+        rows = []
+        before = common.best_of(bulk(mode, formulas, False), number=1, repeat=5)
+        after = common.best_of(bulk(mode, formulas, True), number=1, repeat=5)
+        rows.append((f"compile + evaluate {FORMULAS} formulas",
+                     f"{common.format_duration(before)} -> {common.format_duration(after)}"
+                     f"  ({before / after:4.2f}x)"))
+        before = common.best_of(sweep(mode, formulas[0], False), number=1, repeat=5)
+        after = common.best_of(sweep(mode, formulas[0], True), number=1, repeat=5)
+        rows.append((f"evaluate one formula at {POINTS} points",
+                     f"{common.format_duration(before)} -> {common.format_duration(after)}"
+                     f"  ({before / after:4.2f}x)"))
+        common.print_table(f"{mode}: optimizer off -> on", rows)
+        print()
+
+
+if __name__ == "__main__":
+    main()
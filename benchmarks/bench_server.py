@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: load test of the calculation server
+
+Starts calculation_server.py in a child process (without history, in a
+temporary directory) and drives it from asyncio clients over localhost TCP.
+Each scenario sends a mix of calculations and conversions: one request at a
+time, from many connections at once, pipelined, and as JSON-array batches.
+Reports throughput and the p50/p99 latency from sending a request to
+reading its answer. Clients and server share the machine's cores.
+
+Run with: python benchmarks/bench_server.py [--requests N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+
+import common
+
+# (label, connections, requests in flight per connection, requests per line)
+SCENARIOS = [
+    ("1 connection, one at a time", 1, 1, 1),
+    ("16 connections, one at a time", 16, 1, 1),
+    ("16 connections, pipelined 32 deep", 16, 32, 1),
+    ("16 connections, batches of 32", 16, 1, 32),
+    ("64 connections, pipelined 64 deep", 64, 64, 1),
+]
+
+
+def make_request(i):
+    """Return request i of the workload: mostly calculations, some conversions"""
+    kind = i % 4
+    if kind == 0:
+        return {'id': i, 'expression': "sqrt(16)+2**10"}
+    if kind == 1:
+        return {'id': i, 'expression': f"{i % 1000}*3+sin({i % 1000})"}
+    if kind == 2:
+        return {'id': i, 'op': 'convert', 'value': i % 500, 'type': 'length',
+                'from': 'km', 'to': 'mi'}
+    return {'id': i, 'expression': f"fact({i % 20})/comb(20, {i % 20})"}
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def run_client(host, port, lines, depth, per_line, latencies):
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+    sent = deque()
+    clock = time.perf_counter
+    next_line = 0
+    for _ in range(len(lines)):
+        while next_line < len(lines) and len(sent) < depth:
+            writer.write(lines[next_line])
+            sent.append(clock())
+            next_line += 1
+        await writer.drain()
+        response = await reader.readline()
+        if not response:
+            raise ConnectionError("Server closed the connection")
+        latency = clock() - sent.popleft()
+        latencies.extend([latency] * per_line)
+    writer.close()
+
+
+async def run_scenario(host, port, total, connections, depth, per_line):
+    requests = [make_request(i) for i in range(total)]
+    per_connection = total // connections
+    loads = []
+    for c in range(connections):
+        mine = requests[c * per_connection:(c + 1) * per_connection]
+        if per_line == 1:
+            lines = [(json.dumps(r) + '\n').encode() for r in mine]
+        else:
+            lines = [(json.dumps(mine[i:i + per_line]) + '\n').encode()
+                     for i in range(0, len(mine), per_line)]
+        loads.append(lines)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(host, port, lines, depth, per_line, latencies)
+                           for lines in loads))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return len(latencies) / elapsed, percentile(latencies, 0.50), percentile(latencies, 0.99)
+
+
+def start_server(directory):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(root, 'calculation_server.py'), '--port', '0',
+         '--no-history'],
+        cwd=directory, stdout=subprocess.PIPE, universal_newlines=True,
+        env=dict(os.environ, PYTHONPATH=root))
+    line = process.stdout.readline()
+    if not line.startswith("Listening on "):
+        process.kill()
+        raise RuntimeError(f"Server did not start: {line!r}")
+    host, port = line.split()[-1].rsplit(':', 1)
+    return process, host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the calculation server.")
+    parser.add_argument('--requests', type=int, default=20000,
+                        help="requests per scenario (default: 20000)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        process, host, port = start_server(directory)
+        try:
+            # Warm up the engine cache and the connection path
+            asyncio.run(run_scenario(host, port, 1000, 4, 8, 1))
+            rows = []
+            for label, connections, depth, per_line in SCENARIOS:
+                throughput, p50, p99 = asyncio.run(
+                    run_scenario(host, port, args.requests, connections, depth, per_line))
+                rows.append((label, f"{throughput:9,.0f} req/s   p50 {common.format_duration(p50)}"
+                                    f"   p99 {common.format_duration(p99)}"))
+        finally:
+            process.terminate()
+            process.wait(5)
+    common.print_table(f"Calculation server, {args.requests} requests per scenario", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: application startup, time to first frame
+
+Starts the application in fresh interpreters, with every tab built up
+front (as originally) and with lazy tabs, and reports the median of each
+startup phase from the StartupProfiler. In both modes history is loaded
+a batch per event-loop turn after the first frame, so its cost shows up
+at the history_loaded mark rather than before the window appears. Each run uses a scratch
+directory holding a copy of locales/ and a persisted history, so repeated
+runs measure the same thing. Needs a display; under CI run it with
+xvfb-run.
+
+Run with: python benchmarks/bench_startup.py
+"""
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import common
+from history_record import HistoryRecord
+from history_store import HistoryLog
+
+RUNS = 7
+HISTORY_ENTRIES = 20000
+
+CHILD = """
+import sys
+sys.path.insert(0, {root!r})
+import calculator_app
+root, app = calculator_app.create_app(lazy_tabs={lazy})
+root.after_idle(root.quit)
+root.mainloop()
+while app.history_loader is not None:
+    root.update()
+print(json.dumps(app.profiler.as_dict()))
+app.core.close()
+root.destroy()
+"""
+
+
+def run_once(directory, lazy):
+    code = "import json\n" + CHILD.format(root=common.ROOT, lazy=lazy)
+    completed = subprocess.run([sys.executable, "-c", code], cwd=directory,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def summarize(reports):
+    """Return median (phase or mark name -> seconds) over several reports"""
+    samples = {}
+    for report in reports:
+        for phase in report['phases']:
+            samples.setdefault(phase['name'], []).append(phase['duration'])
+        for name, offset in report['marks'].items():
+            samples.setdefault('@ ' + name, []).append(offset)
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        shutil.copytree(os.path.join(common.ROOT, 'locales'),
+                        os.path.join(directory, 'locales'))
+        log = HistoryLog(os.path.join(directory, 'calculator_history.jsonl'))
+        log.extend(HistoryRecord(f"{i}*2+sin({i})", i * 2.5).to_dict()
+                   for i in range(HISTORY_ENTRIES))
+        log.close()
+
+        try:
+            run_once(directory, True)
+        except RuntimeError as e:
+            print(f"Skipped: cannot start the application ({e})")
+            return
+
+        eager = summarize([run_once(directory, False) for _ in range(RUNS)])
+        lazy = summarize([run_once(directory, True) for _ in range(RUNS)])
+
+    rows = []
+    for name in list(eager) + [name for name in lazy if name not in eager]:
+        before = eager.get(name)
+        after = lazy.get(name)
+        rows.append((name, f"eager {common.format_duration(before) if before else '       -   '} | "
+                           f"lazy {common.format_duration(after) if after else '       -   '}"))
+    common.print_table(f"Startup phases, median of {RUNS} runs, "
+                       f"{HISTORY_ENTRIES:,} history entries", rows)
+
+
+if __name__ == "__main__":
+    main()
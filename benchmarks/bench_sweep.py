@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: tabulating an expression over a range
+
+Before sweep mode, a table of f(x) meant one expression per point, each a
+new string to tokenize, parse and compile. That is timed against a sweep
+that compiles once and evaluates array('d') columns in-process, the NumPy
+path when NumPy is installed, and the sweep split across worker processes.
+
+Run with: python benchmarks/bench_sweep.py
+"""
+
+import os
+import time
+
+import common
+import sweep
+from calculator_core import CalculatorCore
+
+EXPRESSION = "sin(x)*x**2"
+POINTS = 200001
+BASELINE_POINTS = 20000
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def drain(chunks):
+    return sum(len(results) for _, _, results in chunks)
+
+
+def main():
+    core = CalculatorCore(history_file=None, stats_file=None)
+    ranges = f"x=0:10:{POINTS}"
+    grid = sweep.Sweep(sweep.parse_ranges(ranges))
+
+    def one_by_one():
+        for i in range(BASELINE_POINTS):
+            x = repr(grid.ranges[0].value(i))
+            core.evaluate(EXPRESSION.replace('x', x))
+
+    rows = []
+    baseline = timed(one_by_one) / BASELINE_POINTS
+    rows.append(("one expression per point", f"{common.format_duration(baseline)} per point"))
+
+    def add(label, elapsed):
+        per_point = elapsed / POINTS
+        rows.append((label, f"{common.format_duration(per_point)} per point  "
+                            f"({baseline / per_point:5.1f}x, {common.format_duration(elapsed)} total)"))
+
+    add("sweep, array('d') columns",
+        timed(lambda: drain(core.sweep(EXPRESSION, ranges, use_numpy=False))))
+    if sweep.np is not None:
+        add("sweep, NumPy", timed(lambda: drain(core.sweep(EXPRESSION, ranges, use_numpy=True))))
+    else:
+        rows.append(("sweep, NumPy", "not installed"))
+    for workers in sorted({2, 4, os.cpu_count() or 1} - {1}):
+        add(f"sweep, {workers} workers (incl. start-up)",
+            timed(lambda: drain(core.sweep(EXPRESSION, ranges, workers=workers,
+                                           chunk_size=POINTS // (4 * workers) + 1,
+                                           use_numpy=False))))
+    common.print_table(f"{EXPRESSION} over {POINTS:,} points", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: evaluation in worker processes
+
+Measures the round trip of a trivial calculation through a warm worker,
+how quickly a runaway expression is stopped by its timeout, and the
+speedup of CPU-heavy independent evaluations spread over several workers
+compared with evaluating them one after another in-process.
+
+Run with: python benchmarks/bench_task_pool.py
+"""
+
+import os
+import time
+
+import common
+from calculator_core import CalculatorCore, evaluate_expression
+from task_pool import TaskPool
+
+HEAVY = [f"(7**{200000 + i})%1000003" for i in range(16)]
+
+
+def main():
+    core = CalculatorCore(history_file=None, stats_file=None)
+    pool = TaskPool(workers=1).start()
+    pool.submit(evaluate_expression, "1+1").wait()
+
+    round_trip = common.best_of(lambda: pool.submit(evaluate_expression, "1+1").wait(),
+                                number=200)
+
+    start = time.perf_counter()
+    runaway = pool.submit(evaluate_expression, "9**9**9", timeout=0.5)
+    pool.wait([runaway])
+    stopped = time.perf_counter() - start
+    pool.close()
+
+    common.print_table("Single worker", [
+        ("round trip of '1+1'", common.format_duration(round_trip)),
+        (f"'9**9**9' with 0.5 s timeout ({runaway.state})", common.format_duration(stopped)),
+    ])
+    print()
+
+    start = time.perf_counter()
+    expected = [core.evaluate(expression) for expression in HEAVY]
+    serial = time.perf_counter() - start
+
+    rows = [("in-process, one by one", common.format_duration(serial))]
+    for workers in sorted({2, 4, os.cpu_count() or 1}):
+        start = time.perf_counter()
+        results = [result for _, result, _ in
+                   core.evaluate_parallel(HEAVY, workers=workers, chunk_size=1)]
+        elapsed = time.perf_counter() - start
+        assert results == expected
+        rows.append((f"{workers} workers (incl. start-up)",
+                     f"{common.format_duration(elapsed)}  ({serial / elapsed:4.1f}x)"))
+    common.print_table(f"{len(HEAVY)} heavy expressions", rows)
+
+
+if __name__ == "__main__":
+    main()
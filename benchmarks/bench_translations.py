@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: translation loading at startup
+
+Compares the original load_translations (parse and merge all five JSON
+catalogs) with TranslationCatalog loading English only, with and without
+a fresh marshal cache. Runs against a copy of locales/ so no cache files
+are written into the repository.
+
+Run with: python benchmarks/bench_translations.py
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import common
+from translations import DEFAULT_TRANSLATIONS, LANGUAGES, TranslationCatalog, CACHE_NAME
+
+
+def original_load(locales_dir):
+    """The original eager load of every language"""
+    translations = {}
+    for lang in LANGUAGES:
+        file_path = os.path.join(locales_dir, lang, 'translations.json')
+        with open(file_path, 'r', encoding='utf-8') as f:
+            translations[lang] = {**DEFAULT_TRANSLATIONS[lang], **json.load(f)}
+    return translations
+
+
+def clear_caches(locales_dir):
+    for lang in LANGUAGES:
+        try:
+            os.remove(os.path.join(locales_dir, lang, CACHE_NAME))
+        except OSError:
+            pass
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        locales_dir = os.path.join(directory, 'locales')
+        shutil.copytree(os.path.join(common.ROOT, 'locales'), locales_dir)
+
+        original = original_load(locales_dir)
+        warm = TranslationCatalog(locales_dir)
+        assert all(warm[lang] == original[lang] for lang in LANGUAGES)
+
+        baseline = common.best_of(lambda: original_load(locales_dir), number=200)
+        json_only = common.best_of(
+            lambda: TranslationCatalog(locales_dir, use_cache=False).load("en"), number=200)
+
+        def cold():
+            clear_caches(locales_dir)
+            TranslationCatalog(locales_dir).load("en")
+
+        cold_cost = common.best_of(cold, number=200)
+        TranslationCatalog(locales_dir).load("en")
+        cached = common.best_of(lambda: TranslationCatalog(locales_dir).load("en"), number=200)
+        switch = common.best_of(lambda: TranslationCatalog(locales_dir).load("de"), number=200)
+
+        common.print_table("Translation loading at startup", [
+            ("original, all 5 languages", common.format_duration(baseline)),
+            ("lazy, English, JSON", f"{common.format_duration(json_only)}  "
+                                    f"({baseline / json_only:5.1f}x)"),
+            ("lazy, English, cold cache", f"{common.format_duration(cold_cost)}  "
+                                          f"({baseline / cold_cost:5.1f}x)"),
+            ("lazy, English, marshal cache", f"{common.format_duration(cached)}  "
+                                             f"({baseline / cached:5.1f}x)"),
+            ("first switch to another language", common.format_duration(switch)),
+        ])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: workspace variables and user functions
+
+Times a cached expression that calls a user function against the same
+expression written out inline, an expression reading a workspace variable
+that is reassigned before every evaluation, and loading a saved workspace
+of many functions.
+
+Run with: python benchmarks/bench_workspace.py
+"""
+
+import json
+import os
+import tempfile
+
+import common
+from calculator_core import CalculatorCore
+from expression_engine import ExpressionEngine
+from workspace import WORKSPACE_VERSION, Workspace
+
+BODY = "x**2+3*x+1"
+
+WORKSPACE_SIZES = [10, 100, 1000]
+
+
+def write_workspace(path, size):
+    data = {
+        'version': WORKSPACE_VERSION,
+        'variables': [{'name': 'a', 'value': 2}],
+        'functions': [{'name': f'f{i}', 'params': ['x'], 'body': f"a*x**2+f{i - 1}(x)"
+                       if i else "a*x**2"} for i in range(size)]
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def main():
+    core = CalculatorCore(history_file=None, stats_file=None, rates_dir=None,
+                          workspace_file=None)
+    engine = core.engine
+    workspace = core.workspace
+    workspace.define_function('f', ('x',), BODY)
+    workspace.assign('x', 1.5)
+    env = workspace.env
+
+    rows = []
+    for label, expression in [("inline", BODY),
+                              ("user function f(x)", "f(x)"),
+                              ("nested, f(f(x))", "f(f(x))")]:
+        engine.evaluate(expression, env)
+        seconds = common.best_of(lambda: engine.evaluate(expression, env), number=20000)
+        rows.append((label, common.format_duration(seconds)))
+    common.print_table(f"Cached evaluation of {BODY}, per expression", rows)
+    print()
+
+    values = [i / 8 for i in range(64)]
+
+    def reassign():
+        for value in values:
+            env['x'] = value
+            engine.evaluate("f(x)*2", env)
+    reassign()
+    seconds = common.best_of(reassign, number=200) / len(values)
+    common.print_table("Variable reassigned before each evaluation",
+                       [("f(x)*2, still cached", common.format_duration(seconds))])
+    print()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size in WORKSPACE_SIZES:
+            path = os.path.join(directory, f'workspace_{size}.json')
+            write_workspace(path, size)
+
+            def load():
+                Workspace(ExpressionEngine(), path).load()
+            rows.append((f"{size} functions", common.format_duration(
+                common.best_of(load, number=10))))
+    common.print_table("Loading a saved workspace, per load", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Shared helpers for the Advanced Calculator Pro benchmark scripts
+"""
+
+import os
+import sys
+import time
+
+# Benchmarks import the application modules from the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def best_of(func, number=1000, repeat=5):
+    """Return the best average seconds per call over several repeats"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return min(timings)
+
+
+def format_duration(seconds):
+    """Format a duration with a readable unit"""
+    if seconds < 1e-6:
+        return f"{seconds * 1e9:8.1f} ns"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:8.2f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:8.2f} ms"
+    return f"{seconds:8.3f} s "
+
+
+def print_table(title, rows):
+    """Print (label, value) rows under a title"""
+    print(title)
+    print("-" * 60)
+    width = max(len(label) for label, _ in rows)
+    for label, value in rows:
+        print(f"{label:<{width}}  {value}")
+    print()
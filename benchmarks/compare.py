@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark comparator: flag slowdowns between two suite runs
+
+Reads two JSON files written by benchmarks/suite.py --output and compares
+the median time of every case they share. A case is flagged as slower when
+its median grew by more than the threshold AND even its fastest new sample
+is slower than the old median, so a few noisy samples alone do not trip
+it; faster cases are reported the same way. Exits with status 1 when
+anything got slower, so it can gate a CI job.
+
+Run with: python benchmarks/compare.py baseline.json current.json [--threshold 0.10]
+"""
+
+import argparse
+import json
+import sys
+
+import common
+
+DEFAULT_THRESHOLD = 0.10
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Return (name, old median, new median, ratio, verdict) for every shared case
+
+    verdict is 'slower', 'faster', '' (within noise) or 'skipped'.
+    """
+    rows = []
+    for name, new in current['cases'].items():
+        old = baseline['cases'].get(name)
+        if old is None:
+            continue
+        if 'skipped' in old or 'skipped' in new:
+            rows.append((name, old.get('median'), new.get('median'), None, 'skipped'))
+            continue
+        ratio = new['median'] / old['median']
+        if ratio > 1 + threshold and new['min'] > old['median']:
+            verdict = 'slower'
+        elif ratio < 1 / (1 + threshold) and old['min'] > new['median']:
+            verdict = 'faster'
+        else:
+            verdict = ''
+        rows.append((name, old['median'], new['median'], ratio, verdict))
+    return rows
+
+
+def load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark suite runs.")
+    parser.add_argument('baseline', help="results of the earlier run")
+    parser.add_argument('current', help="results of the run to check")
+    parser.add_argument('-t', '--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"relative change in the median to flag "
+                             f"(default: {DEFAULT_THRESHOLD:.2f})")
+    args = parser.parse_args()
+
+    try:
+        baseline = load(args.baseline)
+        current = load(args.current)
+    except (OSError, ValueError) as e:
+        print(f"Error reading results: {e}", file=sys.stderr)
+        return 2
+
+    for side, results in (("baseline", baseline), ("current", current)):
+        environment = results.get('environment', {})
+        print(f"{side:<9} {environment.get('commit') or '?':<10} "
+              f"Python {environment.get('python', '?')} on {environment.get('platform', '?')}")
+    print()
+
+    rows = compare(baseline, current, args.threshold)
+    table = []
+    for name, old, new, ratio, verdict in rows:
+        if verdict == 'skipped':
+            table.append((name, "skipped"))
+            continue
+        marker = {'slower': "  << SLOWER", 'faster': "  faster"}.get(verdict, "")
+        table.append((name, f"{common.format_duration(old)} -> {common.format_duration(new)}"
+                            f"  {ratio:5.2f}x{marker}"))
+    if table:
+        common.print_table(f"Median time per operation, threshold {args.threshold:.0%}", table)
+    slower = [row[0] for row in rows if row[4] == 'slower']
+    if slower:
+        print(f"{len(slower)} case(s) slower: {', '.join(slower)}")
+        return 1
+    print("No slowdowns.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
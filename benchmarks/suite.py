@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite: fixed workloads over the calculator core
+
+Runs every case on the same fixed workload each time: calculate on a set of
+expressions, perform_conversion in each category, save_history and
+load_history at several history sizes, update_history_display, translation
+loading and full application startup. Each case is warmed up, then sampled
+several times with the garbage collector off; the report gives the median,
+mean, standard deviation and range of the time per operation, and --output
+writes every sample as JSON for benchmarks/compare.py.
+
+Cases that need Tk (update_history_display, startup) are skipped when no
+display is available; under CI run the suite with xvfb-run. Everything runs
+in a scratch directory holding a copy of locales/, so no files in the
+repository are touched.
+
+Run with: python benchmarks/suite.py [--quick] [--output results.json]
+"""
+
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import common
+from calculator_core import CalculatorCore
+from history_record import HistoryRecord
+from history_store import HistoryLog
+from translations import TranslationCatalog
+
+SUITE_VERSION = 1
+
+EXPRESSIONS = [
+    "7+8*9",
+    "(1.5+2.25)*4/3",
+    "sqrt(16)+2**10",
+    "sin(0.5)**2+cos(0.5)**2",
+    "log10(1000)*log(2.718281828459045)",
+    "abs(-3.5)*pow(2,8)/100",
+    "fact(20)/comb(20,10)",
+    "((((1+2)*3)-4)/5)**2",
+]
+
+CONVERSIONS = {
+    'length': ('12.5', 'km', 'mi'),
+    'weight': ('3', 'lb', 'g'),
+    'temperature': ('451', 'F', 'C'),
+    'currency': ('100', 'EUR', 'JPY'),
+}
+
+HISTORY_SIZES = [1000, 10000, 100000]
+QUICK_HISTORY_SIZES = [1000, 10000]
+
+STARTUP_CHILD = """
+import json, sys
+sys.path.insert(0, {root!r})
+import calculator_app
+root, app = calculator_app.create_app()
+root.after_idle(root.quit)
+root.mainloop()
+print(json.dumps(app.profiler.as_dict()))
+app.core.close()
+root.destroy()
+"""
+
+
+class Case:
+    """One benchmark: make() returns the operation to time for a sample
+
+    number operations are timed per sample. A reported case times itself:
+    its operation returns the seconds it took.
+    """
+
+    def __init__(self, name, make, number=1, display=False, reported=False):
+        self.name = name
+        self.make = make
+        self.number = number
+        self.display = display
+        self.reported = reported
+
+
+def make_records(size):
+    return [HistoryRecord(f"{i}*2+sin({i})", i * 2.5) for i in range(size)]
+
+
+def write_history(path, size):
+    if os.path.exists(path):
+        os.remove(path)
+    log = HistoryLog(path)
+    log.extend(record.to_dict() for record in make_records(size))
+    log.close()
+
+
+def headless_core():
+    return CalculatorCore(history_file=None, stats_file=None, rates_dir=None)
+
+
+def build_cases(history_sizes):
+    cases = []
+
+    core = headless_core()
+
+    def calculate():
+        for expression in EXPRESSIONS:
+            core.calculate(expression)
+        # Keep the in-memory history from growing across samples
+        del core.history[:]
+
+    cases.append(Case('calculate', lambda: calculate, number=200))
+
+    for category, (value, from_unit, to_unit) in CONVERSIONS.items():
+        def convert(category=category, value=value, from_unit=from_unit, to_unit=to_unit):
+            core.perform_conversion(value, category, from_unit, to_unit)
+            del core.history[:]
+        cases.append(Case(f'perform_conversion/{category}', lambda convert=convert: convert,
+                          number=2000))
+
+    for size in history_sizes:
+        records = make_records(size)
+
+        def make_save(size=size, records=records):
+            path = f'save_{size}.jsonl'
+            if os.path.exists(path):
+                os.remove(path)
+            saving = CalculatorCore(history_file=path, stats_file=None, rates_dir=None)
+            saving.load_history()
+
+            def save():
+                for record in records:
+                    saving.add_history(record.expression, record.result)
+                saving.save_history()
+                saving.close()
+            return save
+
+        def make_load(size=size):
+            path = f'load_{size}.jsonl'
+            if not os.path.exists(path):
+                write_history(path, size)
+
+            def load():
+                loading = CalculatorCore(history_file=path, stats_file=None, rates_dir=None)
+                loading.load_history()
+                loading.close()
+            return load
+
+        cases.append(Case(f'save_history/{size}', make_save))
+        cases.append(Case(f'load_history/{size}', make_load))
+
+    for size in history_sizes:
+        cases.append(Case(f'update_history_display/{size}',
+                          lambda size=size: make_redraw(size), number=50, display=True))
+
+    cases.append(Case('load_translations/uncached',
+                      lambda: (lambda: TranslationCatalog(use_cache=False).load('en')),
+                      number=200))
+    TranslationCatalog().load('en')
+    cases.append(Case('load_translations/cached',
+                      lambda: (lambda: TranslationCatalog().load('en')), number=200))
+
+    cases.append(Case('startup/ready', lambda: lambda: run_startup('ready'),
+                      display=True, reported=True))
+    return cases
+
+
+_app = None
+
+
+def make_redraw(size):
+    """Redraw the history tab of one shared application holding size entries"""
+    global _app
+    if _app is None:
+        import calculator_app
+        root, app = calculator_app.create_app(lazy_tabs=False)
+        root.withdraw()
+        _app = (root, app)
+    root, app = _app
+    app.history_filter = ''
+    app.core.history = make_records(size)
+
+    def redraw():
+        app.update_history_display()
+        root.update_idletasks()
+    return redraw
+
+
+def run_startup(mark):
+    code = STARTUP_CHILD.format(root=common.ROOT)
+    completed = subprocess.run([sys.executable, "-c", code], stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE, universal_newlines=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return json.loads(completed.stdout.strip().splitlines()[-1])['marks'][mark]
+
+
+def display_available():
+    try:
+        import tkinter
+        root = tkinter.Tk()
+    except Exception:
+        return False
+    root.destroy()
+    return True
+
+
+def measure(case, samples, warmup):
+    """Return the seconds per operation of each sample, after warmup samples"""
+    values = []
+    clock = time.perf_counter
+    for index in range(warmup + samples):
+        operation = case.make()
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            if case.reported:
+                elapsed = operation()
+            else:
+                start = clock()
+                for _ in range(case.number):
+                    operation()
+                elapsed = (clock() - start) / case.number
+        finally:
+            if enabled:
+                gc.enable()
+        if index >= warmup:
+            values.append(elapsed)
+    return values
+
+
+def summarize(values):
+    return {
+        'median': statistics.median(values),
+        'mean': statistics.mean(values),
+        'stdev': statistics.stdev(values) if len(values) > 1 else 0.0,
+        'min': min(values),
+        'max': max(values),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=common.ROOT,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                universal_newlines=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'commit': commit,
+    }
+
+
+def run_suite(patterns=None, samples=7, warmup=1, quick=False, log=print):
+    """Run the selected cases and return the results as a JSON-ready dict"""
+    results = {
+        'suite': 'calculator-core',
+        'version': SUITE_VERSION,
+        'created': time.time(),
+        'samples': samples,
+        'warmup': warmup,
+        'environment': environment(),
+        'cases': {},
+    }
+    has_display = None
+    origin = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        shutil.copytree(os.path.join(common.ROOT, 'locales'),
+                        os.path.join(directory, 'locales'))
+        os.chdir(directory)
+        try:
+            for case in build_cases(QUICK_HISTORY_SIZES if quick else HISTORY_SIZES):
+                if patterns and not any(fnmatch.fnmatch(case.name, p) for p in patterns):
+                    continue
+                if case.display:
+                    if has_display is None:
+                        has_display = display_available()
+                    if not has_display:
+                        results['cases'][case.name] = {'skipped': "no display"}
+                        log(f"{case.name:<32}  skipped: no display")
+                        continue
+                try:
+                    values = measure(case, samples, warmup)
+                except Exception as e:
+                    results['cases'][case.name] = {'skipped': str(e) or type(e).__name__}
+                    log(f"{case.name:<32}  skipped: {e}")
+                    continue
+                summary = summarize(values)
+                results['cases'][case.name] = dict(summary, number=case.number,
+                                                   samples=values)
+                log(f"{case.name:<32}  {common.format_duration(summary['median'])} median"
+                    f"  ± {summary['stdev'] / summary['median']:5.1%}"
+                    f"  ({common.format_duration(summary['min'])} min)")
+        finally:
+            os.chdir(origin)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the calculator benchmark suite.")
+    parser.add_argument('patterns', nargs='*',
+                        help="only run cases matching these patterns, such as 'save_history/*'")
+    parser.add_argument('-o', '--output', help="write the results to this JSON file")
+    parser.add_argument('-n', '--samples', type=int, default=7,
+                        help="timed samples per case (default: 7)")
+    parser.add_argument('-w', '--warmup', type=int, default=1,
+                        help="untimed warmup samples per case (default: 1)")
+    parser.add_argument('--quick', action='store_true',
+                        help="skip the largest history size")
+    args = parser.parse_args()
+
+    print(f"Benchmark suite: median time per operation over {args.samples} samples")
+    print("-" * 60)
+    results = run_suite(args.patterns, args.samples, args.warmup, args.quick)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calculation Server for Advanced Calculator Pro
+Shares one calculator core with other local programs over localhost TCP or
+a Unix socket. Clients keep a connection open and write one JSON request per
+line; each is answered with one JSON line, in the order received, so a
+client may pipeline as many requests as it likes without waiting.
+
+    {"id": 1, "expression": "sqrt(16)+2**10"}
+    -> {"id": 1, "result": 1028.0}
+    {"id": 2, "op": "convert", "value": 100, "type": "length", "from": "m", "to": "km"}
+    -> {"id": 2, "value": 100.0, "result": 0.1}
+    [{"expression": "1+1"}, {"expression": "1/0"}]
+    -> [{"result": 2}, {"error": "division by zero"}]
+
+"op" is "calculate" (the default), "convert" or "ping"; "id" is optional
+and echoed back. A JSON array is a batch, answered by an array on one line.
+
+Requests are evaluated on a single core thread, so the core needs no
+locking, while the event loop only moves lines. Pipelined requests waiting
+on a connection are handed to the core thread together, up to BATCH_SIZE
+at a time. Each connection reads at most MAX_PENDING requests ahead, and at
+most MAX_INFLIGHT requests are accepted across all connections; beyond
+either, the server stops reading and TCP pushes back on the clients.
+
+Examples:
+    python calculation_server.py --port 8765
+    python calculation_server.py --unix /tmp/calculator.sock --no-history
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from calculator_cli import json_value
+from calculator_core import CalculatorCore
+from numeric_modes import MODE_NAMES
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# Longest request line accepted, in bytes
+MAX_LINE = 1 << 20
+
+# Requests read ahead of the answers on one connection
+MAX_PENDING = 256
+
+# Requests accepted but not yet answered, across every connection
+MAX_INFLIGHT = 4096
+
+# Requests handed to the core thread at once
+BATCH_SIZE = 64
+
+# Queued in place of a line longer than MAX_LINE
+_TOO_LONG = object()
+
+
+class CalculationServer:
+    """JSON-lines server in front of a CalculatorCore
+
+    With record=True requests go through calculate and perform_conversion,
+    so they land in history and statistics like calculations in the window;
+    with record=False the core only evaluates and converts.
+    """
+
+    def __init__(self, core, record=True, max_pending=MAX_PENDING, max_inflight=MAX_INFLIGHT,
+                 batch_size=BATCH_SIZE):
+        self.core = core
+        self.record = record
+        self.max_pending = max_pending
+        self.max_inflight = max_inflight
+        self.batch_size = batch_size
+        self.operations = {
+            'calculate': self.calculate,
+            'convert': self.convert,
+            'ping': lambda request: {'result': 'pong'}
+        }
+        self.requests = 0
+        self.batches = 0
+        self.server = None
+        # One thread owns the core; it is not safe to share
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._inflight = None
+        self._connections = set()
+
+    # ------------------------------------------------------------------
+    # Requests, on the core thread
+    # ------------------------------------------------------------------
+
+    def calculate(self, request):
+        expression = _field(request, 'expression')
+        if not isinstance(expression, str):
+            raise ValueError("'expression' must be a string")
+        if self.record:
+            result = self.core.calculate(expression)
+        else:
+            result = self.core.evaluate(expression)
+        return {'result': json_value(result)}
+
+    def convert(self, request):
+        args = (_field(request, 'value'), _field(request, 'type'),
+                _field(request, 'from'), _field(request, 'to'))
+        if self.record:
+            value, result = self.core.perform_conversion(*args)
+        else:
+            value = self.core.conversion_input(args[0])
+            result = self.core.convert(value, *args[1:])
+        return {'value': json_value(value), 'result': json_value(result)}
+
+    def handle(self, request):
+        """Answer one decoded request with a response object"""
+        if not isinstance(request, dict):
+            return {'error': "Expected a JSON object"}
+        response = {'id': request['id']} if 'id' in request else {}
+        try:
+            op = request.get('op', 'calculate')
+            operation = self.operations.get(op)
+            if operation is None:
+                raise ValueError(f"Unknown op {op!r}")
+            response.update(operation(request))
+        except Exception as e:
+            response['error'] = str(e) or type(e).__name__
+        return response
+
+    def process(self, lines):
+        """Answer a batch of request lines, returning the encoded response lines"""
+        self.batches += 1
+        self.requests += len(lines)
+        handle = self.handle
+        out = []
+        for line in lines:
+            if line is _TOO_LONG:
+                out.append(_encode({'error': f"Request longer than {MAX_LINE} bytes"}))
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {'error': f"Invalid JSON: {e}"}
+            else:
+                if isinstance(request, list):
+                    response = [handle(item) for item in request]
+                else:
+                    response = handle(request)
+            out.append(_encode(response))
+        out.append('')
+        return '\n'.join(out).encode('utf-8')
+
+    # ------------------------------------------------------------------
+    # Connections, on the event loop
+    # ------------------------------------------------------------------
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        """Listen on a Unix socket when path is given, otherwise on host:port"""
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._serve, path, limit=MAX_LINE)
+        else:
+            self.server = await asyncio.start_server(self._serve, host, port, limit=MAX_LINE)
+        return self.server
+
+    def addresses(self):
+        """Return the addresses being listened on"""
+        return [sock.getsockname() for sock in self.server.sockets]
+
+    async def close(self):
+        """Stop listening, drop open connections and release the core thread"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for writer in list(self._connections):
+            writer.close()
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._executor.shutdown)
+
+    async def _serve(self, reader, writer):
+        self._connections.add(writer)
+        queue = asyncio.Queue(self.max_pending)
+        responder = asyncio.ensure_future(self._respond(queue, writer))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than MAX_LINE: the rest of the stream cannot be framed
+                    await self._inflight.acquire()
+                    await queue.put(_TOO_LONG)
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                if line.isspace():
+                    continue
+                await self._inflight.acquire()
+                await queue.put(line)
+        finally:
+            await queue.put(None)
+            await responder
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _respond(self, queue, writer):
+        loop = asyncio.get_event_loop()
+        broken = False
+        closing = False
+        while not closing:
+            line = await queue.get()
+            if line is None:
+                break
+            lines = [line]
+            # Everything already pipelined goes to the core thread in one hop
+            while len(lines) < self.batch_size and not queue.empty():
+                line = queue.get_nowait()
+                if line is None:
+                    closing = True
+                    break
+                lines.append(line)
+            try:
+                if not broken:
+                    output = await loop.run_in_executor(self._executor, self.process, lines)
+                    writer.write(output)
+                    await writer.drain()
+            except (ConnectionError, RuntimeError):
+                # Disconnected, or the server is closing: keep draining the
+                # queue so the reader is never stuck on it
+                broken = True
+            finally:
+                for _ in lines:
+                    self._inflight.release()
+
+
+def _encode(response):
+    """Encode a response, or the error of one whose result cannot be encoded
+
+    In a batch only the responses that fail are replaced.
+    """
+    try:
+        return json.dumps(response, ensure_ascii=False)
+    except (TypeError, ValueError) as e:
+        if isinstance(response, list):
+            return '[' + ', '.join(map(_encode, response)) + ']'
+        error = {'id': response['id']} if 'id' in response else {}
+        error['error'] = f"Cannot encode result: {e}"
+        return json.dumps(error, ensure_ascii=False)
+
+
+def _field(request, name):
+    """Return a required request field"""
+    try:
+        return request[name]
+    except KeyError:
+        raise ValueError(f"Missing '{name}'") from None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Serve calculations and conversions to local programs as JSON lines.")
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help=f"address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f"TCP port; 0 picks a free one (default: {DEFAULT_PORT})")
+    parser.add_argument('--unix', metavar='PATH',
+                        help="listen on a Unix socket instead of TCP")
+    parser.add_argument('-m', '--mode', choices=MODE_NAMES, default='float',
+                        help="numeric mode (default: float)")
+    parser.add_argument('-p', '--precision', type=int, default=None,
+                        help="significant digits in decimal mode (default: 28)")
+    parser.add_argument('--no-limits', action='store_true',
+                        help="evaluate without the expression size and cost limits")
+    parser.add_argument('--no-history', action='store_true',
+                        help="do not record requests in history and statistics")
+    parser.add_argument('--max-pending', type=int, default=MAX_PENDING,
+                        help=f"requests read ahead per connection (default: {MAX_PENDING})")
+    parser.add_argument('--max-inflight', type=int, default=MAX_INFLIGHT,
+                        help=f"unanswered requests across connections (default: {MAX_INFLIGHT})")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f"requests evaluated per hop to the core (default: {BATCH_SIZE})")
+    return parser
+
+
+async def serve(args):
+    if args.no_history:
+        core = CalculatorCore(history_file=None, stats_file=None)
+    else:
+        core = CalculatorCore()
+        core.load_history()
+        core.load_statistics()
+    core.set_numeric_mode(args.mode, args.precision)
+    if args.no_limits:
+        core.set_limits(None)
+    core.start_rates()
+
+    server = CalculationServer(core, record=not args.no_history,
+                               max_pending=args.max_pending, max_inflight=args.max_inflight,
+                               batch_size=args.batch_size)
+    await server.start(args.host, args.port, args.unix)
+    for address in server.addresses():
+        if isinstance(address, tuple):
+            address = f"{address[0]}:{address[1]}"
+        print(f"Listening on {address}", flush=True)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_event_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, AttributeError, ValueError):
+            # Windows event loops have no signal handlers; Ctrl+C still interrupts
+            pass
+    try:
+        await stop.wait()
+    finally:
+        await server.close()
+        core.close()
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Error starting server: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
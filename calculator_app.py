@@ -6,319 +6,133 @@ Professional calculator demonstrating comprehensive localization features
 WITHOUT external dependencies (no matplotlib/numpy required!)
 """
 
+import time
+
+# Taken before the other imports so startup profiling covers them
+STARTUP_ORIGIN = time.perf_counter()
+
 import tkinter as tk
-from tkinter import messagebox, ttk, scrolledtext, filedialog
-import json
-import os
-import math
-import datetime
-import csv
-from typing import Dict, List
+from tkinter import messagebox, ttk
+
+from calculator_core import CalculatorCore, FUNCTION_CACHE_SIZE
+from combinatorics import Approximation, MAX_EXACT_DIGITS, ResultTooLarge
+from expression_engine import ExpressionError, LimitError
+from history_record import format_fixed, format_timestamp
+from history_view import HistoryView
+from instrumentation import STAGES, format_seconds
+from numeric_modes import DEFAULT_PRECISION
+from startup_profiler import StartupProfiler
+from sweep import HISTORY_LIMIT as SWEEP_HISTORY_LIMIT, Sweep, SweepWriter, parse_ranges
+from task_pool import TaskTimeout
+from translations import TranslationCatalog
+from workspace import REGISTERS
+
+# How often results of worker processes are collected while tasks run
+TASK_POLL_MS = 20
+
+# Delay after the first frame before a worker process is started
+WORKER_WARMUP_MS = 1000
+
+# How often the converter checks whether new currency rates were installed
+RATES_POLL_MS = 1000
+
+# Sweep points added to the history per event-loop turn
+SWEEP_HISTORY_CHUNK = 500
+
+# How often the Performance dialog redraws its histograms
+PERFORMANCE_REFRESH_MS = 1000
 
 
 class AdvancedCalculator:
-    def __init__(self, root):
+    def __init__(self, root, profiler=None, lazy_tabs=True):
         self.root = root
+        self.profiler = profiler if profiler is not None else StartupProfiler()
+        self.lazy_tabs = lazy_tabs
         self.current_language = "en"
-        self.translations = {}
+        self.translations = TranslationCatalog()
         self.current_theme = "light"
-        self.history = []
-        self.memory = 0
-        self.statistics = {'calculations': 0, 'conversions': 0, 'errors': 0}
+
+        # GUI-free evaluation, conversion, history and statistics
+        with self.profiler.phase('core'):
+            self.core = CalculatorCore()
 
         # Calculator state
         self.current_input = ""
         self.result_var = tk.StringVar()
         self.result_var.set("0")
-
-        # Conversion rates (example data)
-        self.conversion_rates = {
-            'length': {
-                'm': 1, 'km': 0.001, 'cm': 100, 'mm': 1000,
-                'mi': 0.000621371, 'ft': 3.28084, 'in': 39.3701
-            },
-            'weight': {
-                'kg': 1, 'g': 1000, 'mg': 1000000,
-                'lb': 2.20462, 'oz': 35.274
-            },
-            'temperature': {
-                'C': 'base',
-                'F': lambda c: c * 9 / 5 + 32,
-                'K': lambda c: c + 273.15
-            },
-            'currency': {
-                'USD': 1, 'EUR': 0.92, 'RON': 4.56,
-                'GBP': 0.79, 'JPY': 149.50
-            }
-        }
-
-        self.load_translations()
+        # Native value of the result on display, or None while typing
+        self.result_value = None
+        # Memory buttons use the selected register of the workspace
+        self.register_var = tk.StringVar()
+        self.register_var.set(REGISTERS[0])
+        self.register_status = tk.StringVar()
+
+        # History tab state; the tab itself is built on first view
+        self.history_view = None
+        # Generator loading the persisted history, while it runs
+        self.history_loader = None
+        self.history_filter = ""
+        self.exporter = None
+        self.exact_task = None
+        # Calculation running in a worker process, and whether results are being polled
+        self.active_task = None
+        self.polling_tasks = False
+        # Version of the currency rates the converter last showed
+        self.rates_version = None
+        # Running sweep: a SweepWriter for files, or chunks going to history
+        self.sweep_writer = None
+        self.sweep_chunks = None
+
+        with self.profiler.phase('translations'):
+            self.load_translations()
+        with self.profiler.phase('statistics'):
+            self.core.load_statistics()
+        # Needed by the first calculation, unlike the history
+        with self.profiler.phase('workspace'):
+            self.core.load_workspace()
+        with self.profiler.phase('ui'):
+            self.setup_ui()
+        with self.profiler.phase('theme'):
+            self.apply_theme()
+        with self.profiler.phase('localization'):
+            self.apply_localization()
+
+        # History is only needed by the History tab; load it after the first frame
+        self.root.after_idle(self.finish_startup)
+
+    def finish_startup(self):
+        """Load deferred data once the first frame is up, then report timings"""
+        self.profiler.mark('first_frame')
         self.load_history()
-        self.load_statistics()
-        self.setup_ui()
-        self.apply_theme()
-        self.apply_localization()
-
-    def load_translations(self):
-        """Load translation files for all supported languages"""
-        default_translations = {
-            "en": {
-                "app_title": "Advanced Calculator Pro",
-                "result_label": "Result:",
-                "history_label": "History:",
-                "clear_button": "Clear",
-                "clear_history": "Clear History",
-                "language_label": "Language:",
-                "theme_label": "Theme:",
-                "about_menu": "About",
-                "about_title": "About Calculator",
-                "about_message": "Advanced Calculator Pro v2.0\n\nFeatures:\n• Scientific calculations\n• Unit conversions\n• History tracking\n• 5-language support\n• Theme customization\n• Statistics\n\nCreated for: CIVIS BIP 2024-2025",
-                "error_title": "Error",
-                "error_message": "Invalid expression. Please try again.",
-                "memory_store": "Memory+",
-                "memory_recall": "Recall",
-                "memory_clear": "Clear Mem",
-                "export_button": "Export",
-                "stats_button": "Statistics",
-                "basic_tab": "Basic",
-                "scientific_tab": "Scientific",
-                "converter_tab": "Converter",
-                "history_tab": "History",
-                "light_theme": "Light",
-                "dark_theme": "Dark",
-                "length_label": "Length",
-                "weight_label": "Weight",
-                "temperature_label": "Temperature",
-                "currency_label": "Currency",
-                "from_label": "From:",
-                "to_label": "To:",
-                "convert_label": "Convert",
-                "value_label": "Value:",
-                "export_success": "Results exported successfully!",
-                "export_error": "Error exporting results.",
-                "stats_title": "Usage Statistics",
-                "stats_calculations": "Calculations:",
-                "stats_conversions": "Conversions:",
-                "stats_errors": "Errors:",
-                "close_button": "Close"
-            },
-            "ro": {
-                "app_title": "Calculator Avansat Pro",
-                "result_label": "Rezultat:",
-                "history_label": "Istoric:",
-                "clear_button": "Șterge",
-                "clear_history": "Șterge Istoric",
-                "language_label": "Limba:",
-                "theme_label": "Temă:",
-                "about_menu": "Despre",
-                "about_title": "Despre Calculator",
-                "about_message": "Calculator Avansat Pro v2.0\n\nFuncționalități:\n• Calcule științifice\n• Conversii unități\n• Istoric calcule\n• Suport 5 limbi\n• Personalizare temă\n• Statistici\n\nCreat pentru: CIVIS BIP 2024-2025",
-                "error_title": "Eroare",
-                "error_message": "Expresie invalidă. Vă rugăm încercați din nou.",
-                "memory_store": "Memorie+",
-                "memory_recall": "Recuperează",
-                "memory_clear": "Șterge Mem",
-                "export_button": "Exportă",
-                "stats_button": "Statistici",
-                "basic_tab": "Bază",
-                "scientific_tab": "Științific",
-                "converter_tab": "Convertor",
-                "history_tab": "Istoric",
-                "light_theme": "Luminos",
-                "dark_theme": "Întunecat",
-                "length_label": "Lungime",
-                "weight_label": "Greutate",
-                "temperature_label": "Temperatură",
-                "currency_label": "Valută",
-                "from_label": "Din:",
-                "to_label": "În:",
-                "convert_label": "Convertește",
-                "value_label": "Valoare:",
-                "export_success": "Rezultate exportate cu succes!",
-                "export_error": "Eroare la exportare.",
-                "stats_title": "Statistici Utilizare",
-                "stats_calculations": "Calcule:",
-                "stats_conversions": "Conversii:",
-                "stats_errors": "Erori:",
-                "close_button": "Închide"
-            },
-            "es": {
-                "app_title": "Calculadora Avanzada Pro",
-                "result_label": "Resultado:",
-                "history_label": "Historial:",
-                "clear_button": "Borrar",
-                "clear_history": "Borrar Historial",
-                "language_label": "Idioma:",
-                "theme_label": "Tema:",
-                "about_menu": "Acerca de",
-                "about_title": "Acerca de la Calculadora",
-                "about_message": "Calculadora Avanzada Pro v2.0\n\nCaracterísticas:\n• Cálculos científicos\n• Conversiones\n• Historial\n• 5 idiomas\n• Temas personalizados\n• Estadísticas\n\nCreado para: CIVIS BIP 2024-2025",
-                "error_title": "Error",
-                "error_message": "Expresión inválida. Inténtelo de nuevo.",
-                "memory_store": "Memoria+",
-                "memory_recall": "Recuperar",
-                "memory_clear": "Borrar Mem",
-                "export_button": "Exportar",
-                "stats_button": "Estadísticas",
-                "basic_tab": "Básico",
-                "scientific_tab": "Científico",
-                "converter_tab": "Conversor",
-                "history_tab": "Historial",
-                "light_theme": "Claro",
-                "dark_theme": "Oscuro",
-                "length_label": "Longitud",
-                "weight_label": "Peso",
-                "temperature_label": "Temperatura",
-                "currency_label": "Moneda",
-                "from_label": "De:",
-                "to_label": "A:",
-                "convert_label": "Convertir",
-                "value_label": "Valor:",
-                "export_success": "¡Resultados exportados!",
-                "export_error": "Error al exportar.",
-                "stats_title": "Estadísticas de Uso",
-                "stats_calculations": "Cálculos:",
-                "stats_conversions": "Conversiones:",
-                "stats_errors": "Errores:",
-                "close_button": "Cerrar"
-            },
-            "fr": {
-                "app_title": "Calculatrice Avancée Pro",
-                "result_label": "Résultat:",
-                "history_label": "Historique:",
-                "clear_button": "Effacer",
-                "clear_history": "Effacer Historique",
-                "language_label": "Langue:",
-                "theme_label": "Thème:",
-                "about_menu": "À propos",
-                "about_title": "À propos",
-                "about_message": "Calculatrice Avancée Pro v2.0\n\nFonctionnalités:\n• Calculs scientifiques\n• Conversions\n• Historique\n• 5 langues\n• Thèmes\n• Statistiques\n\nCréé pour: CIVIS BIP 2024-2025",
-                "error_title": "Erreur",
-                "error_message": "Expression invalide. Réessayez.",
-                "memory_store": "Mémoire+",
-                "memory_recall": "Rappeler",
-                "memory_clear": "Effacer Mém",
-                "export_button": "Exporter",
-                "stats_button": "Statistiques",
-                "basic_tab": "Base",
-                "scientific_tab": "Scientifique",
-                "converter_tab": "Convertisseur",
-                "history_tab": "Historique",
-                "light_theme": "Clair",
-                "dark_theme": "Sombre",
-                "length_label": "Longueur",
-                "weight_label": "Poids",
-                "temperature_label": "Température",
-                "currency_label": "Devise",
-                "from_label": "De:",
-                "to_label": "À:",
-                "convert_label": "Convertir",
-                "value_label": "Valeur:",
-                "export_success": "Résultats exportés!",
-                "export_error": "Erreur d'exportation.",
-                "stats_title": "Statistiques",
-                "stats_calculations": "Calculs:",
-                "stats_conversions": "Conversions:",
-                "stats_errors": "Erreurs:",
-                "close_button": "Fermer"
-            },
-            "de": {
-                "app_title": "Erweiterter Rechner Pro",
-                "result_label": "Ergebnis:",
-                "history_label": "Verlauf:",
-                "clear_button": "Löschen",
-                "clear_history": "Verlauf Löschen",
-                "language_label": "Sprache:",
-                "theme_label": "Thema:",
-                "about_menu": "Über",
-                "about_title": "Über",
-                "about_message": "Erweiterter Rechner Pro v2.0\n\nFunktionen:\n• Wissenschaftliche Berechnungen\n• Umrechnungen\n• Verlauf\n• 5 Sprachen\n• Themen\n• Statistiken\n\nErstellt für: CIVIS BIP 2024-2025",
-                "error_title": "Fehler",
-                "error_message": "Ungültiger Ausdruck. Bitte erneut versuchen.",
-                "memory_store": "Speicher+",
-                "memory_recall": "Abrufen",
-                "memory_clear": "Speicher Löschen",
-                "export_button": "Exportieren",
-                "stats_button": "Statistiken",
-                "basic_tab": "Basis",
-                "scientific_tab": "Wissenschaftlich",
-                "converter_tab": "Umrechner",
-                "history_tab": "Verlauf",
-                "light_theme": "Hell",
-                "dark_theme": "Dunkel",
-                "length_label": "Länge",
-                "weight_label": "Gewicht",
-                "temperature_label": "Temperatur",
-                "currency_label": "Währung",
-                "from_label": "Von:",
-                "to_label": "Nach:",
-                "convert_label": "Umrechnen",
-                "value_label": "Wert:",
-                "export_success": "Erfolgreich exportiert!",
-                "export_error": "Exportfehler.",
-                "stats_title": "Statistiken",
-                "stats_calculations": "Berechnungen:",
-                "stats_conversions": "Umrechnungen:",
-                "stats_errors": "Fehler:",
-                "close_button": "Schließen"
-            }
-        }
-
-        languages = ["en", "ro", "es", "fr", "de"]
-        for lang in languages:
-            file_path = f"locales/{lang}/translations.json"
-            if os.path.exists(file_path):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        loaded_trans = json.load(f)
-                        # Merge with defaults to ensure all keys exist
-                        self.translations[lang] = {**default_translations[lang], **loaded_trans}
-                except Exception as e:
-                    print(f"Error loading {lang}: {e}")
-                    self.translations[lang] = default_translations[lang]
-            else:
-                print(f"Creating translation file: {file_path}")
-                os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                self.translations[lang] = default_translations[lang]
-                try:
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        json.dump(default_translations[lang], f, ensure_ascii=False, indent=4)
-                except Exception as e:
-                    print(f"Warning: Could not create {file_path}: {e}")
+        self.profiler.mark('ready')
+        self.profiler.emit()
+        # Have one worker process ready before the first calculation
+        self.root.after(WORKER_WARMUP_MS, lambda: self.core.get_task_pool().start(1))
+        # Currency rates refresh in the background from here on
+        self.core.start_rates()
+        self.root.after(RATES_POLL_MS, self.poll_rates)
 
     def load_history(self):
-        """Load calculation history from file"""
-        if os.path.exists('calculator_history.json'):
-            try:
-                with open('calculator_history.json', 'r', encoding='utf-8') as f:
-                    self.history = json.load(f)
-            except:
-                self.history = []
-
-    def save_history(self):
-        """Save calculation history to file"""
+        """Load persisted history a batch per event-loop turn, then show it"""
+        self.history_loader = self.core.load_history_batches()
+        self.root.after(1, self.continue_history_load)
+
+    def continue_history_load(self):
+        """Load the next batch of history, keeping the interface responsive"""
+        if self.history_loader is None:
+            return
         try:
-            with open('calculator_history.json', 'w', encoding='utf-8') as f:
-                json.dump(self.history[-100:], f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Error saving history: {e}")
-
-    def load_statistics(self):
-        """Load usage statistics"""
-        if os.path.exists('calculator_stats.json'):
-            try:
-                with open('calculator_stats.json', 'r', encoding='utf-8') as f:
-                    self.statistics = json.load(f)
-            except:
-                self.statistics = {'calculations': 0, 'conversions': 0, 'errors': 0}
+            next(self.history_loader)
+        except StopIteration:
+            self.history_loader = None
+            self.profiler.mark('history_loaded')
+            self.update_history_display()
+            return
+        self.root.after(1, self.continue_history_load)
 
-    def save_statistics(self):
-        """Save usage statistics"""
-        try:
-            with open('calculator_stats.json', 'w', encoding='utf-8') as f:
-                json.dump(self.statistics, f, indent=2)
-        except Exception as e:
-            print(f"Error saving statistics: {e}")
+    def load_translations(self):
+        """Load the English catalog; other languages load on first use"""
+        self.translations.load("en")
 
     def setup_ui(self):
         """Create the comprehensive user interface"""
@@ -363,9 +177,46 @@ class AdvancedCalculator:
                                     command=self.show_statistics, width=10)
         self.stats_btn.grid(row=0, column=4, sticky=tk.W, padx=(0, 5))
 
+        self.perf_btn = ttk.Button(control_frame, text="Performance",
+                                   command=self.show_performance, width=12)
+        self.perf_btn.grid(row=0, column=5, sticky=tk.W, padx=(0, 5))
+
         self.about_btn = ttk.Button(control_frame, text="About",
                                     command=self.show_about, width=10)
-        self.about_btn.grid(row=0, column=5, sticky=tk.W)
+        self.about_btn.grid(row=0, column=6, sticky=tk.W)
+
+        # Numeric mode selector; precision only applies to Decimal
+        self.mode_label = ttk.Label(control_frame, text="Mode:")
+        self.mode_label.grid(row=1, column=0, sticky=tk.W, padx=(0, 5), pady=(5, 0))
+
+        self.mode_combo = ttk.Combobox(control_frame,
+                                       values=["Float", "Decimal", "Fraction"],
+                                       state="readonly", width=12)
+        self.mode_combo.set("Float")
+        self.mode_combo.grid(row=1, column=1, sticky=tk.W, padx=(0, 15), pady=(5, 0))
+        self.mode_combo.bind("<<ComboboxSelected>>", self.change_numeric_mode)
+
+        self.precision_label = ttk.Label(control_frame, text="Digits:")
+        self.precision_label.grid(row=1, column=2, sticky=tk.W, padx=(0, 5), pady=(5, 0))
+
+        self.precision_var = tk.StringVar()
+        self.precision_var.set(str(DEFAULT_PRECISION))
+        self.precision_spin = ttk.Spinbox(control_frame, from_=2, to=1000, width=8,
+                                          textvariable=self.precision_var,
+                                          command=self.change_numeric_mode,
+                                          state="disabled")
+        self.precision_spin.grid(row=1, column=3, sticky=tk.W, pady=(5, 0))
+        self.precision_spin.bind("<Return>", self.change_numeric_mode)
+
+        # Tabulate an expression over ranges of its variables
+        self.sweep_btn = ttk.Button(control_frame, text="Sweep",
+                                    command=self.show_sweep, width=10)
+        self.sweep_btn.grid(row=1, column=4, sticky=tk.W, pady=(5, 0))
+
+        # Variables and user functions
+        self.workspace_btn = ttk.Button(control_frame, text="Workspace",
+                                        command=self.show_workspace, width=12)
+        self.workspace_btn.grid(row=1, column=5, sticky=tk.W, padx=(5, 0), pady=(5, 0))
 
         # Display frame
         display_frame = ttk.LabelFrame(main_frame, text="", padding="10")
@@ -387,22 +238,42 @@ class AdvancedCalculator:
         # Tab 1: Basic Calculator
         self.basic_frame = ttk.Frame(self.notebook, padding="10")
         self.notebook.add(self.basic_frame, text="Basic")
-        self.setup_basic_calculator()
 
         # Tab 2: Scientific Calculator
         self.scientific_frame = ttk.Frame(self.notebook, padding="10")
         self.notebook.add(self.scientific_frame, text="Scientific")
-        self.setup_scientific_calculator()
 
         # Tab 3: Unit Converter
         self.converter_frame = ttk.Frame(self.notebook, padding="10")
         self.notebook.add(self.converter_frame, text="Converter")
-        self.setup_converter()
 
         # Tab 4: History
         self.history_frame = ttk.Frame(self.notebook, padding="10")
         self.notebook.add(self.history_frame, text="History")
-        self.setup_history()
+
+        # Tab contents are built the first time each tab is shown
+        self.tab_builders = [self.setup_basic_calculator, self.setup_scientific_calculator,
+                             self.setup_converter, self.setup_history]
+        self.built_tabs = set()
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+        for index in (range(len(self.tab_builders)) if not self.lazy_tabs else [0]):
+            self.build_tab(index)
+
+    def build_tab(self, index):
+        """Build a tab's widgets unless they exist; return True if built now"""
+        if index in self.built_tabs:
+            return False
+        self.built_tabs.add(index)
+        builder = self.tab_builders[index]
+        with self.profiler.phase(builder.__name__):
+            builder()
+        return True
+
+    def on_tab_changed(self, event=None):
+        """Build the selected tab on first view"""
+        index = self.notebook.index(self.notebook.select())
+        if self.build_tab(index):
+            self.localize_tab(index, self.translations[self.current_language])
 
     def setup_basic_calculator(self):
         """Setup basic calculator buttons"""
@@ -436,6 +307,16 @@ class AdvancedCalculator:
                 btn.grid(row=i, column=j, padx=3, pady=3, sticky=(tk.W, tk.E))
                 self.basic_frame.columnconfigure(j, weight=1)
 
+        # Register used by M+, MR and MC: M0-M9 or a name typed in
+        self.register_label = ttk.Label(self.basic_frame, text="Register:")
+        self.register_label.grid(row=4, column=0, sticky=tk.E, padx=3, pady=(10, 3))
+        self.register_combo = ttk.Combobox(self.basic_frame, textvariable=self.register_var,
+                                           values=self.core.workspace.registers(), width=8,
+                                           postcommand=self.update_registers)
+        self.register_combo.grid(row=4, column=1, sticky=(tk.W, tk.E), padx=3, pady=(10, 3))
+        ttk.Label(self.basic_frame, textvariable=self.register_status).grid(
+            row=4, column=2, columnspan=3, sticky=tk.W, padx=3, pady=(10, 3))
+
     def setup_scientific_calculator(self):
         """Setup scientific calculator buttons"""
         sci_buttons = [
@@ -457,8 +338,8 @@ class AdvancedCalculator:
             'x²': lambda: self.button_click('**2'),
             'x³': lambda: self.button_click('**3'),
             '√': lambda: self.button_click('sqrt('),
-            'π': lambda: self.button_click(str(math.pi)),
-            'e': lambda: self.button_click(str(math.e)),
+            'π': lambda: self.button_click('pi'),
+            'e': lambda: self.button_click('e'),
             'n!': self.factorial_input,
             '%': lambda: self.button_click('/100'),
             '1/x': self.reciprocal,
@@ -531,26 +412,56 @@ class AdvancedCalculator:
                                      font=('Arial', 12, 'bold'), foreground='#0066cc')
         self.conv_result.grid(row=5, column=0, columnspan=2, pady=10)
 
+        # Currency rate snapshot in use
+        rates_frame = ttk.Frame(self.converter_frame)
+        rates_frame.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        rates_frame.columnconfigure(0, weight=1)
+
+        self.rates_label = ttk.Label(rates_frame, text="", foreground='gray')
+        self.rates_label.grid(row=0, column=0, sticky=tk.W)
+
+        self.refresh_rates_btn = ttk.Button(rates_frame, text="Refresh rates",
+                                            command=self.core.refresh_rates)
+        self.refresh_rates_btn.grid(row=0, column=1, sticky=tk.E)
+
         self.update_converter_units()
+        self.update_rates_label()
 
     def setup_history(self):
         """Setup history display tab"""
+        # Search bar
+        search_frame = ttk.Frame(self.history_frame)
+        search_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 5))
+        search_frame.columnconfigure(0, weight=1)
+
+        self.history_query = ttk.Entry(search_frame)
+        self.history_query.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 5))
+        self.history_query.bind("<Return>", self.search_history)
+
+        self.search_btn = ttk.Button(search_frame, text="Search",
+                                     command=self.search_history, width=10)
+        self.search_btn.grid(row=0, column=1, padx=(0, 5))
+
+        self.show_all_btn = ttk.Button(search_frame, text="Show All",
+                                       command=self.show_all_history, width=10)
+        self.show_all_btn.grid(row=0, column=2)
+
         # History text area
         history_label_frame = ttk.LabelFrame(self.history_frame, text="", padding="10")
-        history_label_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
-        self.history_frame.rowconfigure(0, weight=1)
+        history_label_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
+        self.history_frame.rowconfigure(1, weight=1)
         self.history_frame.columnconfigure(0, weight=1)
 
-        self.history_text = scrolledtext.ScrolledText(history_label_frame,
-                                                      height=15, width=50,
-                                                      font=('Courier', 9))
-        self.history_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        # Virtualized: only the visible entries are ever inserted into the widget
+        self.history_view = HistoryView(history_label_frame, self.core.history,
+                                        height=15, width=50, font=('Courier', 9))
+        self.history_view.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         history_label_frame.rowconfigure(0, weight=1)
         history_label_frame.columnconfigure(0, weight=1)
 
         # Buttons frame
         button_frame = ttk.Frame(self.history_frame)
-        button_frame.grid(row=1, column=0, sticky=(tk.W, tk.E))
+        button_frame.grid(row=2, column=0, sticky=(tk.W, tk.E))
 
         self.clear_history_btn = ttk.Button(button_frame, text="Clear History",
                                             command=self.clear_history, width=15)
@@ -560,6 +471,12 @@ class AdvancedCalculator:
                                      command=self.export_results, width=15)
         self.export_btn.grid(row=0, column=1, padx=5)
 
+        # Shown only while an export is running
+        self.export_progress = ttk.Progressbar(button_frame, mode='determinate',
+                                               maximum=100, length=150)
+        self.export_progress.grid(row=0, column=2, padx=5)
+        self.export_progress.grid_remove()
+
         self.update_history_display()
 
     def button_click(self, value):
@@ -568,265 +485,561 @@ class AdvancedCalculator:
             self.calculate()
         else:
             self.current_input += str(value)
+            self.result_value = None
             self.result_var.set(self.current_input)
 
     def calculate(self):
-        """Perform calculation"""
+        """Perform calculation in a worker process"""
+        if self.active_task is not None:
+            return
         try:
-            expr = self.current_input.replace('×', '*').replace('÷', '/')
-
-            # Safe namespace for eval
-            safe_dict = {
-                'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
-                'asin': math.asin, 'acos': math.acos, 'atan': math.atan,
-                'log': math.log, 'log10': math.log10,
-                'sqrt': math.sqrt, 'pi': math.pi, 'e': math.e,
-                'pow': pow, 'abs': abs
-            }
-
-            result = eval(expr, {"__builtins__": {}}, safe_dict)
-            self.result_var.set(str(result))
-
-            # Add to history
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.history.append({
-                'expression': self.current_input,
-                'result': str(result),
-                'timestamp': timestamp,
-                'type': 'calculation'
-            })
-            self.save_history()
-            self.update_history_display()
-
-            # Update statistics
-            self.statistics['calculations'] += 1
-            self.save_statistics()
+            self.active_task = self.core.calculate_async(self.current_input,
+                                                         callback=self.calculation_finished)
+        except LimitError:
+            self.show_error("limit_error", "The expression is too large or complex to calculate.")
+            return
+        except Exception:
+            self.show_error()
+            return
+        self.result_var.set("…")
+        self.watch_tasks()
+
+    def calculation_finished(self, task):
+        """Show a finished calculation, or why it failed"""
+        self.active_task = None
+        if task.cancelled:
+            return
+        if task.error is None:
+            try:
+                self.result_var.set(str(task.result))
+                self.history_entry_added()
+                self.current_input = str(task.result)
+                self.result_value = task.result
+                return
+            except Exception:
+                pass
+        self.show_task_error(task)
+        self.current_input = ""
+        self.result_value = None
+        self.result_var.set("0")
 
-            self.current_input = str(result)
-        except Exception as e:
-            self.statistics['errors'] += 1
-            self.save_statistics()
+    def show_task_error(self, task):
+        """Report a failed background task, naming timeouts and exceeded limits"""
+        if isinstance(task.error, TaskTimeout):
+            self.show_error("timeout_message", "The calculation took too long and was stopped.")
+        elif isinstance(task.error, (LimitError, ResultTooLarge)):
+            self.show_error("limit_error", "The expression is too large or complex to calculate.")
+        else:
             self.show_error()
-            self.current_input = ""
-            self.result_var.set("0")
+
+    def watch_tasks(self):
+        """Start a submitted task now and poll for results unless already polling"""
+        self.core.poll_tasks()
+        if not self.polling_tasks:
+            self.polling_tasks = True
+            self.root.after(TASK_POLL_MS, self.poll_tasks)
+
+    def poll_tasks(self):
+        """Deliver background results to the interface while tasks are running"""
+        if self.core.poll_tasks():
+            self.root.after(TASK_POLL_MS, self.poll_tasks)
+        else:
+            self.polling_tasks = False
 
     def clear_input(self):
-        """Clear current input"""
+        """Clear current input, cancelling a running calculation"""
+        if self.active_task is not None:
+            self.active_task.cancel()
+            self.active_task = None
         self.current_input = ""
+        self.result_value = None
         self.result_var.set("0")
 
     def backspace(self):
         """Remove last character"""
         self.current_input = self.current_input[:-1]
+        self.result_value = None
         self.result_var.set(self.current_input if self.current_input else "0")
 
     def factorial_input(self):
-        """Calculate factorial"""
+        """Calculate factorial in a worker process"""
+        if self.active_task is not None:
+            return
         try:
-            num = int(float(self.current_input))
-            if num < 0:
-                raise ValueError("Negative number")
-            result = math.factorial(num)
-            self.result_var.set(str(result))
-            self.current_input = str(result)
-
-            # Add to history
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.history.append({
-                'expression': f'{num}!',
-                'result': str(result),
-                'timestamp': timestamp,
-                'type': 'calculation'
-            })
-            self.save_history()
-            self.update_history_display()
-            self.statistics['calculations'] += 1
-            self.save_statistics()
+            self.active_task = self.core.factorial_async(self.current_input,
+                                                         callback=self.factorial_finished)
         except Exception:
-            self.statistics['errors'] += 1
-            self.save_statistics()
             self.show_error()
+            return
+        self.result_var.set("…")
+        self.watch_tasks()
+
+    def factorial_finished(self, task):
+        """Show a finished factorial and offer exact digits for approximations"""
+        self.active_task = None
+        if task.cancelled:
+            return
+        if task.error is not None:
+            self.show_task_error(task)
+            self.result_var.set(self.current_input or "0")
+            return
+        result = task.result
+        self.result_var.set(str(result))
+        self.history_entry_added()
+        if isinstance(result, Approximation):
+            # Too long to show; the exact digits are only produced on request
+            self.current_input = ""
+            self.result_value = None
+            self.offer_exact_result(result)
+        else:
+            self.current_input = str(result)
+            self.result_value = result
+
+    def offer_exact_result(self, result):
+        """Offer to compute an approximated result exactly and save it to a file"""
+        if result.exact is None or result.digits > MAX_EXACT_DIGITS:
+            return
+        if self.exact_task is not None and not self.exact_task.done:
+            return
+        trans = self.translations[self.current_language]
+        if not messagebox.askyesno(trans.get("exact_result_title", "Exact Result"),
+                                   f"{result.digits:,} {trans.get('digits_label', 'digits')}. "
+                                   f"{trans.get('save_exact_prompt', 'Save the exact result to a file?')}"):
+            return
+        from tkinter import filedialog
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".txt",
+            filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
+        )
+        if filename:
+            # Computing and formatting millions of digits takes seconds to
+            # minutes; a worker process keeps the interface responsive
+            self.exact_task = self.core.write_exact_async(result, filename,
+                                                          callback=self.exact_result_written)
+            self.watch_tasks()
+
+    def exact_result_written(self, task):
+        """Report the exact digits written by a worker process"""
+        if task.cancelled:
+            return
+        trans = self.translations[self.current_language]
+        if task.error is not None:
+            messagebox.showerror("Error", trans.get("export_error", "Export failed!"))
+        else:
+            messagebox.showinfo("Success", trans.get("export_success", "Export successful!"))
 
     def reciprocal(self):
         """Calculate reciprocal"""
         try:
-            num = float(self.current_input)
-            result = 1 / num
+            result = self.core.reciprocal(self.current_input)
             self.result_var.set(str(result))
             self.current_input = str(result)
-
-            # Add to history
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.history.append({
-                'expression': f'1/{num}',
-                'result': str(result),
-                'timestamp': timestamp,
-                'type': 'calculation'
-            })
-            self.save_history()
-            self.update_history_display()
-            self.statistics['calculations'] += 1
-            self.save_statistics()
+            self.result_value = result
+            self.history_entry_added()
         except Exception:
-            self.statistics['errors'] += 1
-            self.save_statistics()
             self.show_error()
 
+    def selected_register(self):
+        """Name of the register the memory buttons use"""
+        return self.register_var.get().strip() or REGISTERS[0]
+
+    def update_registers(self):
+        """Offer M0-M9 and the other workspace variables as registers"""
+        self.register_combo.config(values=self.core.workspace.registers())
+
     def memory_store(self):
-        """Store current value in memory"""
+        """Store the result on display, or the number being typed, in the register"""
+        name = self.selected_register()
+        trans = self.translations[self.current_language]
         try:
-            self.memory = float(self.result_var.get())
-            trans = self.translations[self.current_language]
-            messagebox.showinfo("Memory", f"{trans.get('memory_store', 'Stored')}: {self.memory}")
-        except:
-            pass
+            value = self.result_value
+            if value is None:
+                value = self.core.numeric_mode.number(self.current_input or "0")
+            self.core.workspace.assign(name, value)
+        except Exception as e:
+            self.register_status.set(f"{trans.get('error_title', 'Error')}: {e}")
+            return
+        self.register_status.set(f"{name} = {value}")
 
     def memory_recall(self):
-        """Recall value from memory"""
-        self.current_input = str(self.memory)
+        """Add the register to the input; the expression reads its stored value"""
+        name = self.selected_register()
+        if self.result_value is not None:
+            # Start a new expression rather than run the name into the
+            # result on display, as in 42M3
+            self.current_input = ""
+        self.current_input += name
+        self.result_value = None
         self.result_var.set(self.current_input)
 
     def memory_clear(self):
-        """Clear memory"""
-        self.memory = 0
+        """Empty the register"""
+        name = self.selected_register()
         trans = self.translations[self.current_language]
-        messagebox.showinfo("Memory", trans.get('memory_clear', 'Memory cleared'))
+        try:
+            self.core.workspace.clear_register(name)
+        except ExpressionError as e:
+            self.register_status.set(f"{trans.get('error_title', 'Error')}: {e}")
+            return
+        self.register_status.set(f"{name}: {trans.get('memory_clear', 'Memory cleared')}")
 
     def update_converter_units(self, event=None):
         """Update converter unit options"""
         conv_type = self.conv_type.get().lower()
 
-        units_map = {
-            'length': ['m', 'km', 'cm', 'mm', 'mi', 'ft', 'in'],
-            'weight': ['kg', 'g', 'mg', 'lb', 'oz'],
-            'temperature': ['C', 'F', 'K'],
-            'currency': ['USD', 'EUR', 'RON', 'GBP', 'JPY']
-        }
-
-        units = units_map.get(conv_type, ['m', 'km'])
+        table = self.core.conversion_table
+        if conv_type not in table.categories():
+            conv_type = table.categories()[0]
+        units = table.units(conv_type)
         self.from_unit['values'] = units
         self.to_unit['values'] = units
         self.from_unit.set(units[0])
         self.to_unit.set(units[1] if len(units) > 1 else units[0])
         self.conv_result.config(text="")
 
+    def update_rates_label(self):
+        """Show which currency rate snapshot conversions use"""
+        if 2 not in self.built_tabs:
+            return
+        trans = self.translations[self.current_language]
+        snapshot = self.core.rate_service.snapshot
+        self.rates_label.config(text=f"{trans.get('rates_label', 'Rates:')} {snapshot.version} "
+                                     f"({format_timestamp(snapshot.fetched)})")
+
+    def poll_rates(self):
+        """Pick up currency rates installed by the background refresher"""
+        table = self.core.conversion_table
+        if table.version != self.rates_version:
+            self.rates_version = table.version
+            self.update_rates_label()
+            if 2 in self.built_tabs and self.conv_type.get().lower() == 'currency':
+                units = table.units('currency')
+                if list(self.from_unit['values']) != units:
+                    self.update_converter_units()
+        self.root.after(RATES_POLL_MS, self.poll_rates)
+
     def perform_conversion(self):
         """Perform unit conversion"""
         try:
-            value = float(self.conv_value.get())
-            conv_type = self.conv_type.get().lower()
             from_unit = self.from_unit.get()
             to_unit = self.to_unit.get()
+            value, result = self.core.perform_conversion(
+                self.conv_value.get(), self.conv_type.get().lower(), from_unit, to_unit)
 
-            if conv_type == 'temperature':
-                # Temperature conversion
-                if from_unit == 'C':
-                    if to_unit == 'F':
-                        result = value * 9 / 5 + 32
-                    elif to_unit == 'K':
-                        result = value + 273.15
-                    else:
-                        result = value
-                elif from_unit == 'F':
-                    if to_unit == 'C':
-                        result = (value - 32) * 5 / 9
-                    elif to_unit == 'K':
-                        result = (value - 32) * 5 / 9 + 273.15
-                    else:
-                        result = value
-                else:  # Kelvin
-                    if to_unit == 'C':
-                        result = value - 273.15
-                    elif to_unit == 'F':
-                        result = (value - 273.15) * 9 / 5 + 32
-                    else:
-                        result = value
-            else:
-                # Standard conversion
-                rates = self.conversion_rates[conv_type]
-                # Convert to base unit first, then to target unit
-                base_value = value / rates[from_unit]
-                result = base_value * rates[to_unit]
-
-            self.conv_result.config(text=f"{value} {from_unit} = {result:.4f} {to_unit}")
-
-            # Add to history
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.history.append({
-                'expression': f"Convert: {value} {from_unit} to {to_unit}",
-                'result': f"{result:.4f} {to_unit}",
-                'timestamp': timestamp,
-                'type': 'conversion'
-            })
-            self.save_history()
-            self.update_history_display()
-
-            # Update statistics
-            self.statistics['conversions'] += 1
-            self.save_statistics()
-
+            self.conv_result.config(text=f"{value} {from_unit} = {format_fixed(result)} {to_unit}")
+            self.history_entry_added()
         except Exception as e:
-            self.statistics['errors'] += 1
-            self.save_statistics()
             self.show_error()
 
     def update_history_display(self):
-        """Update history text widget"""
-        self.history_text.delete('1.0', tk.END)
-        for item in reversed(self.history[-50:]):  # Show last 50
-            entry_type = item.get('type', 'calculation').upper()
-            self.history_text.insert(tk.END,
-                                     f"[{entry_type}] {item['timestamp']}\n{item['expression']} = {item['result']}\n\n")
+        """Redraw the history view from the current history or search"""
+        if self.history_view is None:
+            return
+        timed = self.core.instruments.enabled
+        if timed:
+            start = time.perf_counter()
+        if self.history_filter:
+            self.history_view.set_source(self.core.search_history(self.history_filter))
+        else:
+            self.history_view.set_source(self.core.history)
+        if timed:
+            self.core.instruments.record('history_redraw', time.perf_counter() - start)
+
+    def history_entry_added(self):
+        """Show a new history entry"""
+        if self.history_view is None:
+            return
+        if self.history_filter:
+            self.update_history_display()
+            return
+        timed = self.core.instruments.enabled
+        if timed:
+            start = time.perf_counter()
+        self.history_view.entry_added()
+        if timed:
+            self.core.instruments.record('history_redraw', time.perf_counter() - start)
+
+    def search_history(self, event=None):
+        """Filter the history view with the search box query"""
+        try:
+            self.history_filter = self.history_query.get().strip()
+            self.update_history_display()
+        except ValueError:
+            self.history_filter = ""
+            self.show_error()
+
+    def show_all_history(self):
+        """Clear the search and show the whole history"""
+        self.history_query.delete(0, tk.END)
+        self.history_filter = ""
+        self.update_history_display()
 
     def clear_history(self):
         """Clear calculation history"""
-        self.history = []
-        self.save_history()
+        self.core.clear_history()
         self.update_history_display()
         trans = self.translations[self.current_language]
         messagebox.showinfo("History", trans.get('clear_history', 'History cleared'))
 
     def export_results(self):
-        """Export history to file"""
+        """Export history to file in the background; while running, cancel it"""
+        if self.exporter is not None and not self.exporter.done:
+            self.exporter.cancel()
+            return
+        # Only needed here, so it stays out of startup
+        from tkinter import filedialog
         try:
             filename = filedialog.asksaveasfilename(
                 defaultextension=".txt",
-                filetypes=[("Text files", "*.txt"), ("CSV files", "*.csv"), ("All files", "*.*")]
+                filetypes=[("Text files", "*.txt"), ("CSV files", "*.csv"),
+                           ("JSON Lines files", "*.jsonl"), ("Columnar history", "*.hcol"),
+                           ("All files", "*.*")]
             )
             if filename:
-                if filename.endswith('.csv'):
-                    with open(filename, 'w', newline='', encoding='utf-8') as f:
-                        writer = csv.writer(f)
-                        writer.writerow(['Timestamp', 'Type', 'Expression', 'Result'])
-                        for item in self.history:
-                            writer.writerow([
-                                item['timestamp'],
-                                item.get('type', 'calculation'),
-                                item['expression'],
-                                item['result']
-                            ])
-                else:
-                    with open(filename, 'w', encoding='utf-8') as f:
-                        f.write("Calculator History Export\n")
-                        f.write("=" * 60 + "\n\n")
-                        for item in self.history:
-                            entry_type = item.get('type', 'calculation').upper()
-                            f.write(f"[{entry_type}] {item['timestamp']}\n")
-                            f.write(f"{item['expression']} = {item['result']}\n\n")
-
+                self.exporter = self.core.export_history(filename)
                 trans = self.translations[self.current_language]
-                messagebox.showinfo("Success", trans.get("export_success", "Export successful!"))
+                self.export_btn.config(text=trans.get("cancel_button", "Cancel"))
+                self.export_progress['value'] = 0
+                self.export_progress.grid()
+                self.root.after(100, self.poll_export)
         except Exception as e:
             trans = self.translations[self.current_language]
             messagebox.showerror("Error", trans.get("export_error", "Export failed!"))
 
+    def poll_export(self):
+        """Update export progress until the background export finishes"""
+        exporter = self.exporter
+        self.export_progress['value'] = exporter.progress * 100
+        if not exporter.done:
+            self.root.after(100, self.poll_export)
+            return
+
+        self.export_progress.grid_remove()
+        trans = self.translations[self.current_language]
+        self.export_btn.config(text=trans.get("export_button", "Export"))
+        if exporter.error is not None:
+            messagebox.showerror("Error", trans.get("export_error", "Export failed!"))
+        elif exporter.cancelled:
+            messagebox.showinfo("Export", trans.get("export_cancelled", "Export cancelled."))
+        else:
+            messagebox.showinfo("Success", trans.get("export_success", "Export successful!"))
+
+    def show_sweep(self):
+        """Show the sweep dialog: tabulate an expression over ranges"""
+        trans = self.translations[self.current_language]
+
+        sweep_window = tk.Toplevel(self.root)
+        sweep_window.title(trans.get('sweep_title', 'Sweep'))
+        sweep_window.resizable(False, False)
+
+        frame = ttk.Frame(sweep_window, padding="20")
+        frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        ttk.Label(frame, text=trans.get('expression_label', 'Expression:')).grid(
+            row=0, column=0, sticky=tk.W, pady=5)
+        expression_entry = ttk.Entry(frame, width=30)
+        expression_entry.insert(0, self.current_input or "sin(x)*x**2")
+        expression_entry.grid(row=0, column=1, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+
+        ttk.Label(frame, text=trans.get('ranges_label', 'Ranges:')).grid(
+            row=1, column=0, sticky=tk.W, pady=5)
+        ranges_entry = ttk.Entry(frame, width=30)
+        ranges_entry.insert(0, "x=0:10:101")
+        ranges_entry.grid(row=1, column=1, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+
+        progress = ttk.Progressbar(frame, mode='determinate', length=200)
+        progress.grid(row=3, column=0, columnspan=3, pady=(10, 0))
+        progress.grid_remove()
+
+        def to_history():
+            self.start_sweep_history(expression_entry.get(), ranges_entry.get())
+
+        def to_file():
+            if self.sweep_writer is not None and not self.sweep_writer.done:
+                self.sweep_writer.cancel()
+                return
+            self.start_sweep_file(expression_entry.get(), ranges_entry.get(),
+                                  progress, save_btn)
+
+        ttk.Button(frame, text=trans.get('sweep_history', 'To History'),
+                   command=to_history).grid(row=2, column=1, pady=(15, 0))
+        save_btn = ttk.Button(frame, text=trans.get('sweep_save', 'Save...'), command=to_file)
+        save_btn.grid(row=2, column=2, pady=(15, 0))
+
+    def start_sweep_history(self, expression, ranges):
+        """Stream a sweep into the history, a chunk per event-loop turn"""
+        if self.sweep_chunks is not None:
+            return
+        try:
+            ranges = parse_ranges(ranges)
+            if Sweep(ranges).size > SWEEP_HISTORY_LIMIT:
+                self.show_error("sweep_too_large",
+                                "Too many points for the history; save them to a file.")
+                return
+            chunks = self.core.sweep(expression, ranges, chunk_size=SWEEP_HISTORY_CHUNK)
+        except Exception as e:
+            self.show_error("sweep_error", "Invalid expression or ranges")
+            return
+        self.sweep_chunks = (expression, [r.name for r in ranges], chunks)
+        self.root.after(0, self.poll_sweep_history)
+
+    def poll_sweep_history(self):
+        """Add the next chunk of sweep points to the history"""
+        expression, names, chunks = self.sweep_chunks
+        try:
+            begin, columns, results = next(chunks)
+        except StopIteration:
+            self.sweep_chunks = None
+            return
+        except Exception as e:
+            self.sweep_chunks = None
+            self.show_error("sweep_error", "Invalid expression or ranges")
+            return
+        self.core.add_sweep_history(expression, names, columns, results)
+        self.update_history_display()
+        self.root.after(1, self.poll_sweep_history)
+
+    def start_sweep_file(self, expression, ranges, progress, button):
+        """Write a sweep to a CSV or JSON Lines file in the background"""
+        from tkinter import filedialog
+        trans = self.translations[self.current_language]
+        try:
+            ranges = parse_ranges(ranges)
+            chunks = self.core.sweep(expression, ranges, workers=None)
+        except Exception as e:
+            self.show_error("sweep_error", "Invalid expression or ranges")
+            return
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines files", "*.jsonl"),
+                       ("All files", "*.*")]
+        )
+        if not filename:
+            chunks.close()
+            return
+        self.sweep_writer = SweepWriter(Sweep(ranges), chunks, filename).start()
+        button.config(text=trans.get("cancel_button", "Cancel"))
+        progress['value'] = 0
+        progress.grid()
+        self.root.after(100, lambda: self.poll_sweep_file(progress, button))
+
+    def poll_sweep_file(self, progress, button):
+        """Update sweep progress until the background writer finishes"""
+        writer = self.sweep_writer
+        progress['value'] = writer.progress * 100
+        if not writer.done:
+            self.root.after(100, lambda: self.poll_sweep_file(progress, button))
+            return
+        trans = self.translations[self.current_language]
+        progress.grid_remove()
+        button.config(text=trans.get('sweep_save', 'Save...'))
+        if writer.error is not None:
+            self.show_error("sweep_error", "Invalid expression or ranges")
+        elif not writer.cancelled:
+            messagebox.showinfo(trans.get('sweep_title', 'Sweep'),
+                                trans.get('sweep_done', 'Sweep saved.'))
+
+    def show_workspace(self):
+        """Show the workspace dialog: define, insert and remove variables and functions"""
+        trans = self.translations[self.current_language]
+        workspace = self.core.workspace
+
+        workspace_window = tk.Toplevel(self.root)
+        workspace_window.title(trans.get('workspace_title', 'Workspace'))
+        workspace_window.resizable(False, False)
+
+        frame = ttk.Frame(workspace_window, padding="20")
+        frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        ttk.Label(frame, text=trans.get('definition_label', 'Definition:')).grid(
+            row=0, column=0, sticky=tk.W, pady=5)
+        definition_entry = ttk.Entry(frame, width=30)
+        definition_entry.insert(0, "f(x) = x**2+1")
+        definition_entry.grid(row=0, column=1, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+
+        table = ttk.Treeview(frame, columns=('value',), height=10, selectmode='browse')
+        table.heading('#0', text=trans.get('name_column', 'Name'))
+        table.column('#0', width=120)
+        table.heading('value', text=trans.get('value_column', 'Value'))
+        table.column('value', width=220)
+        table.grid(row=1, column=0, columnspan=3, pady=(5, 0))
+
+        def refresh():
+            table.delete(*table.get_children())
+            for name, value in workspace.entries():
+                table.insert('', tk.END, text=name, values=(value,))
+
+        def show_definition_error(error):
+            messagebox.showerror(trans.get("error_title", "Error"),
+                                 f"{trans.get('workspace_error', 'Could not define it')}: {error}")
+
+        def defined(task):
+            self.active_task = None
+            if task.cancelled:
+                return
+            if task.error is not None:
+                if isinstance(task.error, (TaskTimeout, LimitError, ResultTooLarge)):
+                    self.show_task_error(task)
+                else:
+                    show_definition_error(task.error)
+                return
+            if task.result is not None:
+                self.history_entry_added()
+            if workspace_window.winfo_exists():
+                refresh()
+
+        def define(event=None):
+            if self.active_task is not None:
+                return
+            try:
+                self.active_task = self.core.calculate_async(definition_entry.get(),
+                                                             callback=defined)
+            except Exception as e:
+                show_definition_error(e)
+                return
+            self.watch_tasks()
+
+        def selected_name():
+            selection = table.selection()
+            if not selection:
+                return None
+            # Functions are listed as f(x, y)
+            return table.item(selection[0], 'text').split('(', 1)[0]
+
+        def insert():
+            name = selected_name()
+            if name is not None:
+                self.current_input += name + ('(' if name in workspace.functions else '')
+                self.result_var.set(self.current_input)
+
+        def remove():
+            name = selected_name()
+            if name is not None:
+                try:
+                    workspace.remove(name)
+                except ExpressionError as e:
+                    show_definition_error(e)
+                    return
+                refresh()
+
+        definition_entry.bind("<Return>", define)
+        ttk.Button(frame, text=trans.get('define_button', 'Define'),
+                   command=define).grid(row=0, column=3, padx=(5, 0), pady=5)
+        ttk.Button(frame, text=trans.get('insert_button', 'Insert'),
+                   command=insert).grid(row=2, column=0, pady=(15, 0))
+        ttk.Button(frame, text=trans.get('remove_button', 'Remove'),
+                   command=remove).grid(row=2, column=1, pady=(15, 0))
+        ttk.Button(frame, text=trans.get('close_button', 'Close'),
+                   command=workspace_window.destroy).grid(row=2, column=2, pady=(15, 0))
+        refresh()
+
     def show_statistics(self):
         """Show usage statistics dialog"""
         trans = self.translations[self.current_language]
 
         stats_window = tk.Toplevel(self.root)
         stats_window.title(trans.get('stats_title', 'Statistics'))
-        stats_window.geometry("300x200")
+        stats_window.geometry("300x340")
         stats_window.resizable(False, False)
 
         frame = ttk.Frame(stats_window, padding="20")
@@ -837,28 +1050,121 @@ class AdvancedCalculator:
 
         ttk.Label(frame, text=trans.get('stats_calculations', 'Calculations:')).grid(
             row=1, column=0, sticky=tk.W, pady=5)
-        ttk.Label(frame, text=str(self.statistics['calculations']),
+        ttk.Label(frame, text=str(self.core.statistics['calculations']),
                   font=('Arial', 10, 'bold')).grid(row=1, column=1, sticky=tk.E, pady=5)
 
         ttk.Label(frame, text=trans.get('stats_conversions', 'Conversions:')).grid(
             row=2, column=0, sticky=tk.W, pady=5)
-        ttk.Label(frame, text=str(self.statistics['conversions']),
+        ttk.Label(frame, text=str(self.core.statistics['conversions']),
                   font=('Arial', 10, 'bold')).grid(row=2, column=1, sticky=tk.E, pady=5)
 
         ttk.Label(frame, text=trans.get('stats_errors', 'Errors:')).grid(
             row=3, column=0, sticky=tk.W, pady=5)
-        ttk.Label(frame, text=str(self.statistics['errors']),
+        ttk.Label(frame, text=str(self.core.statistics['errors']),
                   font=('Arial', 10, 'bold')).grid(row=3, column=1, sticky=tk.E, pady=5)
 
+        # Function cache: opt-in, with its counters underneath
+        memoize_var = tk.BooleanVar(value=self.core.function_cache_info() is not None)
+        cache_labels = {}
+
+        def update_cache_labels():
+            info = self.core.function_cache_info()
+            for name, label in cache_labels.items():
+                label.config(text="-" if info is None else str(info[name]))
+
+        def toggle_memoize():
+            self.core.set_function_cache(FUNCTION_CACHE_SIZE if memoize_var.get() else 0)
+            update_cache_labels()
+
+        ttk.Checkbutton(frame, text=trans.get('memoize_label', 'Memoize functions'),
+                        variable=memoize_var, command=toggle_memoize).grid(
+            row=4, column=0, columnspan=2, sticky=tk.W, pady=(15, 5))
+
+        for row, (name, key, default) in enumerate([
+                ('hits', 'cache_hits', 'Cache hits:'),
+                ('misses', 'cache_misses', 'Cache misses:'),
+                ('evictions', 'cache_evictions', 'Evictions:')], start=5):
+            ttk.Label(frame, text=trans.get(key, default)).grid(
+                row=row, column=0, sticky=tk.W, pady=5)
+            cache_labels[name] = ttk.Label(frame, font=('Arial', 10, 'bold'))
+            cache_labels[name].grid(row=row, column=1, sticky=tk.E, pady=5)
+        update_cache_labels()
+
+        ttk.Button(frame, text=trans.get('close_button', 'Close'),
+                   command=stats_window.destroy).grid(row=8, column=0, columnspan=2, pady=(20, 0))
+
+    def show_performance(self):
+        """Show latency histograms of the hot paths, refreshed while open"""
+        trans = self.translations[self.current_language]
+        instruments = self.core.instruments
+
+        perf_window = tk.Toplevel(self.root)
+        perf_window.title(trans.get('performance_title', 'Performance'))
+        perf_window.resizable(False, False)
+
+        frame = ttk.Frame(perf_window, padding="20")
+        frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+
+        enabled_var = tk.BooleanVar(value=instruments.enabled)
+
+        def toggle_recording():
+            instruments.enabled = enabled_var.get()
+
+        ttk.Checkbutton(frame, text=trans.get('record_timings', 'Record timings'),
+                        variable=enabled_var, command=toggle_recording).grid(
+            row=0, column=0, columnspan=3, sticky=tk.W, pady=(0, 10))
+
+        columns = ('count', 'mean', 'p50', 'p99', 'max')
+        table = ttk.Treeview(frame, columns=columns, height=len(STAGES), selectmode='none')
+        table.heading('#0', text=trans.get('stage_column', 'Stage'))
+        table.column('#0', width=130)
+        for column in columns:
+            table.heading(column, text=trans.get(f'{column}_column', column.capitalize()))
+            table.column(column, width=80, anchor=tk.E)
+        for stage in STAGES:
+            table.insert('', tk.END, iid=stage,
+                         text=trans.get(f'stage_{stage}', stage.replace('_', ' ')))
+        table.grid(row=1, column=0, columnspan=3)
+
+        def refresh():
+            if not perf_window.winfo_exists():
+                return
+            stages = instruments.as_dict()['stages']
+            for stage in STAGES:
+                summary = stages[stage]
+                table.item(stage, values=(summary['count'],) + tuple(
+                    format_seconds(summary[name]) for name in columns[1:]))
+            perf_window.after(PERFORMANCE_REFRESH_MS, refresh)
+
+        def save():
+            from tkinter import filedialog
+            filename = filedialog.asksaveasfilename(
+                defaultextension=".json",
+                filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            )
+            if not filename:
+                return
+            try:
+                instruments.dump(filename)
+                messagebox.showinfo("Success", trans.get("export_success", "Export successful!"))
+            except Exception as e:
+                print(f"Error saving timings: {e}")
+                messagebox.showerror("Error", trans.get("export_error", "Export failed!"))
+
+        ttk.Button(frame, text=trans.get('reset_button', 'Reset'),
+                   command=instruments.reset).grid(row=2, column=0, pady=(15, 0))
+        ttk.Button(frame, text=trans.get('save_json_button', 'Save JSON...'),
+                   command=save).grid(row=2, column=1, pady=(15, 0))
         ttk.Button(frame, text=trans.get('close_button', 'Close'),
-                   command=stats_window.destroy).grid(row=4, column=0, columnspan=2, pady=(20, 0))
+                   command=perf_window.destroy).grid(row=2, column=2, pady=(15, 0))
+        refresh()
 
-    def show_error(self):
+    def show_error(self, message_key="error_message", default="Invalid expression"):
         """Show error message"""
         trans = self.translations[self.current_language]
         messagebox.showerror(
             trans.get("error_title", "Error"),
-            trans.get("error_message", "Invalid expression")
+            trans.get(message_key, default)
         )
 
     def show_about(self):
@@ -882,6 +1188,19 @@ class AdvancedCalculator:
         self.current_language = lang_map.get(selection, "en")
         self.apply_localization()
 
+    def change_numeric_mode(self, event=None):
+        """Switch between float, decimal and fraction arithmetic"""
+        name = self.mode_combo.get().lower()
+        self.precision_spin.config(state="normal" if name == "decimal" else "disabled")
+        try:
+            precision = int(self.precision_var.get())
+            if precision < 1:
+                raise ValueError("Precision must be positive")
+        except ValueError:
+            precision = DEFAULT_PRECISION
+            self.precision_var.set(str(precision))
+        self.core.set_numeric_mode(name, precision)
+
     def change_theme(self, event=None):
         """Change application theme"""
         selection = self.theme_combo.get()
@@ -919,8 +1238,13 @@ class AdvancedCalculator:
         # Update control labels
         self.lang_label.config(text=trans.get("language_label", "Language:"))
         self.theme_label.config(text=trans.get("theme_label", "Theme:"))
+        self.mode_label.config(text=trans.get("mode_label", "Mode:"))
+        self.precision_label.config(text=trans.get("precision_label", "Digits:"))
         self.about_btn.config(text=trans.get("about_menu", "About"))
         self.stats_btn.config(text=trans.get("stats_button", "Statistics"))
+        self.perf_btn.config(text=trans.get("performance_button", "Performance"))
+        self.sweep_btn.config(text=trans.get("sweep_button", "Sweep"))
+        self.workspace_btn.config(text=trans.get("workspace_button", "Workspace"))
         self.result_label.config(text=trans.get("result_label", "Result:"))
 
         # Update notebook tabs
@@ -929,26 +1253,57 @@ class AdvancedCalculator:
         self.notebook.tab(2, text=trans.get("converter_tab", "Converter"))
         self.notebook.tab(3, text=trans.get("history_tab", "History"))
 
-        # Update converter labels
-        self.value_label.config(text=trans.get("value_label", "Value:"))
-        self.from_label.config(text=trans.get("from_label", "From:"))
-        self.to_label.config(text=trans.get("to_label", "To:"))
-        self.convert_btn.config(text=trans.get("convert_label", "Convert"))
+        # Tabs not built yet are localized when they are first shown
+        for index in self.built_tabs:
+            self.localize_tab(index, trans)
+
+    def localize_tab(self, index, trans):
+        """Apply translations to the widgets of one built tab"""
+        if index == 0:
+            self.register_label.config(text=trans.get("register_label", "Register:"))
+        elif index == 2:
+            # Update converter labels
+            self.value_label.config(text=trans.get("value_label", "Value:"))
+            self.from_label.config(text=trans.get("from_label", "From:"))
+            self.to_label.config(text=trans.get("to_label", "To:"))
+            self.convert_btn.config(text=trans.get("convert_label", "Convert"))
+            self.refresh_rates_btn.config(text=trans.get("refresh_rates", "Refresh rates"))
+            self.update_rates_label()
+        elif index == 3:
+            # Update history buttons
+            self.search_btn.config(text=trans.get("search_button", "Search"))
+            self.show_all_btn.config(text=trans.get("show_all_button", "Show All"))
+            self.clear_history_btn.config(text=trans.get("clear_history", "Clear History"))
+            if self.exporter is not None and not self.exporter.done:
+                self.export_btn.config(text=trans.get("cancel_button", "Cancel"))
+            else:
+                self.export_btn.config(text=trans.get("export_button", "Export"))
 
-        # Update history buttons
-        self.clear_history_btn.config(text=trans.get("clear_history", "Clear History"))
-        self.export_btn.config(text=trans.get("export_button", "Export"))
 
-
-def main():
-    root = tk.Tk()
-    root.title("Advanced Calculator Pro")
-    root.geometry("600x650")
-    root.resizable(True, True)
+def create_app(profiler=None, lazy_tabs=True):
+    """Create the main window and application; return (root, app)"""
+    if profiler is None:
+        profiler = StartupProfiler(STARTUP_ORIGIN)
+        profiler.record('imports', STARTUP_ORIGIN, time.perf_counter())
+    with profiler.phase('window'):
+        root = tk.Tk()
+        root.title("Advanced Calculator Pro")
+        root.geometry("600x650")
+        root.resizable(True, True)
 
     # Locales directory will be created automatically if missing
-    app = AdvancedCalculator(root)
+    app = AdvancedCalculator(root, profiler, lazy_tabs)
+    return root, app
+
+
+def main():
+    root, app = create_app()
     root.mainloop()
+    if app.exporter is not None:
+        # Do not leave a partial export behind
+        app.exporter.cancel()
+        app.exporter.wait()
+    app.core.close()
 
 
 if __name__ == "__main__":
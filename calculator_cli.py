@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Command Line Interface for Advanced Calculator Pro
+Streams expressions from a file or stdin through the calculator core and
+writes one result per line to stdout as CSV or JSON lines. No Tkinter
+widgets or display are needed.
+
+Examples:
+    python calculator_cli.py expressions.txt
+    echo "sqrt(16)+2**10" | python calculator_cli.py --format jsonl
+    echo "0.1+0.2" | python calculator_cli.py --mode decimal --precision 50
+    python calculator_cli.py big_batch.txt --jobs 4 --timeout 5
+    printf "r = 0.05\nf(p, n) = p*(1+r)**n\nf(1000, 10)\n" | python calculator_cli.py
+    python calculator_cli.py scenarios.txt --workspace calculator_workspace.json
+    echo "sin(x)*x**2" | python calculator_cli.py --sweep "x=0:10:1000001" > table.csv
+"""
+
+import argparse
+import csv
+import json
+import math
+import sys
+
+from calculator_core import CalculatorCore, FUNCTION_CACHE_SIZE
+from numeric_modes import MODE_NAMES
+from sweep import parse_ranges, write_sweep
+
+
+def read_expressions(stream):
+    """Yield expressions from a text stream, skipping blanks and # comments"""
+    for line in stream:
+        expression = line.strip()
+        if expression and not expression.startswith('#'):
+            yield expression
+
+
+def json_value(result):
+    """Return a JSON-safe representation of a result"""
+    if result is None:
+        # A function definition
+        return None
+    if isinstance(result, float) and not math.isfinite(result):
+        return str(result)
+    if isinstance(result, (int, float)):
+        return result
+    return str(result)
+
+
+def write_csv(rows, out):
+    """Write (expression, result, error) rows as CSV, returning the error count"""
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(['expression', 'result', 'error'])
+    errors = 0
+    for expression, result, error in rows:
+        if error is None:
+            try:
+                writer.writerow([expression, result, ''])
+                continue
+            except (TypeError, ValueError) as e:
+                # A result that cannot be written as text, such as an int over
+                # Python's int/str digit limit
+                error = e
+        errors += 1
+        writer.writerow([expression, '', str(error) or type(error).__name__])
+    return errors
+
+
+def write_jsonl(rows, out):
+    """Write (expression, result, error) rows as JSON lines, returning the error count"""
+    dumps = json.dumps
+    write = out.write
+    errors = 0
+    for expression, result, error in rows:
+        if error is None:
+            try:
+                line = dumps({'expression': expression, 'result': json_value(result)},
+                             ensure_ascii=False)
+            except (TypeError, ValueError) as e:
+                error = e
+        if error is not None:
+            errors += 1
+            line = dumps({'expression': expression, 'error': str(error) or type(error).__name__},
+                         ensure_ascii=False)
+        write(line)
+        write('\n')
+    return errors
+
+
+WRITERS = {
+    'csv': write_csv,
+    'jsonl': write_jsonl
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Evaluate calculator expressions without the GUI.")
+    parser.add_argument('input', nargs='?', default='-',
+                        help="file with one expression per line (default: stdin)")
+    parser.add_argument('-f', '--format', choices=sorted(WRITERS), default='csv',
+                        help="output format (default: csv)")
+    parser.add_argument('-m', '--mode', choices=MODE_NAMES, default='float',
+                        help="numeric mode (default: float)")
+    parser.add_argument('-p', '--precision', type=int, default=None,
+                        help="significant digits in decimal mode (default: 28)")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="worker processes; 0 uses every core (default: 1, no workers)")
+    parser.add_argument('-t', '--timeout', type=float, default=None,
+                        help="seconds allowed per chunk of expressions with --jobs")
+    parser.add_argument('--no-limits', action='store_true',
+                        help="evaluate without the expression size and cost limits")
+    parser.add_argument('--memoize', type=int, nargs='?', const=FUNCTION_CACHE_SIZE, default=0,
+                        metavar='SIZE',
+                        help="cache up to SIZE function results across expressions "
+                             f"(default when given: {FUNCTION_CACHE_SIZE})")
+    parser.add_argument('--sweep', metavar='RANGES',
+                        help="tabulate each expression over ranges such as "
+                             "'x=0:10:101' or 'x=0:1:11;y=0:1:11' instead of evaluating it once")
+    parser.add_argument('--workspace', metavar='FILE',
+                        help="start from the variables and functions saved in FILE, such as "
+                             "the calculator's calculator_workspace.json; definitions in the "
+                             "input are not saved back")
+    parser.add_argument('--timings', metavar='FILE',
+                        help="write parse and evaluate latency histograms to FILE as JSON "
+                             "(not recorded in worker processes)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # Headless core: no history, statistics or workspace files are touched
+    core = CalculatorCore(history_file=None, stats_file=None, workspace_file=None)
+    core.set_numeric_mode(args.mode, args.precision)
+    if args.workspace:
+        core.workspace.load(args.workspace)
+    if args.no_limits:
+        core.set_limits(None)
+    if args.memoize:
+        core.set_function_cache(args.memoize)
+    if args.timings:
+        core.instruments.enabled = True
+    writer = WRITERS[args.format]
+
+    def evaluate(expressions):
+        if args.jobs == 1:
+            return core.evaluate_many(expressions)
+        return core.evaluate_parallel(expressions, workers=args.jobs or None,
+                                      timeout=args.timeout)
+
+    def sweep(expressions):
+        failures = 0
+        for expression in expressions:
+            try:
+                chunks = core.sweep(expression, args.sweep, workers=args.jobs,
+                                    timeout=args.timeout)
+            except ValueError as e:
+                print(f"Error in {expression}: {e}", file=sys.stderr)
+                failures += 1
+                continue
+            failures += write_sweep(sweep_names, chunks, sys.stdout, args.format)
+        return failures
+
+    if args.sweep:
+        try:
+            sweep_names = [r.name for r in parse_ranges(args.sweep)]
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        run = sweep
+    else:
+        def run(expressions):
+            return writer(evaluate(expressions), sys.stdout)
+
+    if args.input == '-':
+        errors = run(read_expressions(sys.stdin))
+    else:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            errors = run(read_expressions(f))
+    sys.stdout.flush()
+    if args.timings:
+        try:
+            core.instruments.dump(args.timings)
+        except OSError as e:
+            print(f"Error saving timings: {e}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
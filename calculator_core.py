@@ -0,0 +1,858 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calculator Core for Advanced Calculator Pro
+GUI-free evaluation, unit conversion, history and statistics logic shared by
+the Tkinter application and the command line interface.
+"""
+
+import atexit
+import time
+from collections import deque
+
+import combinatorics
+from currency_rates import (DEFAULT_RATES, RateService, SNAPSHOT_DIR, SnapshotStore,
+                            provider_from_source)
+from expression_engine import EvaluationLimits, ExpressionEngine, ExpressionError, FunctionCache
+from history_index import HistoryIndex
+from history_record import HistoryRecord, KINDS, check_result
+from history_store import HistoryLog, HISTORY_LOG_FILE, migrate_legacy_history
+from instrumentation import Instrumentation
+from numeric_modes import FloatMode, get_mode
+from statistics_store import StatisticsStore, STATS_FILE
+from sweep import HISTORY_LIMIT, SWEEP_CHUNK, Sweep, evaluate_chunk, parse_ranges
+from task_pool import TaskPool, TaskTimeout
+from unit_conversion import ConversionTable
+from workspace import WORKSPACE_FILE, Workspace, parse_definition
+
+HISTORY_FILE = HISTORY_LOG_FILE
+LEGACY_HISTORY_FILE = 'calculator_history.json'
+
+# Expressions per task when evaluating in parallel
+PARALLEL_CHUNK_SIZE = 256
+
+# Seconds a worker may spend writing the exact digits of an approximation
+EXACT_TIMEOUT = 600.0
+
+# Results a memoizing engine keeps when no size is given
+FUNCTION_CACHE_SIZE = 1024
+
+# Function cache counters reported back from worker processes
+FUNCTION_CACHE_COUNTERS = ('hits', 'misses', 'evictions')
+
+# Expression engines of a worker process, one per numeric mode
+_worker_engines = {}
+
+# A worker's copy of the workspace for each of its engines
+_worker_workspaces = {}
+
+
+def normalize_expression(expression):
+    """Replace the display operators with the ones the engine parses"""
+    return expression.replace('×', '*').replace('÷', '/')
+
+
+def _worker_engine(mode, precision, limits, function_cache=0):
+    key = (mode, precision, limits, function_cache)
+    engine = _worker_engines.get(key)
+    if engine is None:
+        engine = _worker_engines[key] = ExpressionEngine(
+            mode=get_mode(mode, precision),
+            limits=None if limits is None else EvaluationLimits(*limits),
+            function_cache=FunctionCache(function_cache) if function_cache else None)
+    return engine
+
+
+def _worker_workspace(engine, workspace):
+    """Bring the worker's copy of the workspace up to date with a Workspace.state()"""
+    copy = _worker_workspaces.get(engine)
+    if copy is None:
+        copy = _worker_workspaces[engine] = Workspace(engine, None)
+    copy.sync(workspace)
+    return copy
+
+
+def _worker_env(engine, workspace):
+    """Return the variables to evaluate in, after syncing any workspace"""
+    if workspace is None:
+        return None
+    return _worker_workspace(engine, workspace).env
+
+
+def evaluate_expression(expression, mode='float', precision=None, limits=None, workspace=None):
+    """Evaluate a normalized expression; runs inside task pool workers
+
+    limits is an EvaluationLimits.settings() tuple, or None for no limits;
+    workspace is a Workspace.state() whose variables and functions the
+    expression can use.
+    """
+    engine = _worker_engine(mode, precision, limits)
+    return engine.evaluate(expression, _worker_env(engine, workspace))
+
+
+def check_function(name, params, body, mode='float', precision=None, limits=None,
+                   workspace=None):
+    """Compile a function definition in a worker, raising what defining it would"""
+    engine = _worker_engine(mode, precision, limits)
+    _worker_workspace(engine, workspace).check_function(name, params, body)
+
+
+def evaluate_reported(expression, mode='float', precision=None, limits=None,
+                      function_cache=0, timed=False, workspace=None):
+    """Like evaluate_expression, also reporting what happened in the worker
+
+    Returns (result, report). With a function_cache size, function calls
+    are memoized and report['counters'] holds how much each of
+    FUNCTION_CACHE_COUNTERS grew; with timed, report['parse'] and
+    report['evaluate'] hold the seconds each stage took.
+    """
+    engine = _worker_engine(mode, precision, limits, function_cache)
+    env = _worker_env(engine, workspace)
+    cache = engine.function_cache
+    report = {}
+    if cache is not None:
+        before = [getattr(cache, name) for name in FUNCTION_CACHE_COUNTERS]
+    if timed:
+        clock = time.perf_counter
+        start = clock()
+        compiled = engine.compile(expression)
+        parsed = clock()
+        result = compiled.evaluate(env)
+        report['parse'] = parsed - start
+        report['evaluate'] = clock() - parsed
+    else:
+        result = engine.evaluate(expression, env)
+    if cache is not None:
+        report['counters'] = {name: getattr(cache, name) - count
+                              for name, count in zip(FUNCTION_CACHE_COUNTERS, before)}
+    return result, report
+
+
+def evaluate_batch(expressions, mode='float', precision=None, limits=None, function_cache=0,
+                   workspace=None):
+    """Evaluate several expressions in a worker, returning (result, error) pairs"""
+    engine = _worker_engine(mode, precision, limits, function_cache)
+    env = _worker_env(engine, workspace)
+    results = []
+    for expression in expressions:
+        try:
+            expression = normalize_expression(expression)
+            if parse_definition(expression) is not None:
+                raise ExpressionError("Definitions only take effect without worker processes")
+            results.append((engine.evaluate(expression, env), None))
+        except Exception as e:
+            results.append((None, e))
+    return results
+
+
+def sweep_chunk(expression, ranges, begin, end, mode='float', precision=None, limits=None,
+                use_numpy=None, workspace=None):
+    """Evaluate points begin..end-1 of a sweep in a worker; see sweep.evaluate_chunk"""
+    engine = _worker_engine(mode, precision, limits)
+    # The expression can call user functions; its variables come from the ranges
+    _worker_env(engine, workspace)
+    return evaluate_chunk(engine, expression, Sweep(ranges), begin, end, use_numpy)
+
+
+class CalculatorCore:
+    def __init__(self, history_file=HISTORY_FILE, stats_file=STATS_FILE, engine=None,
+                 limits=None, rates_dir=SNAPSHOT_DIR, rate_provider=None, instruments=None,
+                 workspace_file=WORKSPACE_FILE):
+        self.history_file = history_file
+        self.stats_file = stats_file
+        self.workspace_file = workspace_file
+        # Latency histograms of the hot paths, off unless switched on
+        self.instruments = instruments if instruments is not None \
+            else Instrumentation.from_environment()
+        # Bounds on expression size and cost, also applied in worker processes
+        self.engine = engine if engine is not None else ExpressionEngine(
+            limits=limits if limits is not None else EvaluationLimits())
+        self.numeric_mode = FloatMode()
+        # Variables, user functions and ans, shared by every evaluation; not
+        # saved until load_workspace(), so it never overwrites an unread file
+        self.workspace = Workspace(self.engine, None)
+        self.history = []
+        self.history_log = HistoryLog(history_file) if history_file else None
+        # Built on the first query, then kept up to date as entries are added
+        self.history_index = None
+        # Bumped by clear_history, so a load in progress knows to stop
+        self.history_clears = 0
+        self.stats_store = StatisticsStore(stats_file or None, instruments=self.instruments)
+        # Worker processes for slow evaluations, started on first use
+        self.task_pool = None
+        # Function cache counters of worker processes, see evaluate_reported
+        self.worker_cache_counters = dict.fromkeys(FUNCTION_CACHE_COUNTERS, 0)
+
+        # Conversion rates (example data)
+        self.conversion_rates = {
+            'length': {
+                'm': 1, 'km': 0.001, 'cm': 100, 'mm': 1000,
+                'mi': 0.000621371, 'ft': 3.28084, 'in': 39.3701
+            },
+            'weight': {
+                'kg': 1, 'g': 1000, 'mg': 1000000,
+                'lb': 2.20462, 'oz': 35.274
+            },
+            'temperature': {
+                # (scale, offset) from Celsius: F = C * 9/5 + 32, K = C + 273.15
+                'C': 1, 'F': (9 / 5, 32), 'K': (1, 273.15)
+            },
+            'currency': dict(DEFAULT_RATES)
+        }
+        # Currency rates come from a provider and are kept as versioned
+        # snapshots; nothing touches the disk until start_rates()
+        self.rate_service = RateService(
+            rate_provider, SnapshotStore(rates_dir) if rates_dir else None,
+            on_update=self._install_rates)
+        # Every unit pair is composed once here; conversions are then a lookup
+        self.conversion_table = ConversionTable(self.conversion_rates,
+                                                self.rate_service.snapshot.version)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def iter_history(self):
+        """Stream persisted history records from disk, oldest first"""
+        if self.history_log is None:
+            return iter(())
+        return map(HistoryRecord.from_dict, self.history_log)
+
+    def iter_history_batches(self, batch_size=4096):
+        """Stream persisted history as (records, done, total) batches
+
+        Without a history file the in-memory history is used instead.
+        """
+        if self.history_log is None:
+            records = list(self.history)
+            for start in range(0, len(records), batch_size):
+                stop = min(start + batch_size, len(records))
+                yield records[start:stop], stop, len(records)
+            return
+        from_dict = HistoryRecord.from_dict
+        for entries, done, total in self.history_log.iter_batches():
+            yield list(map(from_dict, entries)), done, total
+
+    def export_history(self, path, fmt=None):
+        """Start a background export of the persisted history and return it"""
+        # Only needed on export, so it stays out of startup
+        from history_export import HistoryExporter
+        return HistoryExporter(self.iter_history_batches(), path, fmt).start()
+
+    def load_history(self):
+        """Load calculation history from file"""
+        for _ in self.load_history_batches():
+            pass
+
+    def load_history_batches(self):
+        """Load calculation history from file a batch at a time
+
+        A generator: each step reads about a megabyte of the log and yields
+        (done, total) bytes, so a GUI can spread a long history over
+        event-loop turns. history holds only entries added since loading
+        began until the last step puts the loaded ones before them. A clear
+        during loading stops it.
+        """
+        if self.history_log is None:
+            return
+        clears = self.history_clears
+        loaded = []
+        try:
+            migrate_legacy_history(LEGACY_HISTORY_FILE, self.history_log)
+            self.history_log.open()
+            atexit.register(self.close)
+            # Entries added from here on are past the end the batches read up to
+            self.history = []
+            for records, done, total in self.iter_history_batches():
+                if self.history_clears != clears:
+                    return
+                loaded.extend(records)
+                yield done, total
+        except Exception as e:
+            print(f"Error loading history: {e}")
+            loaded = []
+        if self.history_clears == clears:
+            loaded.extend(self.history)
+            self.history = loaded
+            self.history_index = None
+
+    def save_history(self):
+        """Make sure every appended history entry is on disk
+
+        Appended entries reach the OS at once, so they survive the
+        application crashing, but they are only fsynced every fsync_every
+        entries, or by the first entry fsync_interval seconds after the
+        last fsync. Until the next entry or close(), a power loss or system
+        crash can lose the entries added since the last fsync.
+        """
+        if self.history_log is None:
+            return
+        try:
+            self.history_log.sync()
+        except Exception as e:
+            print(f"Error saving history: {e}")
+
+    def load_workspace(self):
+        """Load the saved variables and user functions and keep saving changes"""
+        self.workspace.path = self.workspace_file or None
+        self.workspace.load()
+        self.workspace.start()
+        atexit.register(self.close)
+
+    @property
+    def statistics(self):
+        """Current usage counters"""
+        return self.stats_store.counters
+
+    def load_statistics(self):
+        """Load usage statistics and start the background flusher"""
+        self.stats_store.load()
+        self.stats_store.start()
+        atexit.register(self.close)
+
+    def save_statistics(self):
+        """Write pending usage statistics to disk now"""
+        self.stats_store.flush()
+
+    # ------------------------------------------------------------------
+    # History and statistics bookkeeping
+    # ------------------------------------------------------------------
+
+    def add_history(self, expression, result, entry_type='calculation', unit=None, rates=None):
+        """Append a record to the history and persist it
+
+        Raises ResultTooLarge, recording nothing, for an exact result too
+        long to turn into text (possible only without limits).
+        """
+        check_result(result)
+        record = HistoryRecord(expression, result, KINDS[entry_type], unit=unit, rates=rates)
+        self.history.append(record)
+        if self.history_index is not None:
+            self.history_index.add(record)
+        if self.history_log is not None:
+            timed = self.instruments.enabled
+            if timed:
+                start = time.perf_counter()
+            try:
+                self.history_log.append(record.to_dict())
+            except Exception as e:
+                print(f"Error saving history: {e}")
+            if timed:
+                self.instruments.record('history_save', time.perf_counter() - start)
+        return record
+
+    def clear_history(self):
+        """Clear calculation history"""
+        self.history = []
+        self.history_index = None
+        self.history_clears += 1
+        if self.history_log is not None:
+            try:
+                self.history_log.clear()
+            except Exception as e:
+                print(f"Error saving history: {e}")
+
+    def get_history_index(self):
+        """Return the history index, building it on first use"""
+        if self.history_index is None:
+            self.history_index = HistoryIndex(self.history)
+        return self.history_index
+
+    def query_history(self, **filters):
+        """Return history entries matching HistoryIndex.query filters"""
+        return self.get_history_index().query(**filters)
+
+    def search_history(self, query_text, limit=None):
+        """Return history entries matching a search-box query"""
+        return self.get_history_index().search(query_text, limit=limit)
+
+    def close(self):
+        """Stop workers, then flush and close persistent stores"""
+        self.rate_service.close()
+        if self.task_pool is not None:
+            self.task_pool.close()
+            self.task_pool = None
+        if self.history_log is not None:
+            self.history_log.close()
+        self.stats_store.close()
+        self.workspace.close()
+        if self.instruments.dump_path:
+            try:
+                self.instruments.dump(self.instruments.dump_path)
+            except Exception as e:
+                print(f"Error saving timings: {e}")
+
+    def count(self, counter):
+        """Increment a usage counter; it is persisted by the statistics flusher"""
+        self.stats_store.increment(counter)
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def set_numeric_mode(self, name, precision=None):
+        """Switch arithmetic to 'float', 'decimal' (with precision digits) or 'fraction'"""
+        self.numeric_mode = get_mode(name, precision)
+        self.engine.set_mode(self.numeric_mode)
+        self.workspace.refresh()
+        return self.numeric_mode
+
+    def set_function_cache(self, size=FUNCTION_CACHE_SIZE):
+        """Memoize scientific function calls across expressions; size 0 turns it off"""
+        self.engine.set_function_cache(FunctionCache(size) if size else None)
+        self.workspace.refresh()
+        self.worker_cache_counters = dict.fromkeys(FUNCTION_CACHE_COUNTERS, 0)
+
+    def function_cache_info(self):
+        """Function cache counters, here and in workers, or None when memoization is off
+
+        size is the number of results cached in this process only.
+        """
+        cache = self.engine.function_cache
+        if cache is None:
+            return None
+        info = cache.cache_info()
+        for name, count in self.worker_cache_counters.items():
+            info[name] += count
+        return info
+
+    def evaluate(self, expression):
+        """Evaluate an expression without touching history or statistics
+
+        The expression can use the workspace variables and functions but
+        cannot define them; see execute.
+        """
+        instruments = self.instruments
+        if not instruments.enabled:
+            return self.engine.evaluate(normalize_expression(expression), self.workspace.env)
+        clock = time.perf_counter
+        start = clock()
+        compiled = self.engine.compile(normalize_expression(expression))
+        parsed = clock()
+        instruments.record('parse', parsed - start)
+        result = compiled.evaluate(self.workspace.env)
+        instruments.record('evaluate', clock() - parsed)
+        return result
+
+    def execute(self, text):
+        """Evaluate an expression or run a definition such as x = 2 or f(x) = x**2
+
+        Returns the value of an expression or variable, which also becomes
+        ans, or None for a function definition.
+        """
+        definition = parse_definition(normalize_expression(text))
+        if definition is None:
+            result = self.evaluate(text)
+        else:
+            name, params, body = definition
+            if params is not None:
+                self.workspace.define_function(name, params, body)
+                return None
+            result = self.evaluate(body)
+            self.workspace.assign(name, result)
+        self.workspace.set_answer(result)
+        return result
+
+    def evaluate_many(self, expressions):
+        """Execute a stream of expressions, yielding (expression, result, error)
+
+        Definitions in the stream apply to the expressions after them.
+        """
+        execute = self.execute
+        for expression in expressions:
+            try:
+                yield expression, execute(expression), None
+            except Exception as e:
+                yield expression, None, e
+
+    def calculate(self, expression):
+        """Execute an expression or definition and record it in history and statistics
+
+        Function definitions are not calculations: they return None and
+        are not recorded.
+        """
+        try:
+            result = self.execute(expression)
+            if result is not None:
+                self.add_history(expression, result)
+        except Exception:
+            self.count('errors')
+            raise
+        if result is not None:
+            self.count('calculations')
+        return result
+
+    def factorial(self, value):
+        """Calculate and record the factorial of a non-negative integer
+
+        Results longer than combinatorics.EXACT_DIGITS come back as an
+        Approximation whose exact digits can be produced on demand.
+        """
+        try:
+            num = int(self.numeric_mode.number(value))
+            if num < 0:
+                raise ValueError("Negative number")
+            result = combinatorics.factorial_result(num)
+            if isinstance(result, int):
+                result = self.numeric_mode.from_number(result)
+        except Exception:
+            self.count('errors')
+            raise
+        self.add_history(f'{num}!', result)
+        self.count('calculations')
+        return result
+
+    def reciprocal(self, value):
+        """Calculate and record the reciprocal of a number"""
+        try:
+            mode = self.numeric_mode
+            num = float(value) if not mode.exact else mode.number(value)
+            with mode.context():
+                result = 1 / num
+        except Exception:
+            self.count('errors')
+            raise
+        self.add_history(f'1/{num}', result)
+        self.count('calculations')
+        return result
+
+    # ------------------------------------------------------------------
+    # Background evaluation
+    # ------------------------------------------------------------------
+
+    def get_task_pool(self):
+        """Return the worker pool, creating it on first use"""
+        if self.task_pool is None:
+            self.task_pool = TaskPool()
+        return self.task_pool
+
+    def set_limits(self, limits):
+        """Replace the evaluation limits (an EvaluationLimits, or None for none)"""
+        self.engine.limits = limits
+        self.engine.clear_cache()
+        self.workspace.refresh()
+
+    def limit_settings(self):
+        """The evaluation limits in the form worker processes take them"""
+        return None if self.engine.limits is None else self.engine.limits.settings()
+
+    def poll_tasks(self):
+        """Deliver finished background results; returns the number still active"""
+        if self.task_pool is None:
+            return 0
+        self.task_pool.poll()
+        return self.task_pool.active
+
+    def calculate_async(self, expression, callback=None, timeout=None):
+        """Execute an expression or definition in a worker process and return its Task
+
+        History, statistics and the workspace are updated when the task
+        finishes, inside poll_tasks(), followed by callback(task). A function
+        definition is checked in the worker and defined here; its result is
+        None.
+        """
+        mode = self.numeric_mode
+        cache = self.engine.function_cache
+        instruments = self.instruments
+        timed = instruments.enabled
+        reported = cache is not None or timed
+        text = normalize_expression(expression)
+        try:
+            definition = parse_definition(text)
+        except Exception:
+            self.count('errors')
+            raise
+        function = definition is not None and definition[1] is not None
+
+        def finished(task):
+            if task.error is None:
+                if reported and not function:
+                    task.result, report = task.result
+                    for name, count in report.get('counters', {}).items():
+                        self.worker_cache_counters[name] += count
+                    if timed:
+                        instruments.record('parse', report['parse'])
+                        instruments.record('evaluate', report['evaluate'])
+                try:
+                    if function:
+                        self.workspace.define_function(*definition)
+                    elif definition is not None:
+                        self.workspace.assign(definition[0], task.result)
+                except Exception as e:
+                    # The workspace changed while the worker was checking
+                    task.result, task.error = None, e
+            if task.error is None and not function:
+                try:
+                    self.add_history(expression, task.result)
+                except combinatorics.ResultTooLarge as e:
+                    task.result, task.error = None, e
+                else:
+                    self.workspace.set_answer(task.result)
+                    self.count('calculations')
+            if task.error is not None and not task.cancelled:
+                self.count('errors')
+            if callback is not None:
+                callback(task)
+
+        args = (mode.name, mode.precision, self.limit_settings())
+        workspace = self.workspace.state()
+        pool = self.get_task_pool()
+        if function:
+            return pool.submit(check_function, *definition, *args, workspace,
+                               timeout=timeout, callback=finished)
+        if definition is not None:
+            text = definition[2]
+        if reported:
+            return pool.submit(evaluate_reported, text, *args,
+                               0 if cache is None else cache.maxsize, timed, workspace,
+                               timeout=timeout, callback=finished)
+        return pool.submit(evaluate_expression, text, *args, workspace,
+                           timeout=timeout, callback=finished)
+
+    def factorial_async(self, value, callback=None, timeout=None):
+        """Calculate a factorial in a worker process and return its Task"""
+        mode = self.numeric_mode
+        try:
+            num = int(mode.number(value))
+            if num < 0:
+                raise ValueError("Negative number")
+        except Exception:
+            self.count('errors')
+            raise
+
+        def finished(task):
+            if task.error is None:
+                if isinstance(task.result, int):
+                    task.result = mode.from_number(task.result)
+                self.add_history(f'{num}!', task.result)
+                self.count('calculations')
+            elif not task.cancelled:
+                self.count('errors')
+            if callback is not None:
+                callback(task)
+
+        return self.get_task_pool().submit(combinatorics.factorial_result, num,
+                                           timeout=timeout, callback=finished)
+
+    def write_exact_async(self, result, path, callback=None, timeout=EXACT_TIMEOUT):
+        """Write the exact digits of an Approximation to a file in a worker process
+        and return its Task; its result is the number of digits written"""
+        return self.get_task_pool().submit(combinatorics.write_exact, result.exact,
+                                           result.digits, path, timeout=timeout,
+                                           callback=callback)
+
+    def evaluate_parallel(self, expressions, workers=None, chunk_size=PARALLEL_CHUNK_SIZE,
+                          timeout=None):
+        """Evaluate a stream of expressions on several cores, yielding
+        (expression, result, error) in input order"""
+        mode = self.numeric_mode
+        limits = self.limit_settings()
+        cache = self.engine.function_cache
+        cache_size = 0 if cache is None else cache.maxsize
+        workspace = self.workspace.state()
+        pool = TaskPool(workers, timeout=timeout)
+
+        def chunks():
+            chunk = []
+            for expression in expressions:
+                chunk.append(expression)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+        batches = deque()
+
+        def arguments():
+            for chunk in chunks():
+                batches.append(chunk)
+                yield chunk, mode.name, mode.precision, limits, cache_size, workspace
+
+        try:
+            for task in pool.map(evaluate_batch, arguments()):
+                chunk = batches.popleft()
+                if isinstance(task.error, TaskTimeout) and len(chunk) > 1:
+                    # Retry one by one so only the slow expressions time out
+                    singles = [pool.submit(evaluate_batch, [expression], mode.name,
+                                           mode.precision, limits, cache_size, workspace)
+                               for expression in chunk]
+                    pool.wait(singles)
+                    for expression, single in zip(chunk, singles):
+                        if single.error is not None:
+                            yield expression, None, single.error
+                        else:
+                            yield (expression,) + single.result[0]
+                elif task.error is not None:
+                    for expression in chunk:
+                        yield expression, None, task.error
+                else:
+                    for expression, (result, error) in zip(chunk, task.result):
+                        yield expression, result, error
+        finally:
+            pool.close()
+
+    def sweep(self, expression, ranges, workers=1, chunk_size=SWEEP_CHUNK,
+              use_numpy=None, timeout=None):
+        """Evaluate an expression over sweep ranges, returning an iterator of
+        (begin, columns, results) chunks
+
+        ranges is a list of sweep.SweepRange or text for sweep.parse_ranges.
+        Mistakes in the expression or ranges are raised here, before any
+        evaluation. Chunks come in order; with workers other than 1 they are
+        evaluated in worker processes (None or 0 for every core) while
+        earlier chunks are being consumed.
+        """
+        if isinstance(ranges, str):
+            ranges = parse_ranges(ranges)
+        grid = Sweep(ranges)
+        expression = normalize_expression(expression)
+        # Compile here first so mistakes surface before any work is split up
+        compiled = self.engine.compile(expression)
+        missing = compiled.names - set(grid.names)
+        if missing:
+            raise ExpressionError(f"No range given for {', '.join(sorted(missing))}")
+        if workers == 1 or grid.size <= chunk_size:
+            return self._sweep_here(expression, grid, chunk_size, use_numpy)
+        return self._sweep_in_workers(expression, ranges, grid, workers, chunk_size,
+                                      use_numpy, timeout)
+
+    def _sweep_here(self, expression, grid, chunk_size, use_numpy):
+        for begin, end in grid.chunks(chunk_size):
+            yield begin, grid.columns(begin, end), evaluate_chunk(
+                self.engine, expression, grid, begin, end, use_numpy)
+
+    def _sweep_in_workers(self, expression, ranges, grid, workers, chunk_size, use_numpy,
+                          timeout):
+        mode = self.numeric_mode
+        limits = self.limit_settings()
+        workspace = self.workspace.state()
+        pool = TaskPool(workers or None, timeout=timeout)
+        bounds = list(grid.chunks(chunk_size))
+        try:
+            tasks = pool.map(sweep_chunk, ((expression, ranges, begin, end, mode.name,
+                                            mode.precision, limits, use_numpy, workspace)
+                                           for begin, end in bounds))
+            for (begin, end), task in zip(bounds, tasks):
+                if task.error is not None:
+                    raise task.error
+                yield begin, grid.columns(begin, end), task.result
+        finally:
+            pool.close()
+
+    def sweep_to_history(self, expression, ranges, limit=HISTORY_LIMIT):
+        """Evaluate a sweep and record each point in history; returns the records
+
+        Larger sweeps belong in a file (see sweep.SweepWriter).
+        """
+        if isinstance(ranges, str):
+            ranges = parse_ranges(ranges)
+        size = Sweep(ranges).size
+        if size > limit:
+            raise ValueError(f"Sweep has {size:,} points; more than {limit:,} "
+                             f"must be written to a file")
+        names = [r.name for r in ranges]
+        records = []
+        for begin, columns, results in self.sweep(expression, ranges):
+            records.extend(self.add_sweep_history(expression, names, columns, results))
+        return records
+
+    def add_sweep_history(self, expression, names, columns, results):
+        """Record one chunk of sweep points in history, one entry per point"""
+        records = []
+        for values, result in zip(zip(*columns), results):
+            point = ", ".join(f"{name}={value:g}" for name, value in zip(names, values))
+            records.append(self.add_history(f"{expression} [{point}]", result))
+        self.stats_store.increment('calculations', len(records))
+        return records
+
+    # ------------------------------------------------------------------
+    # Unit conversion
+    # ------------------------------------------------------------------
+
+    def start_rates(self, source=None):
+        """Load the last rate snapshot and start refreshing from a provider
+
+        source is a rates file or http(s) URL; by default it is read from
+        the CALCULATOR_RATES_SOURCE environment variable, falling back to
+        the built-in rates.
+        """
+        self.rate_service.provider = provider_from_source(source)
+        self.rate_service.load()
+        self.rate_service.start()
+
+    def refresh_rates(self):
+        """Ask for fresh currency rates in the background"""
+        self.rate_service.refresh_async()
+
+    def _install_rates(self, snapshot):
+        """Swap in a conversion table built from a new rate snapshot
+
+        Runs on the rate refresher thread. The new table is complete before
+        the single assignment that publishes it, so a conversion sees either
+        the old rates or the new ones, never a mix.
+        """
+        rates = dict(self.conversion_rates, currency=snapshot.rates)
+        table = ConversionTable(rates, snapshot.version)
+        self.conversion_rates = rates
+        self.conversion_table = table
+
+    def conversion_table_for(self, version):
+        """Return a conversion table with the currency rates of a snapshot version
+
+        Used to repeat a recorded conversion (see HistoryRecord.rates);
+        returns None when that snapshot is not available.
+        """
+        if version is None or version == self.conversion_table.version:
+            return self.conversion_table
+        snapshot = self.rate_service.get(version)
+        if snapshot is None:
+            return None
+        return ConversionTable(dict(self.conversion_rates, currency=snapshot.rates), version)
+
+    def convert(self, value, conv_type, from_unit, to_unit, table=None):
+        """Convert a value between two units of the same category
+
+        table defaults to the current conversion table; see conversion_table_for.
+        """
+        if table is None:
+            table = self.conversion_table
+        timed = self.instruments.enabled
+        if timed:
+            start = time.perf_counter()
+        mode = self.numeric_mode
+        if not mode.exact:
+            result = table.convert(value, conv_type, from_unit, to_unit)
+        else:
+            with mode.context():
+                result = table.convert_exact(mode.from_number(value), conv_type,
+                                             from_unit, to_unit, mode)
+        if timed:
+            self.instruments.record('conversion', time.perf_counter() - start)
+        return result
+
+    def convert_many(self, values, conv_type, from_unit, to_unit, out=None, use_numpy=None):
+        """Convert a whole sequence or buffer of values between two units"""
+        return self.conversion_table.convert_many(values, conv_type, from_unit, to_unit,
+                                                  out=out, use_numpy=use_numpy)
+
+    def conversion_input(self, value):
+        """Read a value to convert as a number of the current numeric mode"""
+        mode = self.numeric_mode
+        return float(value) if not mode.exact else mode.number(value)
+
+    def perform_conversion(self, value, conv_type, from_unit, to_unit):
+        """Convert a value and record it in history and statistics"""
+        # Read once, so the result and its recorded snapshot always match
+        table = self.conversion_table
+        try:
+            value = self.conversion_input(value)
+            result = self.convert(value, conv_type, from_unit, to_unit, table)
+        except Exception:
+            self.count('errors')
+            raise
+        self.add_history(f"Convert: {value} {from_unit} to {to_unit}",
+                         result, 'conversion', unit=to_unit,
+                         rates=table.version if conv_type == 'currency' else None)
+        self.count('conversions')
+        return value, result
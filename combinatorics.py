@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Combinatorics for Advanced Calculator Pro
+Factorials, combinations, permutations and the gamma function without
+locking up the interface on large inputs. Exact results are produced only
+while they stay below a digit limit; beyond it callers get an Approximation
+(mantissa, exponent and exact digit count from Stirling's series), modular
+results, or the exact digits on demand through write_exact, run in a worker
+process. Exact values are not memoized: they can run to megabytes each.
+"""
+
+import decimal
+import math
+import os
+from decimal import Decimal, localcontext
+from functools import lru_cache, partial
+
+# Exact results up to this many digits are returned directly. It matches
+# Python 3.11's default int/str conversion limit, so they can always be shown
+EXACT_DIGITS = 4300
+
+# Upper bound for exact digits produced on demand
+MAX_EXACT_DIGITS = 10000000
+
+# Upper bound on loop iterations for modular results
+MAX_MOD_STEPS = 10000000
+
+# Below this n, factorial digit counts come from the exact value
+SMALL_FACTORIAL = 1000
+
+# Working precision for the Stirling series and approximation mantissas
+LOG_PRECISION = 50
+MANTISSA_DIGITS = 10
+
+PI = Decimal('3.14159265358979323846264338327950288419716939937511')
+
+
+class ResultTooLarge(OverflowError):
+    """Raised when an exact result would exceed the digit or step limit"""
+
+    def __init__(self, message, digits=None):
+        super().__init__(message)
+        self.digits = digits
+
+
+class Approximation:
+    """A number too large to produce exactly: mantissa x 10**exponent
+
+    `exact`, when set, is a function computing the exact integer on demand.
+    """
+
+    __slots__ = ('mantissa', 'exponent', 'digits', 'exact')
+
+    def __init__(self, mantissa, exponent, digits, exact=None):
+        self.mantissa = mantissa
+        self.exponent = exponent
+        self.digits = digits
+        self.exact = exact
+
+    def __float__(self):
+        try:
+            return float(self.mantissa) * 10.0 ** self.exponent
+        except OverflowError:
+            return math.inf
+
+    def __str__(self):
+        return f"≈{self.mantissa}e+{self.exponent}"
+
+    def __repr__(self):
+        return f"Approximation({self.mantissa!r}, {self.exponent}, digits={self.digits})"
+
+
+def as_count(value, name='n'):
+    """Return value as a non-negative int, accepting integral floats, Decimals and Fractions"""
+    if not isinstance(value, int):
+        if value != value or value in (math.inf, -math.inf) or value != int(value):
+            raise ValueError(f"{name} must be an integer")
+        value = int(value)
+    if value < 0:
+        raise ValueError(f"{name} must not be negative")
+    return value
+
+
+# ---------------------------------------------------------------------------
+# Digit counts and approximations
+# ---------------------------------------------------------------------------
+
+def int_digits(n):
+    """Count the decimal digits of an int without converting it to text"""
+    n = abs(n)
+    if n < 10:
+        return 1
+    digits = int((n.bit_length() - 1) * 0.30102999566398120) + 1
+    if n >= 10 ** digits:
+        digits += 1
+    return digits
+
+
+def _log_context():
+    return localcontext(decimal.Context(prec=LOG_PRECISION))
+
+
+@lru_cache(maxsize=256)
+def log10_factorial(n):
+    """log10(n!) as a Decimal, from Stirling's series for large n"""
+    with _log_context():
+        if n <= SMALL_FACTORIAL:
+            return Decimal(_factorial(n)).log10()
+        x = Decimal(n)
+        # ln n! = n ln n - n + ln(2 pi n)/2 + 1/12n - 1/360n^3 + 1/1260n^5 - 1/1680n^7
+        ln = (x * x.ln() - x + (2 * PI * x).ln() / 2
+              + 1 / (12 * x) - 1 / (360 * x ** 3) + 1 / (1260 * x ** 5) - 1 / (1680 * x ** 7))
+        return ln / Decimal(10).ln()
+
+
+def approximate(log10, exact=None):
+    """Build an Approximation from a base-10 logarithm"""
+    with _log_context():
+        exponent = int(log10.to_integral_value(rounding=decimal.ROUND_FLOOR))
+        mantissa = Decimal(10) ** (log10 - exponent)
+        mantissa = format(mantissa, f".{MANTISSA_DIGITS - 1}f")
+    if mantissa.startswith('10'):
+        # The mantissa rounded up to 10
+        mantissa, exponent = format(1, f".{MANTISSA_DIGITS - 1}f"), exponent + 1
+    return Approximation(mantissa, exponent, exponent + 1, exact)
+
+
+def factorial_digits(n):
+    """Number of decimal digits of n!"""
+    n = as_count(n)
+    if n <= SMALL_FACTORIAL:
+        return int_digits(_factorial(n))
+    return int(log10_factorial(n)) + 1
+
+
+def comb_digits(n, k):
+    """Number of decimal digits of C(n, k)"""
+    n, k = as_count(n), as_count(k, 'k')
+    if k > n:
+        return 1
+    log10 = log10_comb(n, k)
+    if log10 < EXACT_DIGITS:
+        # Cheap to compute exactly, and exact at powers of ten
+        return int_digits(_comb(n, k))
+    return int(log10) + 1
+
+
+def perm_digits(n, k):
+    """Number of decimal digits of P(n, k)"""
+    n, k = as_count(n), as_count(k, 'k')
+    if k > n:
+        return 1
+    log10 = log10_perm(n, k)
+    if log10 < EXACT_DIGITS:
+        return int_digits(_perm(n, k))
+    return int(log10) + 1
+
+
+def log10_comb(n, k):
+    with _log_context():
+        return log10_factorial(n) - log10_factorial(k) - log10_factorial(n - k)
+
+
+def log10_perm(n, k):
+    with _log_context():
+        return log10_factorial(n) - log10_factorial(n - k)
+
+
+def approximate_factorial(n):
+    """Return n! as an Approximation"""
+    n = as_count(n)
+    return approximate(log10_factorial(n), partial(_factorial, n))
+
+
+# ---------------------------------------------------------------------------
+# Exact results, size-guarded
+# ---------------------------------------------------------------------------
+
+def _factorial(n):
+    return math.factorial(n)
+
+
+def _comb(n, k):
+    if hasattr(math, 'comb'):
+        return math.comb(n, k)
+    # Python 3.7
+    if k > n:
+        return 0
+    k = min(k, n - k)
+    return _perm(n, k) // _factorial(k)
+
+
+def _perm(n, k):
+    if hasattr(math, 'perm'):
+        return math.perm(n, k)
+    # Python 3.7
+    if k > n:
+        return 0
+    result = 1
+    for factor in range(n - k + 1, n + 1):
+        result *= factor
+    return result
+
+
+def _check_digits(digits, limit, what):
+    if digits > limit:
+        raise ResultTooLarge(f"{what} has {digits:,} digits, more than the limit of {limit:,}",
+                             digits)
+
+
+def factorial(n, limit=EXACT_DIGITS):
+    """Exact n!, refusing results longer than limit digits"""
+    n = as_count(n)
+    _check_digits(factorial_digits(n), limit, f"{n}!")
+    return _factorial(n)
+
+
+def comb(n, k, limit=EXACT_DIGITS):
+    """Exact number of k-combinations of n items (nCr)"""
+    n, k = as_count(n), as_count(k, 'k')
+    _check_digits(comb_digits(n, k), limit, f"C({n}, {k})")
+    return _comb(n, k)
+
+
+def perm(n, k, limit=EXACT_DIGITS):
+    """Exact number of k-permutations of n items (nPr)"""
+    n, k = as_count(n), as_count(k, 'k')
+    _check_digits(perm_digits(n, k), limit, f"P({n}, {k})")
+    return _perm(n, k)
+
+
+def factorial_result(n, limit=EXACT_DIGITS):
+    """n! exactly when it fits in limit digits, otherwise an Approximation"""
+    n = as_count(n)
+    if factorial_digits(n) <= limit:
+        return _factorial(n)
+    return approximate_factorial(n)
+
+
+def comb_result(n, k, limit=EXACT_DIGITS):
+    """C(n, k) exactly when it fits in limit digits, otherwise an Approximation"""
+    n, k = as_count(n), as_count(k, 'k')
+    if k > n or comb_digits(n, k) <= limit:
+        return _comb(n, k)
+    return approximate(log10_comb(n, k), partial(_comb, n, k))
+
+
+def perm_result(n, k, limit=EXACT_DIGITS):
+    """P(n, k) exactly when it fits in limit digits, otherwise an Approximation"""
+    n, k = as_count(n), as_count(k, 'k')
+    if k > n or perm_digits(n, k) <= limit:
+        return _perm(n, k)
+    return approximate(log10_perm(n, k), partial(_perm, n, k))
+
+
+def gamma(x):
+    """Gamma function; integral arguments are exact (n - 1)! while they fit"""
+    if isinstance(x, int) and 0 < x and factorial_digits(x - 1) <= EXACT_DIGITS:
+        return _factorial(x - 1)
+    return math.gamma(x)
+
+
+def lgamma(x):
+    """Natural logarithm of the absolute value of the gamma function"""
+    if isinstance(x, int) and x > SMALL_FACTORIAL:
+        with _log_context():
+            return float(log10_factorial(x - 1) * Decimal(10).ln())
+    return math.lgamma(x)
+
+
+# ---------------------------------------------------------------------------
+# Modular results
+# ---------------------------------------------------------------------------
+
+def _check_steps(steps):
+    if steps > MAX_MOD_STEPS:
+        raise ResultTooLarge(f"Needs {steps:,} steps, more than the limit of {MAX_MOD_STEPS:,}")
+
+
+def _modulus(m):
+    m = as_count(m, 'm')
+    if m == 0:
+        raise ZeroDivisionError("modulus is zero")
+    return m
+
+
+def factorial_mod(n, m):
+    """n! mod m without computing n!"""
+    n, m = as_count(n), _modulus(m)
+    if n >= m:
+        # m itself is one of the factors
+        return 0
+    _check_steps(n)
+    result = 1 % m
+    for factor in range(2, n + 1):
+        result = result * factor % m
+    return result
+
+
+def perm_mod(n, k, m):
+    """P(n, k) mod m without computing P(n, k)"""
+    n, k, m = as_count(n), as_count(k, 'k'), _modulus(m)
+    if k > n:
+        return 0
+    if k >= m:
+        # k consecutive integers include a multiple of m
+        return 0
+    _check_steps(k)
+    result = 1 % m
+    for factor in range(n - k + 1, n + 1):
+        result = result * factor % m
+    return result
+
+
+def is_prime(n):
+    """Miller-Rabin primality test, deterministic for n below 3.3e24"""
+    if n < 2:
+        return False
+    small = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+    for p in small:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in small:
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _comb_mod_prime_small(n, k, p):
+    """C(n, k) mod p for n < p"""
+    if k > n:
+        return 0
+    k = min(k, n - k)
+    numerator = denominator = 1
+    for i in range(k):
+        numerator = numerator * (n - i) % p
+        denominator = denominator * (i + 1) % p
+    return numerator * pow(denominator, p - 2, p) % p
+
+
+def comb_mod(n, k, m):
+    """C(n, k) mod m; Lucas' theorem when m is prime, else exact within limits"""
+    n, k, m = as_count(n), as_count(k, 'k'), _modulus(m)
+    if k > n:
+        return 0
+    if m > 1 and is_prime(m):
+        # Lucas: multiply C(n_i, k_i) over the base-m digits of n and k
+        result = 1
+        while k and result:
+            n_digit, k_digit = n % m, k % m
+            _check_steps(min(k_digit, n_digit - k_digit) if k_digit <= n_digit else 0)
+            result = result * _comb_mod_prime_small(n_digit, k_digit, m) % m
+            n //= m
+            k //= m
+        return result % m
+    _check_digits(comb_digits(n, k), MAX_EXACT_DIGITS, f"C({n}, {k})")
+    return _comb(n, k) % m
+
+
+# ---------------------------------------------------------------------------
+# Exact digits on demand
+# ---------------------------------------------------------------------------
+
+def _int_to_decimal(n):
+    """Convert an int to an exact Decimal by splitting it on powers of two
+
+    libmpdec multiplies large numbers in subquadratic time, so this is much
+    faster than Decimal(n) or str(n) for values with many thousands of digits.
+    """
+    bits = 128
+    powers = {}
+    two = Decimal(2)
+
+    def power(width):
+        result = powers.get(width)
+        if result is None:
+            if width <= bits:
+                result = two ** width
+            elif width - 1 in powers:
+                result = powers[width - 1] * 2
+            else:
+                half = width >> 1
+                result = power(half) * power(width - half)
+            powers[width] = result
+        return result
+
+    def convert(n, width):
+        if width <= bits:
+            return Decimal(n)
+        half = width >> 1
+        high = n >> half
+        low = n - (high << half)
+        return convert(low, half) + convert(high, width - half) * power(half)
+
+    context = decimal.Context(prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX,
+                              Emin=decimal.MIN_EMIN)
+    with localcontext(context):
+        if n < 0:
+            return -convert(-n, n.bit_length())
+        return convert(n, n.bit_length())
+
+
+def exact_digits(n, limit=MAX_EXACT_DIGITS):
+    """Return all decimal digits of an int, bypassing Python's int/str limit"""
+    digits = int_digits(n)
+    _check_digits(digits, limit, "Result")
+    if digits <= EXACT_DIGITS:
+        return str(n)
+    return str(_int_to_decimal(n))
+
+
+def write_digits(n, path):
+    """Write all decimal digits of an int to a text file"""
+    text = exact_digits(n)
+    temp_path = path + '.part'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.write('\n')
+    os.replace(temp_path, path)
+    return len(text)
+
+
+def write_exact(exact, digits, path):
+    """Compute an Approximation's exact value and write its digits to a file
+
+    Runs in a worker process: the computation and the conversion to text
+    hold the GIL for as long as they take. The digit count is checked
+    before anything is computed.
+    """
+    _check_digits(digits, MAX_EXACT_DIGITS, "Result")
+    return write_digits(exact(), path)
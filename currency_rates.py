@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Currency Rates for Advanced Calculator Pro
+Exchange rates come from a pluggable provider (a local JSON file, a local
+HTTP endpoint, or the built-in table) and every set of rates fetched is kept
+on disk as a snapshot named after its content, so a conversion recorded in
+history can be repeated later with exactly the rates it used. A background
+thread refreshes the rates on a timer or on request; the UI never waits for
+a provider.
+
+Providers return the JSON document {"base": "USD", "rates": {"EUR": 0.92, ...}}
+with rates in units per base unit.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+SNAPSHOT_DIR = 'currency_snapshots'
+CURRENT_FILE = 'current'
+
+# Seconds between automatic refreshes
+REFRESH_INTERVAL = 3600.0
+
+# Environment variable naming a rates file or http(s) URL
+SOURCE_VARIABLE = 'CALCULATOR_RATES_SOURCE'
+
+DEFAULT_RATES = {
+    'USD': 1, 'EUR': 0.92, 'RON': 4.56,
+    'GBP': 0.79, 'JPY': 149.50
+}
+
+
+class RateProviderError(Exception):
+    """A provider could not deliver a valid set of rates"""
+
+
+def parse_rates(data):
+    """Validate a provider document and return its rates, base currency first"""
+    if not isinstance(data, dict) or not isinstance(data.get('rates'), dict):
+        raise RateProviderError("Expected an object with a 'rates' object")
+    rates = data['rates']
+    base = data.get('base', 'USD')
+    for code, rate in rates.items():
+        if not isinstance(code, str) or isinstance(rate, bool) \
+                or not isinstance(rate, (int, float)) or not rate > 0:
+            raise RateProviderError(f"Invalid rate for {code!r}: {rate!r}")
+    if rates.get(base, 1) != 1:
+        # Re-express everything per one unit of the base currency
+        scale = rates[base]
+        rates = {code: rate / scale for code, rate in rates.items()}
+    result = {base: 1}
+    result.update((code, rate) for code, rate in rates.items() if code != base)
+    return result
+
+
+class StaticRateProvider:
+    """Fixed rates, used when no other source is configured"""
+
+    def __init__(self, rates=None, name='built-in'):
+        self.rates = dict(DEFAULT_RATES if rates is None else rates)
+        self.name = name
+
+    def fetch(self):
+        return dict(self.rates)
+
+
+class FileRateProvider:
+    """Rates read from a local JSON file, re-read on every refresh"""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = f"file:{path}"
+
+    def fetch(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return parse_rates(json.load(f))
+        except (OSError, ValueError) as e:
+            raise RateProviderError(f"Cannot read {self.path}: {e}") from e
+
+
+class HttpRateProvider:
+    """Rates fetched from a local HTTP endpoint serving the provider document"""
+
+    def __init__(self, url, timeout=5.0):
+        self.url = url
+        self.timeout = timeout
+        self.name = url
+
+    def fetch(self):
+        # Pulls in http.client, email and ssl, so it stays out of startup
+        import urllib.request
+        try:
+            with urllib.request.urlopen(self.url, timeout=self.timeout) as response:
+                return parse_rates(json.loads(response.read().decode('utf-8')))
+        except (OSError, ValueError) as e:
+            raise RateProviderError(f"Cannot fetch {self.url}: {e}") from e
+
+
+def provider_from_source(source=None):
+    """Build a provider from a file path or URL; None reads SOURCE_VARIABLE"""
+    if source is None:
+        source = os.environ.get(SOURCE_VARIABLE)
+    if not source:
+        return StaticRateProvider()
+    if source.startswith(('http://', 'https://')):
+        return HttpRateProvider(source)
+    return FileRateProvider(source)
+
+
+def rates_version(rates):
+    """Short content hash of a set of rates; equal rates share a version"""
+    canonical = json.dumps(rates, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:12]
+
+
+class RateSnapshot:
+    """One set of rates, with where and when it was fetched"""
+
+    __slots__ = ('version', 'rates', 'fetched', 'source')
+
+    def __init__(self, rates, fetched=None, source='built-in', version=None):
+        self.rates = dict(rates)
+        self.fetched = time.time() if fetched is None else fetched
+        self.source = source
+        self.version = version or rates_version(self.rates)
+
+    def to_dict(self):
+        return {
+            'version': self.version,
+            'fetched': self.fetched,
+            'source': self.source,
+            'rates': self.rates
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['rates'], data.get('fetched'), data.get('source', ''),
+                   data.get('version'))
+
+    def __repr__(self):
+        return f"RateSnapshot({self.version}, {self.source}, {len(self.rates)} rates)"
+
+
+class SnapshotStore:
+    """Versioned snapshots on disk, one JSON file per version
+
+    Files are written to a temporary name and renamed into place, and the
+    current version is recorded the same way, so readers never see a
+    half-written snapshot.
+    """
+
+    def __init__(self, directory=SNAPSHOT_DIR):
+        self.directory = directory
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _write(self, name, text):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = self._path(name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self._path(name))
+
+    def save(self, snapshot):
+        """Store a snapshot (once per version) and make it the current one"""
+        if not os.path.exists(self._path(snapshot.version + '.json')):
+            self._write(snapshot.version + '.json', json.dumps(snapshot.to_dict(), indent=2))
+        self._write(CURRENT_FILE, snapshot.version)
+
+    def load(self, version):
+        """Return the snapshot with this version, or None if it is not stored"""
+        try:
+            with open(self._path(version + '.json'), 'r', encoding='utf-8') as f:
+                return RateSnapshot.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def current(self):
+        """Return the most recently saved snapshot, or None"""
+        try:
+            with open(self._path(CURRENT_FILE), 'r', encoding='utf-8') as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return self.load(version) if version else None
+
+    def versions(self):
+        """Return every stored version"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.directory)
+                      if name.endswith('.json'))
+
+
+class RateService:
+    """Keeps the current snapshot and refreshes it from a provider in the background
+
+    on_update(snapshot) is called, on the refresher thread, whenever a
+    refresh brings a different version; it must only swap references.
+    """
+
+    def __init__(self, provider=None, store=None, refresh_interval=REFRESH_INTERVAL,
+                 on_update=None):
+        self.provider = provider if provider is not None else StaticRateProvider()
+        self.store = store
+        self.refresh_interval = refresh_interval
+        self.on_update = on_update
+        self.snapshot = RateSnapshot(DEFAULT_RATES)
+        self.last_error = None
+        self.refreshing = False
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._requested = False
+        self._closed = False
+        self._thread = None
+
+    def load(self):
+        """Start from the last saved snapshot, without asking the provider"""
+        if self.store is None:
+            return self.snapshot
+        try:
+            snapshot = self.store.current()
+        except Exception as e:
+            print(f"Error loading currency rates: {e}")
+            snapshot = None
+        if snapshot is not None:
+            self._install(snapshot)
+        return self.snapshot
+
+    def start(self):
+        """Start the refresher thread; it refreshes once straight away"""
+        if self._thread is not None:
+            return
+        self._closed = False
+        self._requested = True
+        self._thread = threading.Thread(target=self._run, name="currency-rates", daemon=True)
+        self._thread.start()
+
+    def refresh_async(self):
+        """Ask the refresher thread for a refresh now"""
+        with self._lock:
+            self._requested = True
+            self._wakeup.notify()
+
+    def refresh(self):
+        """Fetch, store and install new rates; returns the current snapshot"""
+        self.refreshing = True
+        try:
+            rates = self.provider.fetch()
+            snapshot = RateSnapshot(rates, source=self.provider.name)
+            if self.store is not None:
+                self.store.save(snapshot)
+            self.last_error = None
+            if snapshot.version != self.snapshot.version:
+                self._install(snapshot)
+        except Exception as e:
+            print(f"Error refreshing currency rates: {e}")
+            self.last_error = e
+        finally:
+            self.refreshing = False
+        return self.snapshot
+
+    def get(self, version):
+        """Return the snapshot for a version, from memory or the store"""
+        snapshot = self.snapshot
+        if snapshot.version == version:
+            return snapshot
+        return self.store.load(version) if self.store is not None else None
+
+    def close(self, timeout=1.0):
+        """Stop the refresher thread, waiting at most timeout for a fetch in progress"""
+        thread = self._thread
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        if thread is not None:
+            # The thread is a daemon; a stuck provider cannot hold up exit
+            thread.join(timeout)
+            self._thread = None
+
+    def _install(self, snapshot):
+        self.snapshot = snapshot
+        if self.on_update is not None:
+            self.on_update(snapshot)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._closed and not self._requested:
+                    self._wakeup.wait(self.refresh_interval)
+                if self._closed:
+                    return
+                self._requested = False
+            self.refresh()
@@ -0,0 +1,960 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Expression Engine for Advanced Calculator Pro
+Tokenizer, recursive-descent parser and compiled evaluator for calculator
+expressions. Compiled expressions are kept in a bounded LRU cache so that
+repeated expressions skip tokenizing and parsing entirely. An optimizing
+pass folds constant subtrees and computes repeated subexpressions once.
+Function results can also be memoized across expressions with an opt-in
+FunctionCache. User functions defined at run time (see workspace.py) are
+called like the built-in ones.
+"""
+
+import math
+import re
+import time
+import types
+from collections import OrderedDict
+from fractions import Fraction
+
+import combinatorics
+
+
+# Functions and constants available inside expressions
+FUNCTIONS = {
+    'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
+    'asin': math.asin, 'acos': math.acos, 'atan': math.atan,
+    'log': math.log, 'log10': math.log10,
+    'sqrt': math.sqrt, 'pow': pow, 'abs': abs,
+    'fact': combinatorics.factorial, 'comb': combinatorics.comb, 'perm': combinatorics.perm,
+    'gamma': combinatorics.gamma, 'lgamma': combinatorics.lgamma
+}
+
+CONSTANTS = {
+    'pi': math.pi,
+    'e': math.e
+}
+
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?[jJ]?)
+      | (?P<name>[A-Za-z_][A-Za-z_0-9]*)
+      | (?P<op>\*\*|//|[-+*/%(),])
+    )""", re.VERBOSE)
+
+
+class ExpressionError(ValueError):
+    """Raised when an expression cannot be tokenized, parsed or resolved"""
+
+    def __init__(self, message, position=None):
+        super().__init__(message)
+        self.position = position
+
+
+class LimitError(ExpressionError):
+    """Raised when an expression exceeds one of the EvaluationLimits"""
+
+    def __init__(self, message, limit=None):
+        super().__init__(message)
+        self.limit = limit
+
+
+# Default bound on exact integer results: about 4,200 digits, under
+# combinatorics.EXACT_DIGITS, so every result can still be turned into text
+# for display, history and exports
+MAX_INT_BITS = 14000
+
+
+class EvaluationLimits:
+    """Resource limits for compiling and evaluating untrusted expressions
+
+    Size and nesting are checked before anything is evaluated. Integer
+    growth is estimated before each power or multiplication runs, and the
+    wall-clock budget is checked before large exact powers and calls to
+    functions written in Python, the only nodes that can be slow. Any
+    limit can be None to disable it.
+    """
+
+    def __init__(self, max_length=1000, max_depth=64, max_nodes=500,
+                 max_int_bits=MAX_INT_BITS, time_budget=5.0):
+        self.max_length = max_length
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.max_int_bits = max_int_bits
+        self.time_budget = time_budget
+        self.deadline = None
+
+    def settings(self):
+        """Return the limits as a tuple, so EvaluationLimits(*settings) recreates them"""
+        return (self.max_length, self.max_depth, self.max_nodes,
+                self.max_int_bits, self.time_budget)
+
+    def check_text(self, text):
+        if self.max_length is not None and len(text) > self.max_length:
+            raise LimitError(f"Expression longer than {self.max_length} characters", 'length')
+
+    def check_tree(self, tree):
+        if self.max_nodes is not None and count_nodes(tree) > self.max_nodes:
+            raise LimitError(f"Expression has more than {self.max_nodes} parts", 'nodes')
+
+    def check_bits(self, bits):
+        if self.max_int_bits is not None and bits > self.max_int_bits:
+            raise LimitError(f"Result would need about {int(bits):,} bits, "
+                             f"more than {self.max_int_bits:,}", 'int_bits')
+
+    def check_time(self):
+        deadline = self.deadline
+        if deadline is not None and time.perf_counter() > deadline:
+            raise LimitError(f"Evaluation took longer than {self.time_budget:g} seconds", 'time')
+
+    def wrap(self, function):
+        """Start the time budget whenever the compiled expression is evaluated"""
+        if self.time_budget is None:
+            return function
+        budget = self.time_budget
+        clock = time.perf_counter
+
+        def evaluate(env):
+            self.deadline = clock() + budget
+            return function(env)
+        return evaluate
+
+
+def _magnitude_bits(value):
+    """log2 of the largest integer an exact value is made of, or None for inexact types"""
+    if isinstance(value, int):
+        return math.log2(abs(value)) if value else 0.0
+    if isinstance(value, Fraction):
+        return math.log2(max(abs(value.numerator), value.denominator))
+    return None
+
+
+# Exact powers below this many bits are too cheap to check the clock for
+_SMALL_POWER_BITS = 4096
+
+
+def _check_power(limits, base, exponent):
+    """Refuse exact powers that would exceed max_int_bits, before computing them"""
+    if type(exponent) is float or type(base) is float:
+        return
+    if isinstance(exponent, Fraction) and exponent.denominator == 1:
+        exponent = exponent.numerator
+    if isinstance(exponent, int) and not -2 < exponent < 2:
+        bits = _magnitude_bits(base)
+        # Negative powers only stay exact (and grow) for fractions
+        if bits is not None and (exponent > 0 or isinstance(base, Fraction)):
+            bits *= abs(exponent)
+            limits.check_bits(bits)
+            if bits > _SMALL_POWER_BITS:
+                limits.check_time()
+
+
+def _check_product(limits, left, right):
+    """Refuse exact products that would exceed max_int_bits"""
+    left_bits = _magnitude_bits(left)
+    if left_bits is not None:
+        right_bits = _magnitude_bits(right)
+        if right_bits is not None:
+            limits.check_bits(left_bits + right_bits)
+
+
+# ---------------------------------------------------------------------------
+# Tokenizer
+# ---------------------------------------------------------------------------
+
+def tokenize(text):
+    """Split an expression into (kind, value, position) tokens"""
+    tokens = []
+    position = 0
+    end = len(text)
+    match = TOKEN_PATTERN.match
+    while position < end:
+        m = match(text, position)
+        if m is None or m.end() == position:
+            rest = text[position:]
+            if rest.strip() == "":
+                break
+            # Point at the character itself, not the spaces before it
+            position += len(rest) - len(rest.lstrip())
+            raise ExpressionError(f"Unexpected character at position {position}", position)
+        kind = m.lastgroup
+        tokens.append((kind, m.group(kind), m.start(kind)))
+        position = m.end()
+    tokens.append(('end', None, end))
+    return tokens
+
+
+# ---------------------------------------------------------------------------
+# Syntax tree
+# ---------------------------------------------------------------------------
+
+class Number:
+    __slots__ = ('value', 'text')
+
+    def __init__(self, value, text=None):
+        self.value = value
+        # Source text, so exact numeric modes can read the literal without float rounding
+        self.text = text
+
+    def __repr__(self):
+        return f"Number({self.value!r})"
+
+
+class Name:
+    __slots__ = ('id',)
+
+    def __init__(self, id):
+        self.id = id
+
+    def __repr__(self):
+        return f"Name({self.id!r})"
+
+
+class UnaryOp:
+    __slots__ = ('op', 'operand')
+
+    def __init__(self, op, operand):
+        self.op = op
+        self.operand = operand
+
+    def __repr__(self):
+        return f"UnaryOp({self.op!r}, {self.operand!r})"
+
+
+class BinOp:
+    __slots__ = ('op', 'left', 'right')
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def __repr__(self):
+        return f"BinOp({self.op!r}, {self.left!r}, {self.right!r})"
+
+
+class Call:
+    __slots__ = ('func', 'args')
+
+    def __init__(self, func, args):
+        self.func = func
+        self.args = args
+
+    def __repr__(self):
+        return f"Call({self.func!r}, {self.args!r})"
+
+
+# ---------------------------------------------------------------------------
+# Parser
+# ---------------------------------------------------------------------------
+
+class Parser:
+    """Recursive-descent parser following Python operator precedence
+
+    expr   := term (('+' | '-') term)*
+    term   := factor (('*' | '/' | '//' | '%') factor)*
+    factor := ('+' | '-') factor | power
+    power  := atom ['**' factor]
+    atom   := NUMBER | NAME | NAME '(' [expr (',' expr)*] ')' | '(' expr ')'
+    """
+
+    def __init__(self, text, max_depth=None):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.index = 0
+        self.depth = 0
+        self.max_depth = math.inf if max_depth is None else max_depth
+
+    def parse(self):
+        """Parse the whole expression and return its syntax tree"""
+        if self.tokens[0][0] == 'end':
+            raise ExpressionError("Empty expression", 0)
+        node = self.expr()
+        kind, value, position = self.tokens[self.index]
+        if kind != 'end':
+            raise ExpressionError(f"Unexpected '{value}' at position {position}", position)
+        return node
+
+    def peek(self):
+        return self.tokens[self.index]
+
+    def advance(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def expect(self, value):
+        kind, token_value, position = self.advance()
+        if kind != 'op' or token_value != value:
+            raise ExpressionError(f"Expected '{value}' at position {position}", position)
+
+    def expr(self):
+        node = self.term()
+        while True:
+            kind, value, _ = self.peek()
+            if kind == 'op' and value in ('+', '-'):
+                self.index += 1
+                node = BinOp(value, node, self.term())
+            else:
+                return node
+
+    def term(self):
+        node = self.factor()
+        while True:
+            kind, value, _ = self.peek()
+            if kind == 'op' and value in ('*', '/', '//', '%'):
+                self.index += 1
+                node = BinOp(value, node, self.factor())
+            else:
+                return node
+
+    def factor(self):
+        # Every level of nesting passes through here
+        self.depth += 1
+        if self.depth > self.max_depth:
+            raise LimitError(f"Expression nested deeper than {self.max_depth} levels", 'depth')
+        kind, value, _ = self.peek()
+        if kind == 'op' and value in ('+', '-'):
+            self.index += 1
+            node = UnaryOp(value, self.factor())
+        else:
+            node = self.power()
+        self.depth -= 1
+        return node
+
+    def power(self):
+        node = self.atom()
+        kind, value, _ = self.peek()
+        if kind == 'op' and value == '**':
+            self.index += 1
+            # Right associative, and binds tighter than a unary operator on its left
+            node = BinOp('**', node, self.factor())
+        return node
+
+    def atom(self):
+        kind, value, position = self.advance()
+        if kind == 'number':
+            if value[-1] in 'jJ':
+                # Imaginary literal such as 2j; no exact type can hold it
+                return Number(complex(value))
+            if '.' in value or 'e' in value or 'E' in value:
+                return Number(float(value), value)
+            return Number(int(value), value)
+        if kind == 'name':
+            next_kind, next_value, _ = self.peek()
+            if next_kind == 'op' and next_value == '(':
+                self.index += 1
+                return Call(value, self.arguments())
+            return Name(value)
+        if kind == 'op' and value == '(':
+            node = self.expr()
+            self.expect(')')
+            return node
+        if kind == 'end':
+            raise ExpressionError("Unexpected end of expression", position)
+        raise ExpressionError(f"Unexpected '{value}' at position {position}", position)
+
+    def arguments(self):
+        args = []
+        kind, value, _ = self.peek()
+        if kind == 'op' and value == ')':
+            self.index += 1
+            return args
+        while True:
+            args.append(self.expr())
+            kind, value, position = self.advance()
+            if kind == 'op' and value == ')':
+                return args
+            if kind != 'op' or value != ',':
+                raise ExpressionError(f"Expected ',' or ')' at position {position}", position)
+
+
+def parse(text, max_depth=None):
+    """Parse an expression string into a syntax tree"""
+    return Parser(text, max_depth).parse()
+
+
+def count_nodes(tree):
+    """Return the number of nodes in a syntax tree"""
+    count = 0
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if isinstance(node, UnaryOp):
+            stack.append(node.operand)
+        elif isinstance(node, BinOp):
+            stack.append(node.left)
+            stack.append(node.right)
+        elif isinstance(node, Call):
+            stack.extend(node.args)
+    return count
+
+
+# ---------------------------------------------------------------------------
+# Compiler
+# ---------------------------------------------------------------------------
+
+def _compile_binop(op, left, right, limits=None):
+    """Build a closure for a binary operator"""
+    if limits is not None:
+        if op == '**':
+            def power(env):
+                base = left(env)
+                exponent = right(env)
+                _check_power(limits, base, exponent)
+                return base ** exponent
+            return power
+        if op == '*' and limits.max_int_bits is not None:
+            def multiply(env):
+                a = left(env)
+                b = right(env)
+                # Floats cannot blow up memory; skip the check for them cheaply
+                if type(a) is not float and type(b) is not float:
+                    _check_product(limits, a, b)
+                return a * b
+            return multiply
+    if op == '+':
+        return lambda env: left(env) + right(env)
+    if op == '-':
+        return lambda env: left(env) - right(env)
+    if op == '*':
+        return lambda env: left(env) * right(env)
+    if op == '/':
+        return lambda env: left(env) / right(env)
+    if op == '//':
+        return lambda env: left(env) // right(env)
+    if op == '%':
+        return lambda env: left(env) % right(env)
+    if op == '**':
+        return lambda env: left(env) ** right(env)
+    raise ExpressionError(f"Unknown operator '{op}'")
+
+
+def _checked_function(func, name, limits):
+    """Wrap a function so pow checks its result size, and functions written
+    in Python (not C builtins, which are fast) check the time budget"""
+    if name == 'pow':
+        def checked(*args):
+            if len(args) == 2:
+                _check_power(limits, *args)
+            return func(*args)
+        return checked
+    if limits.time_budget is None or isinstance(func, types.BuiltinFunctionType):
+        return func
+    check_time = limits.check_time
+
+    def checked(*args):
+        check_time()
+        return func(*args)
+    return checked
+
+
+def _compile_call(func, args):
+    """Build a closure for a function call with a fixed argument list"""
+    if len(args) == 1:
+        arg = args[0]
+        return lambda env: func(arg(env))
+    if len(args) == 2:
+        first, second = args
+        return lambda env: func(first(env), second(env))
+    return lambda env: func(*[arg(env) for arg in args])
+
+
+def _compile_name(name):
+    """Build a closure that reads a free variable from the environment"""
+    def load(env):
+        try:
+            return env[name]
+        except KeyError:
+            raise ExpressionError(f"Unknown name '{name}'") from None
+    return load
+
+
+def compile_tree(node, functions=FUNCTIONS, constants=CONSTANTS, literal=None, limits=None):
+    """Turn a syntax tree into a closure taking a variable environment
+
+    literal, when given, builds number constants from their source text
+    (Decimal or Fraction for the exact numeric modes). limits, an
+    EvaluationLimits, adds size and time checks to powers, products and calls.
+    """
+    if isinstance(node, Number):
+        value = node.value if literal is None or node.text is None else literal(node.text)
+        return lambda env: value
+    if isinstance(node, Name):
+        if node.id in constants:
+            value = constants[node.id]
+            return lambda env: value
+        return _compile_name(node.id)
+    if isinstance(node, UnaryOp):
+        operand = compile_tree(node.operand, functions, constants, literal, limits)
+        if node.op == '-':
+            return lambda env: -operand(env)
+        return lambda env: +operand(env)
+    if isinstance(node, BinOp):
+        return _compile_binop(node.op,
+                              compile_tree(node.left, functions, constants, literal, limits),
+                              compile_tree(node.right, functions, constants, literal, limits),
+                              limits)
+    if isinstance(node, Call):
+        if node.func not in functions:
+            raise ExpressionError(f"Unknown function '{node.func}'")
+        args = [compile_tree(arg, functions, constants, literal, limits) for arg in node.args]
+        func = functions[node.func]
+        if limits is not None:
+            func = _checked_function(func, node.func, limits)
+        return _compile_call(func, args)
+    raise ExpressionError(f"Unsupported node {node!r}")
+
+
+def free_names(node, constants=CONSTANTS):
+    """Return the set of variable names an expression reads"""
+    if isinstance(node, Name):
+        return set() if node.id in constants else {node.id}
+    if isinstance(node, UnaryOp):
+        return free_names(node.operand, constants)
+    if isinstance(node, BinOp):
+        return free_names(node.left, constants) | free_names(node.right, constants)
+    if isinstance(node, Call):
+        names = set()
+        for arg in node.args:
+            names |= free_names(arg, constants)
+        return names
+    return set()
+
+
+# ---------------------------------------------------------------------------
+# Optimizer
+# ---------------------------------------------------------------------------
+
+# Operators whose operands can be swapped, so a*b and b*a are the same subexpression
+COMMUTATIVE = frozenset(('+', '*'))
+
+# Smallest repeated subtree worth computing once; calls are always worth it
+SHARE_MIN_NODES = 3
+
+
+def optimize(tree, functions=FUNCTIONS, constants=CONSTANTS, literal=None, limits=None,
+             wrap=None, min_nodes=SHARE_MIN_NODES):
+    """Fold constant subtrees and compute repeated subtrees once
+
+    Every subtree without free variables is replaced by the Number it
+    evaluates to; wrap, when given, wraps those evaluations the way the
+    engine does (the numeric mode's context). A subtree that raises is kept,
+    so the error surfaces when the expression is evaluated, except for a
+    LimitError, which a constant subtree would hit every time.
+
+    Subtrees are then compared in canonical form, with the operands of +
+    and * in a fixed order. Returns (tree, lets): lets is a list of
+    (slot, subtree) pairs in evaluation order, and the tree and later
+    subtrees read each result back as Name(slot). Slot names start with
+    '#', which no expression can spell.
+    """
+    keys = {}
+    sizes = {}
+    calls = set()
+    info = {}
+
+    def evaluate(node):
+        function = compile_tree(node, functions, constants, literal, limits)
+        if limits is not None:
+            function = limits.wrap(function)
+        if wrap is not None:
+            function = wrap(function)
+        return function(_EMPTY_ENV)
+
+    def visit(node):
+        # Returns the folded node and its canonical key: each distinct
+        # structure gets a small integer, so keys stay flat
+        kind = type(node)
+        if kind is Number:
+            key = ('n', node.text, repr(node.value))
+            size = 1
+        elif kind is Name:
+            if node.id in constants:
+                node = Number(constants[node.id])
+                key = ('n', None, repr(node.value))
+            else:
+                key = ('v', node.id)
+            size = 1
+        else:
+            if kind is UnaryOp:
+                operand, key, size = visit(node.operand)
+                node = UnaryOp(node.op, operand)
+                constant = type(operand) is Number
+                key = ('u', node.op, key)
+                size += 1
+            elif kind is BinOp:
+                left, left_key, left_size = visit(node.left)
+                right, right_key, right_size = visit(node.right)
+                node = BinOp(node.op, left, right)
+                constant = type(left) is Number and type(right) is Number
+                if node.op in COMMUTATIVE and right_key < left_key:
+                    left_key, right_key = right_key, left_key
+                key = ('b', node.op, left_key, right_key)
+                size = left_size + right_size + 1
+            else:
+                args = [visit(arg) for arg in node.args]
+                node = Call(node.func, [arg for arg, _, _ in args])
+                constant = node.func in functions and \
+                    all(type(arg) is Number for arg, _, _ in args)
+                key = ('c', node.func) + tuple(arg_key for _, arg_key, _ in args)
+                size = sum(arg_size for _, _, arg_size in args) + 1
+            if constant:
+                try:
+                    # No source text: the value is already in the numeric mode's type
+                    node = Number(evaluate(node))
+                    key = ('n', None, repr(node.value))
+                    size = 1
+                except LimitError:
+                    raise
+                except Exception:
+                    pass
+        key = keys.setdefault(key, len(keys))
+        if kind is Call:
+            calls.add(key)
+        sizes[key] = size
+        info[id(node)] = key
+        return node, key, size
+
+    tree = visit(tree)[0]
+
+    # Count occurrences, without looking inside a repeat of a subtree
+    # already seen: its inner subtrees will not be computed again
+    counts = {}
+
+    def count(node):
+        key = info[id(node)]
+        if key in counts:
+            counts[key] += 1
+            return
+        counts[key] = 1
+        kind = type(node)
+        if kind is BinOp:
+            count(node.left)
+            count(node.right)
+        elif kind is UnaryOp:
+            count(node.operand)
+        elif kind is Call:
+            for arg in node.args:
+                count(arg)
+
+    count(tree)
+    shared = {key for key, number in counts.items()
+              if number > 1 and sizes[key] > 1 and (key in calls or sizes[key] >= min_nodes)}
+    if not shared:
+        return tree, []
+
+    slots = {}
+    lets = []
+
+    def rewrite(node):
+        key = info[id(node)]
+        if key in slots:
+            return Name(slots[key])
+        kind = type(node)
+        if kind is BinOp:
+            node = BinOp(node.op, rewrite(node.left), rewrite(node.right))
+        elif kind is UnaryOp:
+            node = UnaryOp(node.op, rewrite(node.operand))
+        elif kind is Call:
+            node = Call(node.func, [rewrite(arg) for arg in node.args])
+        if key in shared:
+            slot = f"#{len(lets)}"
+            slots[key] = slot
+            lets.append((slot, node))
+            return Name(slot)
+        return node
+
+    return rewrite(tree), lets
+
+
+class _Slots(dict):
+    """Results of shared subexpressions; other names come from env"""
+
+    __slots__ = ('env',)
+
+    def __missing__(self, name):
+        return self.env[name]
+
+
+def _compile_lets(lets, body):
+    """Build a closure that computes shared subexpressions before the body
+
+    The results go into a small overlay on the environment, made per
+    evaluation, so the environment is neither copied nor changed and one
+    compiled expression can be evaluated from several threads.
+    """
+    def evaluate(env):
+        local = _Slots()
+        local.env = env
+        for slot, function in lets:
+            local[slot] = function(local)
+        return body(local)
+    return evaluate
+
+
+class FunctionCache:
+    """Bounded LRU cache of function results, keyed on function and arguments
+
+    One cache is shared by every expression an engine compiles, so sin(x)
+    computed for one expression is reused by the next. Argument types are
+    part of the key, so pow(2, 3) and pow(2.0, 3) are kept apart. C builtins
+    such as math.sin are left alone: they are faster than a lookup. Numeric
+    modes name the functions worth caching in their memoized attribute.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def wrap(self, name, func):
+        """Return a memoized version of func, or func itself if it is a builtin"""
+        if isinstance(func, types.BuiltinFunctionType):
+            return func
+        results = self._results
+
+        def memoized(*args):
+            if len(args) == 1:
+                arg = args[0]
+                key = (name, arg, type(arg))
+            else:
+                key = (name, args, tuple(map(type, args)))
+            try:
+                result = results[key]
+            except KeyError:
+                pass
+            except TypeError:
+                # Unhashable argument
+                return func(*args)
+            else:
+                results.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+            result = func(*args)
+            results[key] = result
+            if len(results) > self.maxsize:
+                results.popitem(last=False)
+                self.evictions += 1
+            return result
+        return memoized
+
+    def wrap_all(self, functions, names=None):
+        """Return a copy of a function table with the named functions (default: all) memoized"""
+        return {name: self.wrap(name, func) if names is None or name in names else func
+                for name, func in functions.items()}
+
+    def clear(self):
+        """Drop every cached result and reset the counters"""
+        self._results.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def cache_info(self):
+        """Return cache usage counters"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._results),
+            'maxsize': self.maxsize
+        }
+
+
+_EMPTY_ENV = {}
+
+
+class CompiledExpression:
+    """A parsed and compiled expression, ready to be evaluated repeatedly"""
+
+    __slots__ = ('source', 'tree', 'names', 'optimized', '_function')
+
+    def __init__(self, source, tree, function, names, optimized=False):
+        self.source = source
+        self.tree = tree
+        self.names = names
+        # True when compiled through optimize()
+        self.optimized = optimized
+        self._function = function
+
+    def evaluate(self, env=None):
+        """Evaluate the expression, reading free variables from env"""
+        return self._function(_EMPTY_ENV if env is None else env)
+
+    __call__ = evaluate
+
+    def __repr__(self):
+        return f"CompiledExpression({self.source!r})"
+
+
+class ExpressionEngine:
+    """Compiles expressions once and evaluates them from an LRU cache"""
+
+    def __init__(self, cache_size=256, functions=None, constants=None, mode=None, limits=None,
+                 function_cache=None, optimize=True):
+        self.cache_size = cache_size
+        # Fold constants and share repeated subexpressions when compiling
+        self.optimize = optimize
+        self.functions = dict(FUNCTIONS if functions is None else functions)
+        self.constants = dict(CONSTANTS if constants is None else constants)
+        # EvaluationLimits for untrusted input, or None for no checks
+        self.limits = limits
+        # Opt-in FunctionCache memoizing function calls across expressions
+        self.function_cache = function_cache
+        # Functions defined at run time (see workspace.py). Calls to them are
+        # never folded or memoized, so they can be redefined at any time
+        self.user_functions = {}
+        self._tables = None
+        self.mode = None
+        self.literal = None
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if mode is not None:
+            self.set_mode(mode)
+
+    def set_mode(self, mode):
+        """Switch numeric mode (see numeric_modes); cached expressions are dropped"""
+        self.mode = mode
+        self.functions = dict(mode.functions)
+        self.constants = dict(mode.constants)
+        self.literal = mode.literal
+        self.clear_cache()
+        # Results depend on the mode (and Decimal precision)
+        if self.function_cache is not None:
+            self.function_cache.clear()
+
+    def set_function_cache(self, function_cache):
+        """Memoize function calls in a FunctionCache, or stop with None"""
+        self.function_cache = function_cache
+        self.clear_cache()
+
+    def define_function(self, name, function):
+        """Make a user function callable from expressions compiled from now on"""
+        self.user_functions[name] = function
+        self._tables = None
+
+    def remove_function(self, name):
+        """Stop compiling calls to a user function; compiled calls keep the old one"""
+        self.user_functions.pop(name, None)
+        self._tables = None
+
+    def compile(self, text, optimized=None):
+        """Return the compiled form of an expression, using the cache
+
+        With the optimizer on, exact modes optimize an expression when it is
+        first compiled; in float mode, where one evaluation is cheaper than
+        optimizing, it happens when the expression is reused.
+        optimized=True asks for the optimized form straight away, for
+        callers about to evaluate many times.
+        """
+        cache = self._cache
+        compiled = cache.get(text)
+        if compiled is not None:
+            cache.move_to_end(text)
+            self.hits += 1
+            if compiled.optimized or not self.optimize:
+                return compiled
+            # Reused, so worth optimizing; the tree has already passed the limits
+            tree = compiled.tree
+            optimized = True
+        else:
+            self.misses += 1
+            tree = self._parse(text)
+            if optimized is None:
+                optimized = self.mode is not None and self.mode.exact
+            optimized = optimized and self.optimize
+
+        compiled = self._build(text, tree, optimized)
+        if self.cache_size > 0:
+            cache[text] = compiled
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return compiled
+
+    def compile_body(self, text):
+        """Compile the body of a user function
+
+        The body is checked against the limits, but not cached, optimized or
+        wrapped in the limits and numeric mode: it runs inside the
+        expression calling it, which already is.
+        """
+        tree = self._parse(text)
+        function = compile_tree(tree, self._function_tables()[1], self.constants,
+                                self.literal, self.limits)
+        return CompiledExpression(text, tree, function,
+                                  frozenset(free_names(tree, self.constants)))
+
+    def _parse(self, text):
+        """Parse an expression, checking it against the limits"""
+        limits = self.limits
+        if limits is None:
+            return parse(text)
+        limits.check_text(text)
+        tree = parse(text, limits.max_depth)
+        limits.check_tree(tree)
+        return tree
+
+    def _function_tables(self):
+        """Return (functions the optimizer may fold, functions calls are compiled to)
+
+        Both are memoized through the function cache when there is one; the
+        second adds the user functions.
+        """
+        if self._tables is None:
+            functions = self.functions
+            if self.function_cache is not None:
+                functions = self.function_cache.wrap_all(
+                    functions, None if self.mode is None else self.mode.memoized)
+            calls = dict(functions, **self.user_functions) if self.user_functions else functions
+            self._tables = (functions, calls)
+        return self._tables
+
+    def _build(self, text, tree, optimized):
+        """Compile a parsed expression, optionally through the optimizer"""
+        limits = self.limits
+        functions, calls = self._function_tables()
+        constants = self.constants
+        literal = self.literal
+        body = tree
+        lets = ()
+        if optimized:
+            body, lets = optimize(tree, functions, constants, literal, limits,
+                                  None if self.mode is None else self.mode.wrap)
+        function = compile_tree(body, calls, constants, literal, limits)
+        if lets:
+            function = _compile_lets(
+                [(slot, compile_tree(node, calls, constants, literal, limits))
+                 for slot, node in lets], function)
+        if limits is not None:
+            function = limits.wrap(function)
+        if self.mode is not None:
+            function = self.mode.wrap(function)
+        return CompiledExpression(text, tree, function,
+                                  frozenset(free_names(tree, constants)), optimized)
+
+    def evaluate(self, text, env=None):
+        """Compile (or fetch) and evaluate an expression"""
+        return self.compile(text).evaluate(env)
+
+    def clear_cache(self):
+        """Drop every cached compiled expression"""
+        self._cache.clear()
+        self._tables = None
+        self.hits = 0
+        self.misses = 0
+
+    def cache_info(self):
+        """Return cache usage counters"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._cache),
+            'maxsize': self.cache_size
+        }
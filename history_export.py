@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+History Export for Advanced Calculator Pro
+Streaming exporter for large histories. Records are read from the persisted
+log in batches, encoded one batch at a time and written with a single
+buffered write per batch, on a background thread that reports progress and
+can be cancelled. Formats: CSV, TXT, JSON Lines and a columnar binary
+format (.hcol) that re-imports without parsing text.
+"""
+
+import csv
+import io
+import json
+import os
+import struct
+import sys
+import threading
+from array import array
+from decimal import Decimal
+from fractions import Fraction
+
+from history_record import HistoryRecord, KIND_NAMES, format_entry
+
+# ----------------------------------------------------------------------
+# Columnar binary format
+#
+#   file   := MAGIC chunk*
+#   chunk  := b'CHNK' rows:u32
+#             timestamp:f64[rows] kind:u8[rows] tag:u8[rows] number:f64[rows]
+#             strings(expression) strings(text) strings(unit) strings(rates)
+#   strings := blob_size:u32 lengths:u32[rows] blob:utf-8
+#
+# All numbers are little-endian. Float results live in the number column;
+# other results are stored as text and re-created from their tag. Version 1
+# files have no rates column.
+# ----------------------------------------------------------------------
+
+COLUMNAR_MAGIC = b'ACPHCOL2'
+COLUMNAR_MAGIC_V1 = b'ACPHCOL1'
+CHUNK_HEADER = struct.Struct('<4sI')
+BLOB_SIZE = struct.Struct('<I')
+
+TAG_FLOAT = 0
+TAG_INT = 1
+TAG_COMPLEX = 2
+TAG_TEXT = 3
+TAG_DECIMAL = 4
+TAG_FRACTION = 5
+
+# array() uses native byte order; the file format is little-endian
+_SWAP = sys.byteorder != 'little'
+
+
+def _to_little_endian(column):
+    if _SWAP:
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_little_endian(typecode, data):
+    column = array(typecode)
+    column.frombytes(data)
+    if _SWAP:
+        column.byteswap()
+    return column
+
+
+def _encode_strings(values):
+    encoded = [value.encode('utf-8') for value in values]
+    blob = b''.join(encoded)
+    lengths = array('I', map(len, encoded))
+    return BLOB_SIZE.pack(len(blob)) + _to_little_endian(lengths) + blob
+
+
+class CsvWriter:
+    def header(self):
+        return 'Timestamp,Type,Expression,Result\r\n'.encode('utf-8')
+
+    def encode(self, records):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            (record.formatted_timestamp(), record.type, record.expression,
+             record.formatted_result()) for record in records)
+        return buffer.getvalue().encode('utf-8')
+
+
+class TextWriter:
+    def header(self):
+        return ("Calculator History Export\n" + "=" * 60 + "\n\n").encode('utf-8')
+
+    def encode(self, records):
+        return "".join(map(format_entry, records)).encode('utf-8')
+
+
+class JsonLinesWriter:
+    def header(self):
+        return b''
+
+    def encode(self, records):
+        dumps = json.dumps
+        return "".join(dumps(record.to_dict(), ensure_ascii=False) + "\n"
+                       for record in records).encode('utf-8')
+
+
+class ColumnarWriter:
+    def header(self):
+        return COLUMNAR_MAGIC
+
+    def encode(self, records):
+        timestamps = array('d')
+        kinds = bytearray()
+        tags = bytearray()
+        numbers = array('d')
+        expressions = []
+        texts = []
+        units = []
+        rates = []
+        for record in records:
+            timestamps.append(record.timestamp)
+            kinds.append(record.kind)
+            expressions.append(record.expression)
+            units.append(record.unit or '')
+            rates.append(record.rates or '')
+            result = record.result
+            if isinstance(result, float):
+                tags.append(TAG_FLOAT)
+                numbers.append(result)
+                texts.append('')
+            else:
+                tags.append(TAG_INT if isinstance(result, int)
+                            else TAG_COMPLEX if isinstance(result, complex)
+                            else TAG_DECIMAL if isinstance(result, Decimal)
+                            else TAG_FRACTION if isinstance(result, Fraction) else TAG_TEXT)
+                numbers.append(0.0)
+                texts.append(str(result))
+        if not timestamps:
+            return b''
+        return b''.join((
+            CHUNK_HEADER.pack(b'CHNK', len(timestamps)),
+            _to_little_endian(timestamps), bytes(kinds), bytes(tags),
+            _to_little_endian(numbers),
+            _encode_strings(expressions), _encode_strings(texts), _encode_strings(units),
+            _encode_strings(rates)
+        ))
+
+
+WRITERS = {
+    'csv': CsvWriter,
+    'txt': TextWriter,
+    'jsonl': JsonLinesWriter,
+    'hcol': ColumnarWriter,
+}
+
+
+def format_for_path(path):
+    """Pick an export format from a file name, defaulting to TXT"""
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return extension if extension in WRITERS else 'txt'
+
+
+# ----------------------------------------------------------------------
+# Columnar re-import
+# ----------------------------------------------------------------------
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated columnar history file")
+    return data
+
+
+def _read_strings(f, rows):
+    blob_size = BLOB_SIZE.unpack(_read_exact(f, BLOB_SIZE.size))[0]
+    lengths = _from_little_endian('I', _read_exact(f, rows * 4))
+    blob = _read_exact(f, blob_size)
+    values = []
+    position = 0
+    for length in lengths:
+        values.append(blob[position:position + length].decode('utf-8'))
+        position += length
+    return values
+
+
+def iter_columns(path):
+    """Yield each chunk of a columnar export as a dict of columns"""
+    with open(path, 'rb') as f:
+        magic = f.read(len(COLUMNAR_MAGIC))
+        if magic not in (COLUMNAR_MAGIC, COLUMNAR_MAGIC_V1):
+            raise ValueError("Not a columnar history file")
+        while True:
+            header = f.read(CHUNK_HEADER.size)
+            if not header:
+                return
+            if len(header) != CHUNK_HEADER.size:
+                raise ValueError("Truncated columnar history file")
+            tag, rows = CHUNK_HEADER.unpack(header)
+            if tag != b'CHNK':
+                raise ValueError("Corrupt columnar history file")
+            yield {
+                'timestamp': _from_little_endian('d', _read_exact(f, rows * 8)),
+                'kind': _read_exact(f, rows),
+                'tag': _read_exact(f, rows),
+                'number': _from_little_endian('d', _read_exact(f, rows * 8)),
+                'expression': _read_strings(f, rows),
+                'text': _read_strings(f, rows),
+                'unit': _read_strings(f, rows),
+                'rates': _read_strings(f, rows) if magic == COLUMNAR_MAGIC else [''] * rows,
+            }
+
+
+def read_columnar(path):
+    """Re-import a columnar export as HistoryRecord objects"""
+    for columns in iter_columns(path):
+        rows = zip(columns['timestamp'], columns['kind'], columns['tag'], columns['number'],
+                   columns['expression'], columns['text'], columns['unit'], columns['rates'])
+        for timestamp, kind, tag, number, expression, text, unit, rates in rows:
+            if tag == TAG_FLOAT:
+                result = number
+            elif tag == TAG_INT:
+                result = int(text)
+            elif tag == TAG_COMPLEX:
+                result = complex(text)
+            elif tag == TAG_DECIMAL:
+                result = Decimal(text)
+            elif tag == TAG_FRACTION:
+                result = Fraction(text)
+            else:
+                result = text
+            if kind >= len(KIND_NAMES):
+                kind = 0
+            yield HistoryRecord(expression, result, kind, timestamp, unit or None, rates or None)
+
+
+# ----------------------------------------------------------------------
+# Background exporter
+# ----------------------------------------------------------------------
+
+class HistoryExporter:
+    def __init__(self, batches, path, fmt=None, buffer_size=1024 * 1024):
+        # batches yields (records, done, total) as HistoryLog.iter_batches does
+        self.batches = batches
+        self.path = path
+        self.format = fmt or format_for_path(path)
+        self.buffer_size = buffer_size
+
+        self.rows = 0
+        self.progress = 0.0
+        self.done = False
+        self.cancelled = False
+        self.error = None
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Run the export on a background thread"""
+        self._thread = threading.Thread(target=self.run, name="history-export", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Ask the export to stop; the partial file is removed"""
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        """Wait for a background export to finish"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.done
+
+    def run(self):
+        """Export every batch; the target file only appears once complete"""
+        writer = WRITERS[self.format]()
+        temp_path = self.path + '.part'
+        try:
+            with open(temp_path, 'wb', buffering=self.buffer_size) as f:
+                f.write(writer.header())
+                for records, done, total in self.batches:
+                    if self._cancel.is_set():
+                        break
+                    f.write(writer.encode(records))
+                    self.rows += len(records)
+                    self.progress = done / total if total else 1.0
+            if self._cancel.is_set():
+                self.cancelled = True
+                os.remove(temp_path)
+            else:
+                os.replace(temp_path, self.path)
+                self.progress = 1.0
+        except Exception as e:
+            print(f"Error exporting history: {e}")
+            self.error = e
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        finally:
+            self.done = True
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+History Index for Advanced Calculator Pro
+In-memory indexes over the HistoryRecord history: by entry type, by
+timestamp range, by numeric result range and by expression token. A query
+is driven by its most selective index and checks the other filters with
+per-position column lookups, so it stays in the millisecond range for
+hundreds of thousands of entries.
+"""
+
+import datetime
+import math
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+from fractions import Fraction
+
+from history_record import KINDS
+
+# Accepted since:/until: formats and the period each one covers
+TIME_FORMATS = (
+    ("%Y-%m-%d %H:%M:%S", 'second'),
+    ("%Y-%m-%d %H:%M", 'minute'),
+    ("%Y-%m-%d", 'day'),
+    ("%Y-%m", 'month'),
+    ("%Y", 'year'),
+)
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z_][A-Za-z_0-9]*|\d+(?:\.\d*)?|\.\d+")
+
+QUERY_TERM = re.compile(r"""
+    (?P<key>type|since|until|result)\s*(?P<op>:|>=|<=|>|<|=)\s*(?P<value>"[^"]*"|\S+)
+  | (?P<word>"[^"]*"|\S+)
+""", re.VERBOSE)
+
+
+def numeric_result(result):
+    """Return a history result as a float, or None when it is not numeric"""
+    if isinstance(result, (int, float, Decimal, Fraction)):
+        try:
+            value = float(result)
+        except OverflowError:
+            # Integers beyond float range, such as large factorials
+            return math.inf if result > 0 else -math.inf
+    else:
+        try:
+            # Conversion results carry their unit after the number
+            value = float(str(result).split(' ', 1)[0])
+        except (ValueError, OverflowError):
+            return None
+    return None if value != value else value
+
+
+def expression_tokens(expression):
+    """Return the distinct lowercase tokens of an expression"""
+    return set(TOKEN_PATTERN.findall(expression.lower()))
+
+
+def _next_up(value):
+    """Smallest float greater than value, for exclusive lower bounds"""
+    if hasattr(math, 'nextafter'):
+        return math.nextafter(value, math.inf)
+    return value + abs(value) * 2.2e-16 + 5e-324
+
+
+def _next_down(value):
+    """Largest float smaller than value, for exclusive upper bounds"""
+    if hasattr(math, 'nextafter'):
+        return math.nextafter(value, -math.inf)
+    return value - abs(value) * 2.2e-16 - 5e-324
+
+
+def _contains(sorted_positions, position):
+    index = bisect_left(sorted_positions, position)
+    return index < len(sorted_positions) and sorted_positions[index] == position
+
+
+def _period_end(start, period):
+    """Return the first moment after the period that begins at start"""
+    if period == 'second':
+        return start + datetime.timedelta(seconds=1)
+    if period == 'minute':
+        return start + datetime.timedelta(minutes=1)
+    if period == 'day':
+        return start + datetime.timedelta(days=1)
+    if period == 'month':
+        return start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    return start.replace(year=start.year + 1)
+
+
+def time_bound(value, end=False):
+    """Return epoch seconds for a since/until bound
+
+    Text and dates cover their whole period, so with end=True the bound is
+    the first moment after it: until='2025-03' includes all of March.
+    """
+    if isinstance(value, (int, float)):
+        return _next_up(float(value)) if end else float(value)
+    if isinstance(value, datetime.datetime):
+        return _next_up(value.timestamp()) if end else value.timestamp()
+    if isinstance(value, datetime.date):
+        start, period = datetime.datetime(value.year, value.month, value.day), 'day'
+    else:
+        text = str(value).strip().replace('T', ' ')
+        for time_format, period in TIME_FORMATS:
+            try:
+                start = datetime.datetime.strptime(text, time_format)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"Invalid date: {text}")
+    return (_period_end(start, period) if end else start).timestamp()
+
+
+class HistoryIndex:
+    def __init__(self, records=()):
+        self.clear()
+        self.extend(records)
+
+    def clear(self):
+        """Drop every indexed entry"""
+        self.entries = []
+        self._timestamps = array('d')
+        self._timestamps_sorted = True
+        self._by_type = {}
+        self._type_column = bytearray()
+        self._by_token = {}
+        self._value_column = array('d')
+        self._values = []
+        self._value_positions = []
+        self._expressions = []
+
+    def _index(self, record):
+        """Index everything but the sorted result values; return (position, value)"""
+        position = len(self.entries)
+        self.entries.append(record)
+
+        timestamp = record.timestamp
+        if self._timestamps and timestamp < self._timestamps[-1]:
+            self._timestamps_sorted = False
+        self._timestamps.append(timestamp)
+
+        entry_type = record.type
+        positions = self._by_type.get(entry_type)
+        if positions is None:
+            positions = self._by_type[entry_type] = []
+        positions.append(position)
+        self._type_column.append(record.kind)
+
+        expression = record.expression
+        self._expressions.append(expression.lower())
+        by_token = self._by_token
+        for token in expression_tokens(expression):
+            positions = by_token.get(token)
+            if positions is None:
+                by_token[token] = [position]
+            else:
+                positions.append(position)
+
+        value = numeric_result(record.result)
+        self._value_column.append(math.nan if value is None else value)
+        return position, value
+
+    def add(self, record):
+        """Index one history record appended after the existing ones"""
+        position, value = self._index(record)
+        if value is not None:
+            index = bisect_right(self._values, value)
+            self._values.insert(index, value)
+            self._value_positions.insert(index, position)
+
+    def extend(self, records):
+        """Index many records, sorting the result values once at the end"""
+        pairs = [(value, position) for position, value in map(self._index, records)
+                 if value is not None]
+        if not pairs:
+            return
+        pairs.extend(zip(self._values, self._value_positions))
+        pairs.sort()
+        self._values = [value for value, _ in pairs]
+        self._value_positions = [position for _, position in pairs]
+
+    def rebuild(self, records):
+        """Re-index a complete history"""
+        self.clear()
+        self.extend(records)
+
+    def __len__(self):
+        return len(self.entries)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _time_range(self, start, end):
+        """Return the position range covered by a timestamp window"""
+        if not self._timestamps_sorted:
+            return None
+        lo = 0 if start is None else bisect_left(self._timestamps, start)
+        hi = len(self._timestamps) if end is None else bisect_left(self._timestamps, end)
+        return lo, hi
+
+    def query(self, entry_type=None, since=None, until=None, min_result=None,
+              max_result=None, token=None, text=None, limit=None):
+        """Return matching records, oldest first
+
+        entry_type: 'calculation' or 'conversion'
+        since/until: datetime, epoch seconds or text such as '2025-03' or
+                     '2025-03-14 09:30', both inclusive
+        min_result/max_result: numeric result bounds, both inclusive
+        token: whole expression token such as 'sin' or '42'
+        text: case-insensitive expression substring, or a list of substrings
+              that must all be present
+        limit: keep only the newest matches
+        """
+        lo, hi = 0, len(self.entries)
+        time_scan = False
+        if since is not None or until is not None:
+            start = None if since is None else time_bound(since)
+            end = None if until is None else time_bound(until, end=True)
+            time_range = self._time_range(start, end)
+            if time_range is None:
+                time_scan = True
+            else:
+                lo, hi = time_range
+
+        has_values = min_result is not None or max_result is not None
+        low_value = -math.inf if min_result is None else min_result
+        high_value = math.inf if max_result is None else max_result
+
+        # Pick the most selective index to produce candidates
+        drivers = []
+        if entry_type is not None:
+            drivers.append((len(self._by_type.get(entry_type, ())), 'type'))
+        if token is not None:
+            token = token.lower()
+            drivers.append((len(self._by_token.get(token, ())), 'token'))
+        if has_values:
+            first = bisect_left(self._values, low_value)
+            stop = bisect_right(self._values, high_value)
+            drivers.append((stop - first, 'value'))
+        if drivers and hi - lo < min(drivers)[0]:
+            # The time window alone is narrower than any index list
+            drivers = []
+        driver = min(drivers)[1] if drivers else None
+
+        if driver == 'type':
+            candidates = self._by_type.get(entry_type, [])
+        elif driver == 'token':
+            candidates = self._by_token.get(token, [])
+        elif driver == 'value':
+            candidates = sorted(self._value_positions[first:stop])
+        else:
+            candidates = range(lo, hi)
+
+        # Check the remaining filters against per-position columns
+        if driver is not None and (lo > 0 or hi < len(self.entries)):
+            candidates = candidates[bisect_left(candidates, lo):bisect_left(candidates, hi)]
+        if entry_type is not None and driver != 'type':
+            code = KINDS.get(entry_type)
+            types = self._type_column
+            candidates = [p for p in candidates if types[p] == code]
+        if has_values and driver != 'value':
+            values = self._value_column
+            candidates = [p for p in candidates if low_value <= values[p] <= high_value]
+        if token is not None and driver != 'token':
+            positions = self._by_token.get(token, [])
+            if len(candidates) * 16 < len(positions):
+                # Few candidates: probe the posting list instead of building a set
+                candidates = [p for p in candidates if _contains(positions, p)]
+            else:
+                members = set(positions)
+                candidates = [p for p in candidates if p in members]
+        if time_scan:
+            timestamps = self._timestamps
+            candidates = [p for p in candidates
+                          if (start is None or timestamps[p] >= start)
+                          and (end is None or timestamps[p] < end)]
+
+        if text:
+            expressions = self._expressions
+            for needle in ([text] if isinstance(text, str) else text):
+                needle = needle.lower()
+                if isinstance(candidates, range):
+                    # Unfiltered: scan the expression column directly
+                    candidates = [p for p, expression in
+                                  enumerate(expressions[candidates.start:candidates.stop],
+                                            candidates.start)
+                                  if needle in expression]
+                else:
+                    candidates = [p for p in candidates if needle in expressions[p]]
+
+        if limit is not None:
+            candidates = candidates[-limit:] if limit > 0 else []
+        entries = self.entries
+        return [entries[p] for p in candidates]
+
+    def search(self, query_text, limit=None):
+        """Run a query written as text, e.g. 'sin type:calculation result>10'
+
+        Recognised filters are type:, since:, until: and result with
+        >, >=, <, <= or =; every other word must appear in the expression.
+        """
+        return self.query(limit=limit, **parse_query(query_text))
+
+
+def parse_query(query_text):
+    """Turn search-box text into keyword arguments for HistoryIndex.query"""
+    filters = {}
+    words = []
+    for match in QUERY_TERM.finditer(query_text):
+        if match.group('word') is not None:
+            words.append(match.group('word').strip('"'))
+            continue
+        key, op, value = match.group('key'), match.group('op'), match.group('value').strip('"')
+        if key == 'type':
+            filters['entry_type'] = value.lower()
+        elif key in ('since', 'until'):
+            filters[key] = value
+        else:
+            number = float(value)
+            if op == '>':
+                filters['min_result'] = _next_up(number)
+            elif op == '<':
+                filters['max_result'] = _next_down(number)
+            else:
+                if op in ('>=', '=', ':'):
+                    filters['min_result'] = number
+                if op in ('<=', '=', ':'):
+                    filters['max_result'] = number
+    if words:
+        filters['text'] = words
+    return filters
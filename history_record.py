@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+History Record for Advanced Calculator Pro
+Compact history entries: a __slots__ object holding the timestamp as epoch
+seconds, the entry kind as a small integer code and the result as a native
+number plus an optional unit. Text is produced only for display and export.
+"""
+
+import math
+import time
+from decimal import Decimal, localcontext
+from fractions import Fraction
+
+from combinatorics import EXACT_DIGITS, ResultTooLarge, int_digits
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Entry kinds, stored as small integer codes
+CALCULATION = 0
+CONVERSION = 1
+KIND_NAMES = ('calculation', 'conversion')
+KINDS = {name: code for code, name in enumerate(KIND_NAMES)}
+
+# Exact result types from the numeric modes, stored as text plus a type name
+NUMBER_TYPES = {'decimal': Decimal, 'fraction': Fraction}
+
+# Ints of up to this many bits have at most EXACT_DIGITS digits
+_TEXT_BITS = int(EXACT_DIGITS / math.log10(2))
+
+
+def format_timestamp(timestamp):
+    """Format epoch seconds as local time text"""
+    return time.strftime(TIMESTAMP_FORMAT, time.localtime(timestamp))
+
+
+def parse_timestamp(text):
+    """Parse local time text back into epoch seconds"""
+    return time.mktime(time.strptime(text, TIMESTAMP_FORMAT))
+
+
+def parse_number(text):
+    """Return text as an int, float or complex, or unchanged when it is not a number"""
+    for number_type in (int, float, complex):
+        try:
+            return number_type(text)
+        except ValueError:
+            continue
+    return text
+
+
+def encode_number(value):
+    """Return (JSON value, number type name or None) for a result"""
+    if isinstance(value, (int, float)):
+        return value, None
+    if isinstance(value, Decimal):
+        return str(value), 'decimal'
+    if isinstance(value, Fraction):
+        return str(value), 'fraction'
+    return str(value), None
+
+
+def decode_number(value, number_type=None):
+    """Reverse encode_number"""
+    if number_type is not None:
+        return NUMBER_TYPES[number_type](value)
+    if isinstance(value, str):
+        return parse_number(value)
+    return value
+
+
+def check_result(result):
+    """Refuse an exact result with more digits than Python turns into text
+
+    Beyond combinatorics.EXACT_DIGITS, str() and json.dumps() of an int
+    raise, so such a result could be neither shown nor saved.
+    """
+    if isinstance(result, int):
+        parts = (result,)
+    elif isinstance(result, Fraction):
+        parts = (result.numerator, result.denominator)
+    else:
+        return
+    for part in parts:
+        # Cheap test first: fewer bits than this always means few enough digits
+        if part.bit_length() > _TEXT_BITS:
+            digits = int_digits(part)
+            if digits > EXACT_DIGITS:
+                raise ResultTooLarge(f"Result has {digits:,} digits, too many to record",
+                                     digits)
+
+
+def format_fixed(value, digits=4):
+    """Format a number with a fixed number of decimals, Fractions included"""
+    if isinstance(value, Fraction):
+        # Fraction has no __format__ before Python 3.12
+        with localcontext() as ctx:
+            ctx.prec = max(28, len(str(value.numerator)) + digits)
+            value = Decimal(value.numerator) / value.denominator
+    return f"{value:.{digits}f}"
+
+
+def format_entry(record):
+    """Render one history record as its display text"""
+    return (f"[{record.type.upper()}] {record.formatted_timestamp()}\n"
+            f"{record.expression} = {record.formatted_result()}\n\n")
+
+
+class HistoryRecord:
+    __slots__ = ('timestamp', 'kind', 'expression', 'result', 'unit', 'rates')
+
+    def __init__(self, expression, result, kind=CALCULATION, timestamp=None, unit=None,
+                 rates=None):
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.kind = kind
+        self.expression = expression
+        self.result = result
+        self.unit = unit
+        # Version of the currency rate snapshot a conversion used
+        self.rates = rates
+
+    @property
+    def type(self):
+        """Kind name: 'calculation' or 'conversion'"""
+        return KIND_NAMES[self.kind]
+
+    def formatted_timestamp(self):
+        return format_timestamp(self.timestamp)
+
+    def formatted_result(self):
+        """Return the result as display text"""
+        if self.unit is not None:
+            return f"{format_fixed(self.result)} {self.unit}"
+        return str(self.result)
+
+    def to_dict(self):
+        """Return a JSON-ready dict with native values"""
+        result, number_type = encode_number(self.result)
+        data = {
+            'timestamp': self.timestamp,
+            'type': KIND_NAMES[self.kind],
+            'expression': self.expression,
+            'result': result
+        }
+        if number_type is not None:
+            data['number'] = number_type
+        if self.unit is not None:
+            data['unit'] = self.unit
+        if self.rates is not None:
+            data['rates'] = self.rates
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a record from to_dict output or a legacy all-strings entry"""
+        kind = KINDS.get(data.get('type', 'calculation'), CALCULATION)
+        timestamp = data.get('timestamp')
+        if isinstance(timestamp, str):
+            timestamp = parse_timestamp(timestamp)
+        result = data.get('result')
+        unit = data.get('unit')
+        number_type = NUMBER_TYPES.get(data.get('number'))
+        if number_type is not None:
+            result = number_type(result)
+        elif isinstance(result, str):
+            if kind == CONVERSION and unit is None and ' ' in result:
+                # Legacy conversions stored "16.4042 ft"
+                number, unit = result.split(' ', 1)
+                result = parse_number(number)
+                if isinstance(result, str):
+                    result, unit = data['result'], None
+            else:
+                result = parse_number(result)
+        return cls(data.get('expression', ''), result, kind, timestamp, unit, data.get('rates'))
+
+    def __eq__(self, other):
+        if not isinstance(other, HistoryRecord):
+            return NotImplemented
+        return (self.timestamp == other.timestamp and self.kind == other.kind
+                and self.expression == other.expression
+                and self.result == other.result and self.unit == other.unit
+                and self.rates == other.rates)
+
+    def __repr__(self):
+        return (f"HistoryRecord({self.expression!r}, {self.result!r}, "
+                f"{KIND_NAMES[self.kind]}, {self.formatted_timestamp()}"
+                f"{', ' + self.unit if self.unit is not None else ''})")
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+History Store for Advanced Calculator Pro
+Append-only JSON lines log of calculator history. Each event costs one
+appended line, whatever the size of the history; fsync calls are batched,
+and clearing the history appends a marker that compaction later removes.
+"""
+
+import json
+import mmap
+import os
+import time
+
+HISTORY_LOG_FILE = 'calculator_history.jsonl'
+
+# A line containing only this record discards everything logged before it
+CLEAR_MARKER = b'{"op": "clear"}\n'
+
+
+class HistoryLog:
+    def __init__(self, path=HISTORY_LOG_FILE, fsync_every=32, fsync_interval=2.0,
+                 compact_ratio=0.5, compact_min_bytes=64 * 1024):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self._file = None
+        self._live_offset = 0
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Opening and recovery
+    # ------------------------------------------------------------------
+
+    def open(self):
+        """Open the log for appending, recovering from an interrupted write"""
+        if self._file is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'ab')
+        self._recover()
+        if self._should_compact():
+            self.compact()
+
+    def _recover(self):
+        """Drop a torn last line and locate the start of the live records"""
+        size = self._file.seek(0, os.SEEK_END)
+        self._live_offset = 0
+        if size == 0:
+            return
+        with open(self.path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            # A crash mid-write can leave a partial record after the last newline
+            end = view.rfind(b'\n') + 1
+            marker = view.rfind(b'\n' + CLEAR_MARKER, 0, end)
+            if marker >= 0:
+                self._live_offset = marker + 1 + len(CLEAR_MARKER)
+            elif view[:len(CLEAR_MARKER)] == CLEAR_MARKER:
+                self._live_offset = len(CLEAR_MARKER)
+        if end != size:
+            self._file.truncate(end)
+            self._file.seek(end)
+
+    def _should_compact(self):
+        size = self._file.tell()
+        dead = self._live_offset
+        return dead >= self.compact_min_bytes and dead >= size * self.compact_ratio
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, entry):
+        """Append one history record
+
+        The record reaches the OS at once. It is fsynced with the batch:
+        after fsync_every records, or by the first append fsync_interval
+        seconds after the last fsync. Until then, or close(), a system crash
+        can lose it.
+        """
+        self.open()
+        self._file.write(json.dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n')
+        # Hand every record to the OS right away; only fsync is batched
+        self._file.flush()
+        self._pending += 1
+        if (self._pending >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval):
+            self.sync()
+
+    def extend(self, entries):
+        """Append many records with a single flush"""
+        self.open()
+        dumps = json.dumps
+        write = self._file.write
+        for entry in entries:
+            write(dumps(entry, ensure_ascii=False).encode('utf-8') + b'\n')
+            self._pending += 1
+        self.sync()
+
+    def sync(self):
+        """Flush buffered records and fsync them to disk"""
+        if self._file is None:
+            return
+        self._file.flush()
+        if self._pending:
+            os.fsync(self._file.fileno())
+            self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def clear(self):
+        """Discard all records by appending a clear marker"""
+        self.open()
+        self._file.write(CLEAR_MARKER)
+        self._pending += 1
+        self.sync()
+        self._live_offset = self._file.tell()
+        if self._should_compact():
+            self.compact()
+
+    def compact(self):
+        """Rewrite the log with only the live records"""
+        self.sync()
+        temp_path = self.path + '.tmp'
+        with open(self.path, 'rb') as source, open(temp_path, 'wb') as target:
+            source.seek(self._live_offset)
+            while True:
+                chunk = source.read(1024 * 1024)
+                if not chunk:
+                    break
+                target.write(chunk)
+            target.flush()
+            os.fsync(target.fileno())
+        self._file.close()
+        os.replace(temp_path, self.path)
+        self._file = open(self.path, 'ab')
+        self._live_offset = 0
+
+    def close(self):
+        """Sync and close the log"""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def __iter__(self):
+        """Stream the live records back one at a time"""
+        if self._file is not None:
+            self._file.flush()
+        elif not os.path.exists(self.path):
+            return
+        else:
+            self.open()
+        loads = json.loads
+        with open(self.path, 'rb') as f:
+            f.seek(self._live_offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                if line == CLEAR_MARKER:
+                    continue
+                try:
+                    yield loads(line)
+                except ValueError:
+                    continue
+
+    def iter_batches(self, batch_bytes=1024 * 1024):
+        """Stream the live records in batches, up to the current end of the log
+
+        Yields (records, done, total): a list of decoded records and how many
+        of the total bytes have been read. Records appended after the call
+        are not included, so a long read sees a consistent snapshot.
+        """
+        if self._file is not None:
+            self._file.flush()
+        elif not os.path.exists(self.path):
+            return
+        else:
+            self.open()
+        start = self._live_offset
+        loads = json.loads
+        with open(self.path, 'rb') as f:
+            end = f.seek(0, os.SEEK_END)
+            total = end - start
+            offset = f.seek(start)
+            while offset < end:
+                lines = f.readlines(min(batch_bytes, end - offset))
+                if not lines:
+                    break
+                complete = []
+                for line in lines:
+                    offset += len(line)
+                    if offset > end or not line.endswith(b'\n'):
+                        break
+                    if line != CLEAR_MARKER:
+                        complete.append(line)
+                try:
+                    # One decoder call for the whole batch
+                    records = loads(b'[' + b','.join(complete) + b']')
+                except ValueError:
+                    records = []
+                    for line in complete:
+                        try:
+                            records.append(loads(line))
+                        except ValueError:
+                            continue
+                yield records, min(offset, end) - start, total
+
+    def size(self):
+        """Return the size of the log file in bytes"""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+
+def migrate_legacy_history(json_path, log):
+    """Import a legacy calculator_history.json list into an empty log
+
+    The legacy file is renamed afterwards so it is imported only once.
+    """
+    if not os.path.exists(json_path) or log.size() > 0:
+        return 0
+    try:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except Exception as e:
+        print(f"Error reading legacy history: {e}")
+        return 0
+    log.extend(entries)
+    os.replace(json_path, json_path + '.bak')
+    return len(entries)
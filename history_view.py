@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+History View for Advanced Calculator Pro
+Virtualized history widget: only the entries that fit in the visible window
+are ever inserted into the Text widget, so scrolling through tens of
+thousands of entries costs the same as showing a handful. New entries are
+rendered incrementally by inserting one entry at the top and trimming the
+entry that falls off the bottom.
+"""
+
+import tkinter as tk
+from tkinter import ttk, font as tkfont
+
+from history_record import format_entry
+
+# Every rendered entry takes exactly this many text lines
+ENTRY_LINES = 3
+
+
+class HistoryView:
+    def __init__(self, parent, source=None, height=15, width=50, font=('Courier', 9)):
+        # Entries are a sequence, oldest first; the view shows newest first
+        self.source = source if source is not None else []
+        self.first = 0
+        self.page_size = max(1, height // ENTRY_LINES + 1)
+        self._rendered = 0
+        self._line_height = tkfont.Font(font=font).metrics('linespace')
+
+        self.frame = ttk.Frame(parent)
+        self.text = tk.Text(self.frame, height=height, width=width, font=font,
+                            wrap='none', state='disabled')
+        self.text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.frame.rowconfigure(0, weight=1)
+        self.frame.columnconfigure(0, weight=1)
+
+        self.text.bind('<Configure>', self._on_resize)
+        self.text.bind('<MouseWheel>', self._on_mousewheel)
+        self.text.bind('<Button-4>', lambda event: self.scroll(-1))
+        self.text.bind('<Button-5>', lambda event: self.scroll(1))
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+
+    def _entry(self, offset):
+        """Return the entry `offset` positions back from the newest"""
+        return self.source[len(self.source) - 1 - offset]
+
+    def render(self):
+        """Redraw the visible window from scratch"""
+        total = len(self.source)
+        self.first = max(0, min(self.first, total - self.page_size))
+        end = min(total, self.first + self.page_size)
+        text = "".join(format_entry(self._entry(i)) for i in range(self.first, end))
+
+        self.text.configure(state='normal')
+        self.text.delete('1.0', tk.END)
+        self.text.insert('1.0', text)
+        self.text.configure(state='disabled')
+        self._rendered = end - self.first
+        self._update_scrollbar()
+
+    def set_source(self, source):
+        """Show a different sequence of entries, starting from the newest"""
+        self.source = source
+        self.first = 0
+        self.render()
+
+    def entry_added(self):
+        """Render a newly appended entry without redrawing the window"""
+        if self.first > 0:
+            # Scrolled back: keep the same entries in view
+            self.first += 1
+            self._update_scrollbar()
+            return
+
+        self.text.configure(state='normal')
+        self.text.insert('1.0', format_entry(self._entry(0)))
+        if self._rendered >= self.page_size:
+            # Trim the entry that overflowed the bottom of the window
+            self.text.delete(f"{self.page_size * ENTRY_LINES + 1}.0", tk.END)
+        else:
+            self._rendered += 1
+        self.text.configure(state='disabled')
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.source)
+        if total <= self.page_size:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.first / total, (self.first + self._rendered) / total)
+
+    # ------------------------------------------------------------------
+    # Scrolling
+    # ------------------------------------------------------------------
+
+    def scroll(self, entries):
+        """Move the window by a number of entries"""
+        first = max(0, min(self.first + entries, len(self.source) - self.page_size))
+        if first != self.first:
+            self.first = first
+            self.render()
+        return 'break'
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            first = int(float(amount) * len(self.source))
+            self.scroll(first - self.first)
+        elif action == 'scroll':
+            step = self.page_size if unit == 'pages' else 1
+            self.scroll(int(amount) * step)
+
+    def _on_mousewheel(self, event):
+        return self.scroll(-1 if event.delta > 0 else 1)
+
+    def _on_resize(self, event):
+        page_size = max(1, event.height // max(1, self._line_height) // ENTRY_LINES + 1)
+        if page_size != self.page_size:
+            self.page_size = page_size
+            self.render()
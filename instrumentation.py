@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instrumentation for Advanced Calculator Pro
+Latency histograms for the hot paths: parse, evaluate, history save, stats
+save, history redraw and conversion. Recording is off by default and the
+instrumented code only checks the enabled flag, so it costs next to nothing
+until it is switched on in the Performance dialog or with
+CALCULATOR_INSTRUMENT=1. Setting CALCULATOR_INSTRUMENT to a file name
+instead also writes the histograms there as JSON when the calculator closes.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+
+INSTRUMENT_ENV = 'CALCULATOR_INSTRUMENT'
+
+# Stages recorded by the calculator, in the order they are shown
+STAGES = ('parse', 'evaluate', 'history_save', 'stats_save', 'history_redraw', 'conversion')
+
+# Buckets start at 1 microsecond and grow by 2**(1/4), about 19%, each,
+# up to 2**40 microseconds; anything outside lands in the first or last
+BUCKET_ORIGIN = 1e-6
+BUCKETS_PER_DOUBLING = 4
+BUCKET_COUNT = 40 * BUCKETS_PER_DOUBLING
+
+
+def bucket_bound(index):
+    """Return the upper bound, in seconds, of a bucket"""
+    return BUCKET_ORIGIN * 2 ** ((index + 1) / BUCKETS_PER_DOUBLING)
+
+
+def format_seconds(seconds):
+    """Format a latency for display, or '-' when there is none"""
+    if seconds is None:
+        return "-"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.3f} s"
+
+
+class LatencyHistogram:
+    """Counts of latencies in logarithmic buckets, plus exact count, total, min and max"""
+
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * BUCKET_COUNT
+
+    def add(self, seconds):
+        if seconds > BUCKET_ORIGIN:
+            index = min(BUCKET_COUNT - 1,
+                        int(math.log2(seconds / BUCKET_ORIGIN) * BUCKETS_PER_DOUBLING))
+        else:
+            index = 0
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """Return the latency below which a fraction q of samples fall, to within a bucket"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min(max(bucket_bound(index), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(0.50),
+            'p90': self.percentile(0.90),
+            'p99': self.percentile(0.99),
+            # [upper bound in seconds, count] for every non-empty bucket
+            'buckets': [[bucket_bound(index), count]
+                        for index, count in enumerate(self.buckets) if count]
+        }
+
+
+class Instrumentation:
+    """Latency histograms by stage, shared by the threads that record them
+
+    Hot paths test `enabled` before reading the clock, and call record()
+    only when it is set.
+    """
+
+    def __init__(self, enabled=False, dump_path=None):
+        self.enabled = enabled
+        # Where close-time histograms go, if anywhere
+        self.dump_path = dump_path
+        self.started = time.time()
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls):
+        """Instrumentation switched on by CALCULATOR_INSTRUMENT, if set"""
+        setting = os.environ.get(INSTRUMENT_ENV, '')
+        if not setting or setting == '0':
+            return cls()
+        return cls(True, None if setting == '1' else setting)
+
+    def record(self, stage, seconds):
+        """Add one latency, in seconds, to a stage's histogram"""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = LatencyHistogram()
+            histogram.add(seconds)
+
+    def reset(self):
+        """Forget every recorded latency"""
+        with self._lock:
+            self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+            self.started = time.time()
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'started': self.started,
+                'dumped': time.time(),
+                'stages': {stage: histogram.as_dict()
+                           for stage, histogram in self.histograms.items()}
+            }
+
+    def dump(self, path):
+        """Write the histograms to a JSON file"""
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2)
+        os.replace(temp_path, path)
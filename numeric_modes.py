@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Numeric Modes for Advanced Calculator Pro
+Float, Decimal and Fraction arithmetic for the expression engine. A mode
+decides how number literals are read, which implementations of the
+scientific functions and constants an expression sees, and the context
+it is evaluated in. Decimal functions are computed natively at the
+configured precision; float mode is the plain float path, unwrapped.
+"""
+
+import math
+from contextlib import nullcontext
+from decimal import Decimal, Context, localcontext
+from fractions import Fraction
+
+import combinatorics
+from expression_engine import FUNCTIONS, CONSTANTS
+
+MODE_NAMES = ('float', 'decimal', 'fraction')
+DEFAULT_PRECISION = 28
+
+# Extra digits carried through series computations before the final rounding
+GUARD_DIGITS = 5
+
+
+def parse_float_literal(text):
+    """Read a literal the way the parser does: int unless it has '.' or an exponent"""
+    if '.' in text or 'e' in text or 'E' in text:
+        return float(text)
+    return int(text)
+
+
+# ---------------------------------------------------------------------------
+# Decimal implementations of the scientific functions
+# ---------------------------------------------------------------------------
+
+def to_decimal(value):
+    """Convert a number to Decimal without going through binary float noise"""
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    if isinstance(value, Fraction):
+        return Decimal(value.numerator) / value.denominator
+    return Decimal(value)
+
+
+def decimal_pi():
+    """Compute pi at the current context precision"""
+    with localcontext() as ctx:
+        ctx.prec += GUARD_DIGITS
+        three = Decimal(3)
+        last, t, total, n, na, d, da = 0, three, three, 1, 0, 0, 24
+        while total != last:
+            last = total
+            n, na = n + na, na + 8
+            d, da = d + da, da + 32
+            t = (t * n) / d
+            total += t
+    return +total
+
+
+def _with_guard_digits(compute):
+    """Run compute(x) with extra precision and round the result to the context"""
+    def function(x):
+        x = to_decimal(x)
+        with localcontext() as ctx:
+            ctx.prec += GUARD_DIGITS
+            result = compute(x)
+        return +result
+    function.__name__ = compute.__name__.lstrip('_')
+    return function
+
+
+def _reduce_angle(x):
+    """Bring an angle into [-pi, pi] so the series converge quickly"""
+    pi = decimal_pi()
+    if abs(x) > pi:
+        x = x.remainder_near(2 * pi)
+    return x
+
+
+def _sin(x):
+    x = _reduce_angle(x)
+    term = total = x
+    square = x * x
+    i = 1
+    while True:
+        i += 2
+        term = -term * square / (i * (i - 1))
+        new_total = total + term
+        if new_total == total:
+            return total
+        total = new_total
+
+
+def _cos(x):
+    x = _reduce_angle(x)
+    term = total = Decimal(1)
+    square = x * x
+    i = 0
+    while True:
+        i += 2
+        term = -term * square / (i * (i - 1))
+        new_total = total + term
+        if new_total == total:
+            return total
+        total = new_total
+
+
+def _tan(x):
+    return _sin(x) / _cos(x)
+
+
+def _atan(x):
+    if x < 0:
+        return -_atan(-x)
+    if x > 1:
+        return decimal_pi() / 2 - _atan(1 / x)
+    # Halve the angle until the Taylor series converges fast
+    halvings = 0
+    while x > Decimal('0.1'):
+        x = x / (1 + (1 + x * x).sqrt())
+        halvings += 1
+    term = total = x
+    square = x * x
+    i = 1
+    while True:
+        term = -term * square
+        i += 2
+        new_total = total + term / i
+        if new_total == total:
+            break
+        total = new_total
+    return total * (2 ** halvings)
+
+
+def _asin(x):
+    if abs(x) > 1:
+        raise ValueError("math domain error")
+    if abs(x) == 1:
+        return decimal_pi() / 2 * x
+    return _atan(x / (1 - x * x).sqrt())
+
+
+def _acos(x):
+    return decimal_pi() / 2 - _asin(x)
+
+
+def decimal_log(x, base=None):
+    """Natural logarithm, or logarithm to base, like math.log"""
+    x = to_decimal(x)
+    if base is None:
+        return x.ln()
+    with localcontext() as ctx:
+        ctx.prec += GUARD_DIGITS
+        result = x.ln() / to_decimal(base).ln()
+    return +result
+
+
+DECIMAL_FUNCTIONS = {
+    'sin': _with_guard_digits(_sin),
+    'cos': _with_guard_digits(_cos),
+    'tan': _with_guard_digits(_tan),
+    'asin': _with_guard_digits(_asin),
+    'acos': _with_guard_digits(_acos),
+    'atan': _with_guard_digits(_atan),
+    'log': decimal_log,
+    'log10': lambda x: to_decimal(x).log10(),
+    'sqrt': lambda x: to_decimal(x).sqrt(),
+    'pow': lambda x, y: to_decimal(x) ** to_decimal(y),
+    'abs': abs,
+    'fact': combinatorics.factorial,
+    'comb': combinatorics.comb,
+    'perm': combinatorics.perm,
+    'gamma': lambda x: to_decimal(combinatorics.gamma(x)),
+    'lgamma': lambda x: to_decimal(combinatorics.lgamma(x))
+}
+
+
+# ---------------------------------------------------------------------------
+# Fraction implementations: exact where the result is rational
+# ---------------------------------------------------------------------------
+
+def _isqrt(n):
+    if hasattr(math, 'isqrt'):
+        return math.isqrt(n)
+    # Newton's method for Python 3.7
+    if n < 2:
+        return n
+    x = 1 << ((n.bit_length() + 1) // 2)
+    while True:
+        y = (x + n // x) // 2
+        if y >= x:
+            return x
+        x = y
+
+
+def fraction_sqrt(x):
+    """Exact square root of a perfect-square rational, float otherwise"""
+    x = Fraction(x)
+    if x >= 0:
+        numerator = _isqrt(x.numerator)
+        denominator = _isqrt(x.denominator)
+        if numerator * numerator == x.numerator and denominator * denominator == x.denominator:
+            return Fraction(numerator, denominator)
+    return math.sqrt(x)
+
+
+def fraction_pow(x, y):
+    """Exact power for integral exponents, float otherwise"""
+    if isinstance(y, int) or (isinstance(y, Fraction) and y.denominator == 1):
+        return Fraction(x) ** int(y)
+    return float(x) ** float(y)
+
+
+FRACTION_FUNCTIONS = dict(FUNCTIONS, sqrt=fraction_sqrt, pow=fraction_pow)
+
+
+# ---------------------------------------------------------------------------
+# Modes
+# ---------------------------------------------------------------------------
+
+class FloatMode:
+    """Binary floating point, the original and fastest mode"""
+
+    name = 'float'
+    exact = False
+    precision = None
+    # Functions slow enough to be worth a FunctionCache lookup. math is
+    # C-fast, combinatorics caches its exact work itself, and hashing
+    # Fraction arguments costs more than the fraction functions save
+    memoized = frozenset()
+
+    def __init__(self):
+        self.functions = dict(FUNCTIONS)
+        self.constants = dict(CONSTANTS)
+        # None keeps the literal values the parser already produced
+        self.literal = None
+
+    def number(self, text):
+        """Read user input as a number of this mode"""
+        return parse_float_literal(str(text).strip())
+
+    def from_number(self, value):
+        """Convert a plain int or float into this mode"""
+        return value
+
+    def context(self):
+        return nullcontext()
+
+    def wrap(self, function):
+        return function
+
+
+class DecimalMode(FloatMode):
+    """Decimal arithmetic rounded to a fixed number of significant digits"""
+
+    name = 'decimal'
+    exact = True
+    # The series and Decimal methods behind these are computed digit by digit
+    memoized = frozenset(DECIMAL_FUNCTIONS) - {'abs', 'fact', 'comb', 'perm'}
+
+    def __init__(self, precision=DEFAULT_PRECISION):
+        self.precision = precision
+        self.decimal_context = Context(prec=precision)
+        with localcontext(self.decimal_context):
+            self.constants = {'pi': decimal_pi(), 'e': Decimal(1).exp()}
+        self.functions = dict(DECIMAL_FUNCTIONS)
+        self.literal = Decimal
+
+    def number(self, text):
+        return Decimal(str(text).strip())
+
+    def from_number(self, value):
+        with localcontext(self.decimal_context):
+            return +to_decimal(value)
+
+    def context(self):
+        return localcontext(self.decimal_context)
+
+    def wrap(self, function):
+        decimal_context = self.decimal_context
+
+        def evaluate(env):
+            with localcontext(decimal_context):
+                return function(env)
+        return evaluate
+
+
+class FractionMode(FloatMode):
+    """Exact rational arithmetic; irrational functions fall back to float"""
+
+    name = 'fraction'
+    exact = True
+
+    def __init__(self):
+        super().__init__()
+        self.functions = dict(FRACTION_FUNCTIONS)
+        self.literal = Fraction
+
+    def number(self, text):
+        return Fraction(str(text).strip())
+
+    def from_number(self, value):
+        return Fraction(repr(value)) if isinstance(value, float) else Fraction(value)
+
+
+def get_mode(name, precision=None):
+    """Return a numeric mode by name: 'float', 'decimal' or 'fraction'"""
+    if name == 'float':
+        return FloatMode()
+    if name == 'decimal':
+        return DecimalMode(precision or DEFAULT_PRECISION)
+    if name == 'fraction':
+        return FractionMode()
+    raise ValueError(f"Unknown numeric mode '{name}'")
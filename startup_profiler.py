@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Startup Profiler for Advanced Calculator Pro
+Records how long each startup phase takes, from process start to the first
+frame on screen. Set CALCULATOR_PROFILE_STARTUP=1 to print the breakdown,
+or CALCULATOR_PROFILE_STARTUP=json for a machine-readable report.
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+PROFILE_ENV = 'CALCULATOR_PROFILE_STARTUP'
+
+
+class StartupProfiler:
+    def __init__(self, origin=None):
+        # Offsets are measured from origin, normally taken before the app's imports
+        self.origin = time.perf_counter() if origin is None else origin
+        self.phases = []
+        self.marks = {}
+
+    def record(self, name, start, end):
+        """Record a phase from perf_counter start and end times"""
+        self.phases.append((name, start - self.origin, end - start))
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block of startup work"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def mark(self, name):
+        """Record the moment a milestone such as the first frame is reached"""
+        self.marks[name] = time.perf_counter() - self.origin
+
+    def as_dict(self):
+        return {
+            'phases': [{'name': name, 'start': start, 'duration': duration}
+                       for name, start, duration in self.phases],
+            'marks': dict(self.marks)
+        }
+
+    def report(self):
+        """Return the breakdown as a text table"""
+        lines = [f"{'phase':<28}{'start':>10}{'duration':>12}"]
+        for name, start, duration in sorted(self.phases, key=lambda phase: phase[1]):
+            lines.append(f"{name:<28}{start * 1000:>8.1f}ms{duration * 1000:>10.1f}ms")
+        for name, offset in sorted(self.marks.items(), key=lambda item: item[1]):
+            lines.append(f"{'@ ' + name:<28}{offset * 1000:>8.1f}ms")
+        return "\n".join(lines)
+
+    def emit(self):
+        """Print the report if startup profiling was requested"""
+        mode = os.environ.get(PROFILE_ENV, '')
+        if mode == 'json':
+            print(json.dumps(self.as_dict()), file=sys.stderr)
+        elif mode:
+            print(self.report(), file=sys.stderr)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Statistics Store for Advanced Calculator Pro
+Usage counters live in memory and are written to disk by a background
+flusher: on a timer, once enough increments are pending, and at exit.
+Every write goes to a temporary file that is atomically renamed over the
+old one, so a crash can never leave a half-written statistics file.
+"""
+
+import json
+import os
+import threading
+import time
+
+STATS_FILE = 'calculator_stats.json'
+
+
+def default_statistics():
+    """Return a fresh set of usage counters"""
+    return {'calculations': 0, 'conversions': 0, 'errors': 0}
+
+
+class StatisticsStore:
+    def __init__(self, path=STATS_FILE, flush_interval=5.0, flush_threshold=50,
+                 instruments=None):
+        self.path = path
+        # Optional instrumentation.Instrumentation recording flush latency
+        self.instruments = instruments
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.counters = default_statistics()
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._pending = 0
+        self._closed = False
+        self._thread = None
+
+        # Flush metrics
+        self.flush_count = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+
+    def load(self):
+        """Load usage statistics"""
+        if self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    loaded = json.load(f)
+                with self._lock:
+                    self.counters = {**default_statistics(), **loaded}
+            except Exception:
+                with self._lock:
+                    self.counters = default_statistics()
+
+    def start(self):
+        """Start the background flusher thread"""
+        if self.path is None or self._thread is not None:
+            return
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="statistics-flusher",
+                                        daemon=True)
+        self._thread.start()
+
+    def increment(self, counter, amount=1):
+        """Increment a counter in memory; the flusher persists it later"""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+            self._pending += 1
+            if self._pending >= self.flush_threshold:
+                self._wakeup.notify()
+
+    def __getitem__(self, counter):
+        return self.counters[counter]
+
+    def get(self, counter, default=0):
+        return self.counters.get(counter, default)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._closed and self._pending < self.flush_threshold:
+                    self._wakeup.wait(self.flush_interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def flush(self):
+        """Write pending counters to disk atomically"""
+        if self.path is None:
+            return
+        with self._write_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                snapshot = dict(self.counters)
+                pending = self._pending
+                self._pending = 0
+
+            start = time.perf_counter()
+            temp_path = self.path + '.tmp'
+            try:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except Exception as e:
+                print(f"Error saving statistics: {e}")
+                with self._lock:
+                    self._pending += pending
+                return
+            latency = time.perf_counter() - start
+
+            self.flush_count += 1
+            self.last_flush_latency = latency
+            self.total_flush_latency += latency
+            if latency > self.max_flush_latency:
+                self.max_flush_latency = latency
+            if self.instruments is not None and self.instruments.enabled:
+                self.instruments.record('stats_save', latency)
+
+    def close(self):
+        """Stop the flusher and write any pending counters"""
+        thread = self._thread
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        if thread is not None:
+            thread.join()
+            self._thread = None
+        self.flush()
+
+    def metrics(self):
+        """Return flush latency and pending-write metrics"""
+        with self._lock:
+            pending = self._pending
+        return {
+            'pending_writes': pending,
+            'flush_count': self.flush_count,
+            'last_flush_latency': self.last_flush_latency,
+            'max_flush_latency': self.max_flush_latency,
+            'mean_flush_latency': (self.total_flush_latency / self.flush_count
+                                   if self.flush_count else 0.0)
+        }
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sweep for Advanced Calculator Pro
+Tabulates an expression with free variables over a range or a grid. The
+expression is compiled once and evaluated chunk by chunk: over array('d')
+columns with C-level map() calls, as whole NumPy arrays when NumPy is
+installed and the expression only uses functions NumPy has, and across
+worker processes for large sweeps (see CalculatorCore.sweep). Results
+stream to CSV or JSON lines without the whole table being held in memory.
+
+Ranges are written name=start:stop:count, e.g. "x=0:10:1000001"; several
+ranges separated by commas or semicolons form a grid whose last variable
+changes fastest. Points where the expression fails (log(0), 1/0, ...)
+give NaN.
+"""
+
+import io
+import json
+import math
+import os
+import threading
+from array import array
+
+from expression_engine import BinOp, Call, ExpressionError, Name, Number, UnaryOp
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: the stdlib path is always available
+    np = None
+
+# Points evaluated per chunk, and per task when split across workers
+SWEEP_CHUNK = 65536
+
+# Below this many points the NumPy setup cost outweighs its speed
+NUMPY_MIN_POINTS = 1024
+
+# Sweeps larger than this go to a file instead of the history
+HISTORY_LIMIT = 10000
+
+NAN = float('nan')
+
+
+class SweepRange:
+    """count evenly spaced values from start to stop, both included"""
+
+    def __init__(self, name, start, stop, count):
+        if count < 1:
+            raise ValueError(f"Range for {name} needs at least one point")
+        self.name = name
+        self.start = float(start)
+        self.stop = float(stop)
+        self.count = int(count)
+        self.step = (self.stop - self.start) / (self.count - 1) if self.count > 1 else 0.0
+
+    def value(self, index):
+        """Return the value at an index; the last one is exactly stop"""
+        if index == self.count - 1:
+            return self.stop
+        return self.start + index * self.step
+
+    def values(self, begin=0, end=None):
+        """Return the values at indices begin..end-1 as an array('d')"""
+        end = self.count if end is None else min(end, self.count)
+        column = array('d', map(float, range(begin, end)))
+        if self.step != 1.0:
+            column = array('d', map(self.step.__mul__, column))
+        if self.start:
+            column = array('d', map(self.start.__add__, column))
+        if end == self.count and end > begin:
+            column[-1] = self.stop
+        return column
+
+    def __repr__(self):
+        return f"{self.name}={self.start:g}:{self.stop:g}:{self.count}"
+
+
+def parse_ranges(text):
+    """Parse "x=0:10:101, y=-1:1:5" into a list of SweepRange"""
+    ranges = []
+    for part in text.replace(';', ',').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        name, sep, spec = part.partition('=')
+        name = name.strip()
+        fields = spec.split(':')
+        if not sep or not name.isidentifier() or len(fields) != 3:
+            raise ValueError(f"Expected name=start:stop:count, got {part!r}")
+        try:
+            start, stop, count = float(fields[0]), float(fields[1]), int(fields[2])
+        except ValueError:
+            raise ValueError(f"Expected name=start:stop:count, got {part!r}") from None
+        ranges.append(SweepRange(name, start, stop, count))
+    if not ranges:
+        raise ValueError("No sweep range given")
+    if len({r.name for r in ranges}) != len(ranges):
+        raise ValueError("A variable appears in more than one range")
+    return ranges
+
+
+class Sweep:
+    """A grid of points, addressed by flat index with the last range fastest"""
+
+    def __init__(self, ranges):
+        self.ranges = list(ranges)
+        self.names = [r.name for r in self.ranges]
+        self.size = 1
+        for r in self.ranges:
+            self.size *= r.count
+        # Consecutive flat indices that share each variable's value
+        self.strides = []
+        stride = 1
+        for r in reversed(self.ranges):
+            self.strides.insert(0, stride)
+            stride *= r.count
+
+    def columns(self, begin, end):
+        """Return one array('d') of values per variable for points begin..end-1"""
+        end = min(end, self.size)
+        if len(self.ranges) == 1:
+            return [self.ranges[0].values(begin, end)]
+        columns = []
+        for r, stride in zip(self.ranges, self.strides):
+            values = r.values()
+            count = r.count
+            columns.append(array('d', (values[(i // stride) % count]
+                                       for i in range(begin, end))))
+        return columns
+
+    def chunks(self, chunk_size=SWEEP_CHUNK):
+        """Yield (begin, end) bounds covering every point"""
+        for begin in range(0, self.size, chunk_size):
+            yield begin, min(begin + chunk_size, self.size)
+
+
+# ---------------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------------
+
+def _to_float(value):
+    """A result as a float for an array('d'), NaN when it has none (complex, too large)"""
+    try:
+        return float(value)
+    except (TypeError, ValueError, OverflowError):
+        return NAN
+
+
+def _evaluate_points(function, names, columns, number=None):
+    """Evaluate point by point, giving NaN where the expression fails
+
+    number, when given, converts each variable value first.
+    """
+    results = []
+    env = {}
+    for values in zip(*columns):
+        if number is not None:
+            values = map(number, values)
+        env.update(zip(names, values))
+        try:
+            results.append(function(env))
+        except (ArithmeticError, ValueError, TypeError):
+            results.append(NAN)
+    return results
+
+
+def evaluate_columns(compiled, names, columns, mode=None):
+    """Evaluate a compiled expression over columns of variable values
+
+    Returns an array('d') in float mode, or a list of results for the exact
+    numeric modes, whose variables are converted with mode.from_number.
+    """
+    function = compiled.evaluate
+    if mode is not None and mode.exact:
+        return _evaluate_points(function, names, columns, mode.from_number)
+    env = {}
+    if len(names) == 1:
+        name = names[0]
+
+        def point(value):
+            env[name] = value
+            return function(env)
+        results = map(point, columns[0])
+    else:
+        def point(*values):
+            env.update(zip(names, values))
+            return function(env)
+        results = map(point, *columns)
+    try:
+        return array('d', results)
+    except (ArithmeticError, ValueError, TypeError):
+        # Some point failed (or was complex); redo the chunk point by point
+        return array('d', map(_to_float, _evaluate_points(function, names, columns)))
+
+
+if np is not None:
+    NUMPY_FUNCTIONS = {
+        'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+        'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan,
+        'log': np.log, 'log10': np.log10,
+        'sqrt': np.sqrt, 'pow': np.power, 'abs': np.abs
+    }
+    NUMPY_OPERATORS = {
+        '+': np.add, '-': np.subtract, '*': np.multiply, '/': np.true_divide,
+        '//': np.floor_divide, '%': np.mod, '**': np.power
+    }
+else:
+    NUMPY_FUNCTIONS = {}
+    NUMPY_OPERATORS = {}
+
+# Where Python raises instead of returning inf: a zero divisor, and an
+# infinite power or logarithm of finite arguments (10.0**400, 0**-1, log(0))
+ZERO_DIVISOR_OPERATORS = ('/', '//', '%')
+OVERFLOW_OPERATORS = ('**',)
+OVERFLOW_FUNCTIONS = ('pow', 'log', 'log10')
+
+
+def _nan_where_zero_divisor(ufunc):
+    def divide(left, right):
+        return np.where(np.equal(right, 0), NAN, ufunc(left, right))
+    return divide
+
+
+def _nan_where_overflow(ufunc):
+    def checked(*args):
+        result = ufunc(*args)
+        overflow = np.isinf(result)
+        for arg in args:
+            overflow &= np.isfinite(arg)
+        return np.where(overflow, NAN, result)
+    return checked
+
+
+def vectorize(tree, constants):
+    """Compile a syntax tree into a function of {name: ndarray}, or None
+
+    Returns None when the expression uses something NumPy cannot evaluate
+    elementwise (fact, gamma, ...) or NumPy is not installed.
+    """
+    if np is None:
+        return None
+    if isinstance(tree, Number):
+        try:
+            value = float(tree.value)
+        except OverflowError:
+            return None
+        return lambda env: value
+    if isinstance(tree, Name):
+        if tree.id in constants:
+            value = float(constants[tree.id])
+            return lambda env: value
+        name = tree.id
+        return lambda env: env[name]
+    if isinstance(tree, UnaryOp):
+        operand = vectorize(tree.operand, constants)
+        if operand is None:
+            return None
+        return (lambda env: np.negative(operand(env))) if tree.op == '-' else operand
+    if isinstance(tree, BinOp):
+        left = vectorize(tree.left, constants)
+        right = vectorize(tree.right, constants)
+        ufunc = NUMPY_OPERATORS.get(tree.op)
+        if left is None or right is None or ufunc is None:
+            return None
+        if tree.op in ZERO_DIVISOR_OPERATORS:
+            ufunc = _nan_where_zero_divisor(ufunc)
+        elif tree.op in OVERFLOW_OPERATORS:
+            ufunc = _nan_where_overflow(ufunc)
+        return lambda env: ufunc(left(env), right(env))
+    if isinstance(tree, Call):
+        ufunc = NUMPY_FUNCTIONS.get(tree.func)
+        args = [vectorize(arg, constants) for arg in tree.args]
+        if ufunc is None or None in args or len(args) != ufunc.nin:
+            return None
+        if tree.func in OVERFLOW_FUNCTIONS:
+            ufunc = _nan_where_overflow(ufunc)
+        return lambda env: ufunc(*[arg(env) for arg in args])
+    return None
+
+
+def evaluate_numpy(vector, names, columns):
+    """Evaluate a vectorized expression over whole columns at once"""
+    env = {name: np.frombuffer(column, dtype=np.float64) for name, column in zip(names, columns)}
+    with np.errstate(all='ignore'):
+        result = vector(env)
+    result = np.broadcast_to(np.asarray(result, dtype=np.float64), (len(columns[0]),))
+    # NaN wherever the stdlib path fails, inf where it overflows without failing
+    return array('d', result.tobytes())
+
+
+def evaluate_chunk(engine, expression, sweep, begin, end, use_numpy=None):
+    """Evaluate points begin..end-1 of a sweep with an ExpressionEngine"""
+    compiled = engine.compile(expression, optimized=True)
+    missing = compiled.names - set(sweep.names)
+    if missing:
+        raise ExpressionError(f"No range given for {', '.join(sorted(missing))}")
+    columns = sweep.columns(begin, end)
+    mode = engine.mode
+    exact = mode is not None and mode.exact
+    if use_numpy is None:
+        use_numpy = np is not None and end - begin >= NUMPY_MIN_POINTS
+    elif use_numpy and np is None:
+        raise RuntimeError("NumPy is not installed")
+    if use_numpy and not exact:
+        vector = vectorize(compiled.tree, engine.constants)
+        if vector is not None:
+            return evaluate_numpy(vector, sweep.names, columns)
+    return evaluate_columns(compiled, sweep.names, columns, mode)
+
+
+# ---------------------------------------------------------------------------
+# Output
+# ---------------------------------------------------------------------------
+
+def _json_number(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    if isinstance(value, (int, float)):
+        return value
+    return str(value)
+
+
+def encode_csv(names, columns, results):
+    """Encode a chunk of points as CSV rows"""
+    # Only needed when writing, so it stays out of startup
+    import csv
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(zip(*columns, results))
+    return buffer.getvalue()
+
+
+def encode_jsonl(names, columns, results):
+    """Encode a chunk of points as JSON lines"""
+    dumps = json.dumps
+    keys = list(names) + ['result']
+    return "".join(dumps(dict(zip(keys, map(_json_number, row)))) + "\n"
+                   for row in zip(*columns, results))
+
+
+SWEEP_FORMATS = {
+    'csv': encode_csv,
+    'jsonl': encode_jsonl
+}
+
+
+def format_for_path(path):
+    """Pick a sweep output format from a file name, defaulting to CSV"""
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return extension if extension in SWEEP_FORMATS else 'csv'
+
+
+def write_sweep(names, chunks, out, fmt='csv'):
+    """Write (begin, columns, results) chunks to a text stream; returns the NaN count"""
+    encode = SWEEP_FORMATS[fmt]
+    if fmt == 'csv':
+        out.write(",".join(list(names) + ['result']) + "\n")
+    failures = 0
+    for begin, columns, results in chunks:
+        out.write(encode(names, columns, results))
+        failures += sum(1 for value in results if value != value)
+    return failures
+
+
+class SweepWriter:
+    """Writes a sweep to a file on a background thread, with progress and cancel
+
+    chunks yields (begin, columns, results) as CalculatorCore.sweep does.
+    """
+
+    def __init__(self, sweep, chunks, path, fmt=None):
+        self.sweep = sweep
+        self.chunks = chunks
+        self.path = path
+        self.format = fmt or format_for_path(path)
+
+        self.points = 0
+        self.failures = 0
+        self.progress = 0.0
+        self.done = False
+        self.cancelled = False
+        self.error = None
+        self._cancel = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Run the sweep on a background thread"""
+        self._thread = threading.Thread(target=self.run, name="sweep-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Ask the sweep to stop; the partial file is removed"""
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        """Wait for a background sweep to finish"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.done
+
+    def _progress(self, chunks):
+        for chunk in chunks:
+            if self._cancel.is_set():
+                break
+            yield chunk
+            self.points += len(chunk[2])
+            self.progress = self.points / self.sweep.size if self.sweep.size else 1.0
+
+    def run(self):
+        """Write every chunk; the target file only appears once complete"""
+        temp_path = self.path + '.part'
+        try:
+            with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+                self.failures = write_sweep(self.sweep.names, self._progress(self.chunks),
+                                            f, self.format)
+            if self._cancel.is_set():
+                self.cancelled = True
+                os.remove(temp_path)
+            else:
+                os.replace(temp_path, self.path)
+                self.progress = 1.0
+        except Exception as e:
+            print(f"Error writing sweep: {e}")
+            self.error = e
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        finally:
+            close = getattr(self.chunks, 'close', None)
+            if close is not None:
+                close()
+            self.done = True
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Task Pool for Advanced Calculator Pro
+Runs slow computations in worker processes so the Tk mainloop never blocks.
+Every task can have a timeout; a task that runs past it, or is cancelled
+while running, has its worker process killed and replaced, so a
+pathological expression cannot hang the application. Independent tasks run
+on separate cores.
+
+The pool has no threads of its own: poll() collects finished results,
+enforces deadlines and hands out pending work without blocking, and is
+meant to be called from a Tk `after` loop. Callbacks run inside poll(), on
+the caller's thread. Outside a GUI, wait() blocks until tasks finish.
+"""
+
+import itertools
+import multiprocessing
+import os
+import time
+from collections import deque
+from multiprocessing.connection import wait as wait_connections
+
+# Seconds a task may run before its worker is killed
+DEFAULT_TIMEOUT = 10.0
+
+PENDING = 'pending'
+RUNNING = 'running'
+FINISHED = 'finished'
+FAILED = 'failed'
+TIMED_OUT = 'timed out'
+CANCELLED = 'cancelled'
+
+
+class TaskTimeout(Exception):
+    """The task ran past its timeout and its worker was stopped"""
+
+
+class TaskCancelled(Exception):
+    """The task was cancelled before it finished"""
+
+
+class WorkerError(RuntimeError):
+    """The worker process died or could not return the result"""
+
+
+def _worker_main(connection):
+    """Worker process loop: run (task_id, function, args) until told to stop"""
+    while True:
+        try:
+            message = connection.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        task_id, function, args = message
+        try:
+            reply = (task_id, True, function(*args))
+        except Exception as e:
+            reply = (task_id, False, e)
+        try:
+            connection.send(reply)
+        except Exception as e:
+            # The result or exception could not be pickled
+            connection.send((task_id, False, WorkerError(f"Cannot return result: {e}")))
+
+
+class Task:
+    """A unit of work submitted to a TaskPool"""
+
+    def __init__(self, pool, task_id, function, args, timeout, callback):
+        self.pool = pool
+        self.id = task_id
+        self.function = function
+        self.args = args
+        self.timeout = timeout
+        self.callback = callback
+        self.state = PENDING
+        self.result = None
+        self.error = None
+        self.started = None
+        self.elapsed = None
+
+    @property
+    def done(self):
+        return self.state not in (PENDING, RUNNING)
+
+    @property
+    def cancelled(self):
+        return self.state == CANCELLED
+
+    def cancel(self):
+        """Cancel the task, killing its worker if it is already running"""
+        self.pool.cancel(self)
+
+    def wait(self, timeout=None):
+        """Block until the task is done; return its result or raise its error"""
+        self.pool.wait([self], timeout)
+        if not self.done:
+            raise TimeoutError("Task still running")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def __repr__(self):
+        return f"Task({self.id}, {getattr(self.function, '__name__', self.function)}, {self.state})"
+
+
+class _Worker:
+    def __init__(self, context):
+        connection, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+        self.connection = connection
+        self.task = None
+
+    def send(self, task):
+        self.task = task
+        self.connection.send((task.id, task.function, task.args))
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.terminate()
+        else:
+            try:
+                self.connection.send(None)
+            except OSError:
+                pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.connection.close()
+
+
+class TaskPool:
+    def __init__(self, workers=None, timeout=DEFAULT_TIMEOUT, start_method='spawn'):
+        # workers=0 runs every task inline inside poll(), for environments
+        # without subprocess support
+        self.size = (os.cpu_count() or 1) if workers is None else workers
+        self.timeout = timeout
+        self._context = multiprocessing.get_context(start_method)
+        self._idle = []
+        self._busy = []
+        self._pending = deque()
+        self._ids = itertools.count(1)
+        self.closed = False
+
+    def start(self, count=None):
+        """Start workers now instead of on first use: count of them, or every one"""
+        count = self.size if count is None else min(count, self.size)
+        while len(self._idle) + len(self._busy) < count:
+            self._idle.append(_Worker(self._context))
+        return self
+
+    def submit(self, function, *args, timeout=None, callback=None):
+        """Queue function(*args) for a worker and return its Task
+
+        function, its arguments and its result must be picklable, so
+        function has to be defined at module level. callback(task) runs
+        inside poll() once the task is done, whatever the outcome.
+        """
+        if self.closed:
+            raise RuntimeError("Task pool is closed")
+        task = Task(self, next(self._ids), function, args,
+                    self.timeout if timeout is None else timeout, callback)
+        self._pending.append(task)
+        return task
+
+    @property
+    def active(self):
+        """Number of tasks pending or running"""
+        return len(self._pending) + len(self._busy)
+
+    def poll(self):
+        """Collect results, enforce timeouts and start pending tasks, without blocking
+
+        Returns the tasks that finished during this call.
+        """
+        finished = []
+        if self._busy:
+            ready = wait_connections([worker.connection for worker in self._busy], 0)
+            for worker in [worker for worker in self._busy if worker.connection in ready]:
+                self._receive(worker, finished)
+            now = time.perf_counter()
+            for worker in list(self._busy):
+                task = worker.task
+                if task.timeout is not None and now - task.started > task.timeout:
+                    self._finish_killed(worker, TIMED_OUT, TaskTimeout(
+                        f"Stopped after {task.timeout:g} seconds"), finished)
+        self._dispatch(finished)
+        for task in finished:
+            if task.callback is not None:
+                task.callback(task)
+        return finished
+
+    def wait(self, tasks=None, timeout=None):
+        """Poll until the given tasks (default: all) are done or timeout passes"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            self.poll()
+            remaining = [task for task in tasks if not task.done] if tasks is not None \
+                else self.active
+            if not remaining:
+                return True
+            now = time.perf_counter()
+            if deadline is not None and now >= deadline:
+                return False
+            # Sleep until a worker replies or the next deadline is due
+            delays = [task.started + task.timeout - now for task in
+                      (worker.task for worker in self._busy) if task.timeout is not None]
+            if deadline is not None:
+                delays.append(deadline - now)
+            delay = max(0.0, min(delays)) if delays else None
+            if self._busy:
+                wait_connections([worker.connection for worker in self._busy], delay)
+
+    def map(self, function, argument_tuples, timeout=None, window=None):
+        """Run function over argument tuples on all workers, yielding tasks in order"""
+        window = window or max(1, self.size) * 2
+        queue = deque()
+        for args in argument_tuples:
+            queue.append(self.submit(function, *args, timeout=timeout))
+            if len(queue) >= window:
+                task = queue.popleft()
+                self.wait([task])
+                yield task
+        while queue:
+            task = queue.popleft()
+            self.wait([task])
+            yield task
+
+    def cancel(self, task):
+        """Cancel a pending or running task"""
+        if task.done:
+            return
+        finished = []
+        if task.state == PENDING:
+            self._pending.remove(task)
+            self._complete(task, CANCELLED, None, TaskCancelled("Cancelled"), finished)
+        else:
+            for worker in self._busy:
+                if worker.task is task:
+                    self._finish_killed(worker, CANCELLED, TaskCancelled("Cancelled"), finished)
+                    break
+        for task in finished:
+            if task.callback is not None:
+                task.callback(task)
+
+    def close(self):
+        """Cancel outstanding work and stop every worker"""
+        if self.closed:
+            return
+        for task in list(self._pending) + [worker.task for worker in self._busy]:
+            self.cancel(task)
+        for worker in self._idle:
+            worker.stop()
+        self._idle = []
+        self.closed = True
+
+    # ------------------------------------------------------------------
+
+    def _complete(self, task, state, result, error, finished):
+        task.state = state
+        task.result = result
+        task.error = error
+        if task.started is not None:
+            task.elapsed = time.perf_counter() - task.started
+        finished.append(task)
+
+    def _receive(self, worker, finished):
+        task = worker.task
+        try:
+            task_id, ok, value = worker.connection.recv()
+        except (EOFError, OSError) as e:
+            self._finish_killed(worker, FAILED, WorkerError(f"Worker exited: {e}"), finished)
+            return
+        self._busy.remove(worker)
+        worker.task = None
+        self._idle.append(worker)
+        if ok:
+            self._complete(task, FINISHED, value, None, finished)
+        else:
+            self._complete(task, FAILED, None, value, finished)
+
+    def _finish_killed(self, worker, state, error, finished):
+        """Stop a worker in the middle of a task; a new one is started on demand"""
+        self._busy.remove(worker)
+        worker.stop(kill=True)
+        self._complete(worker.task, state, None, error, finished)
+
+    def _dispatch(self, finished):
+        if self.size == 0:
+            while self._pending:
+                task = self._pending.popleft()
+                task.state = RUNNING
+                task.started = time.perf_counter()
+                try:
+                    self._complete(task, FINISHED, task.function(*task.args), None, finished)
+                except Exception as e:
+                    self._complete(task, FAILED, None, e, finished)
+            return
+        while self._pending:
+            if not self._idle:
+                if len(self._busy) >= self.size:
+                    return
+                self._idle.append(_Worker(self._context))
+            worker = self._idle.pop()
+            task = self._pending.popleft()
+            task.state = RUNNING
+            task.started = time.perf_counter()
+            try:
+                worker.send(task)
+            except OSError as e:
+                worker.task = None
+                worker.stop(kill=True)
+                self._complete(task, FAILED, None, WorkerError(f"Worker exited: {e}"), finished)
+                continue
+            except Exception as e:
+                # Unpicklable function or arguments; the worker is still usable
+                worker.task = None
+                self._idle.append(worker)
+                self._complete(task, FAILED, None, e, finished)
+                continue
+            self._busy.append(worker)
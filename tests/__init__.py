@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for Advanced Calculator Pro
+
+Run from the repository root with: python -m pytest tests
+or: python -m unittest discover -s tests -t .
+"""
+
+import os
+import sys
+
+# Tests import the application modules from the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Smoke test of the application starting up; needs a display for Tk
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from tests import ROOT
+
+try:
+    import tkinter as tk
+    import calculator_app
+except ImportError:
+    tk = None
+
+
+@unittest.skipIf(tk is None, "tkinter is not available")
+class StartupTest(unittest.TestCase):
+    def setUp(self):
+        try:
+            self.root = tk.Tk()
+        except tk.TclError as e:
+            self.skipTest(f"no display: {e}")
+        self.root.withdraw()
+        self.errors = []
+        self.root.report_callback_exception = \
+            lambda kind, error, traceback: self.errors.append(error)
+        # The application keeps its files in the working directory
+        self.directory = tempfile.TemporaryDirectory()
+        shutil.copytree(os.path.join(ROOT, 'locales'),
+                        os.path.join(self.directory.name, 'locales'))
+        self.cwd = os.getcwd()
+        os.chdir(self.directory.name)
+        environment = mock.patch.dict(os.environ)
+        environment.start()
+        self.addCleanup(environment.stop)
+        os.environ.pop('CALCULATOR_RATES_SOURCE', None)
+        self.app = None
+
+    def tearDown(self):
+        if self.app is not None:
+            self.app.core.close()
+        self.root.destroy()
+        os.chdir(self.cwd)
+        self.directory.cleanup()
+
+    def run_until(self, condition, seconds):
+        deadline = time.monotonic() + seconds
+        while not condition() and time.monotonic() < deadline and not self.errors:
+            self.root.update()
+            time.sleep(0.01)
+
+    def test_finish_startup(self):
+        self.app = app = calculator_app.AdvancedCalculator(self.root)
+        # History loads and a worker is warmed up after the first frame
+        self.run_until(lambda: app.history_loader is None and app.core.task_pool is not None
+                       and app.core.task_pool._idle,
+                       calculator_app.WORKER_WARMUP_MS / 1000 + 10)
+        self.assertEqual(self.errors, [])
+        self.assertIsNone(app.history_loader)
+        self.assertEqual(len(app.core.task_pool._idle), 1)
+
+        app.current_input = "2**10"
+        app.calculate()
+        self.run_until(lambda: app.active_task is None, 30)
+        self.assertEqual(self.errors, [])
+        self.assertEqual(app.core.history[-1].expression, "2**10")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the benchmark regression comparator
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from tests import ROOT
+
+BENCHMARKS = os.path.join(ROOT, 'benchmarks')
+if BENCHMARKS not in sys.path:
+    sys.path.insert(0, BENCHMARKS)
+
+from compare import compare
+
+
+def case(median, fastest):
+    return {'median': median, 'min': fastest}
+
+
+def results(**cases):
+    return {'environment': {}, 'cases': cases}
+
+
+class CompareTest(unittest.TestCase):
+    def verdicts(self, baseline, current, threshold=0.10):
+        return {name: verdict for name, _, _, _, verdict in compare(baseline, current, threshold)}
+
+    def test_verdicts(self):
+        baseline = results(slower=case(1.0, 0.9), noisy=case(1.0, 0.9), faster=case(1.0, 0.95),
+                           close=case(1.0, 0.9))
+        current = results(slower=case(1.5, 1.2), noisy=case(1.5, 0.8), faster=case(0.5, 0.4),
+                          close=case(1.05, 1.01))
+        self.assertEqual(self.verdicts(baseline, current),
+                         {'slower': 'slower', 'noisy': '', 'faster': 'faster', 'close': ''})
+
+    def test_threshold(self):
+        baseline = results(a=case(1.0, 0.9))
+        current = results(a=case(1.3, 1.2))
+        self.assertEqual(self.verdicts(baseline, current, 0.5), {'a': ''})
+        self.assertEqual(self.verdicts(baseline, current, 0.2), {'a': 'slower'})
+
+    def test_unshared_and_skipped_cases(self):
+        baseline = results(old=case(1.0, 1.0), shared={'skipped': "numpy not installed"})
+        current = results(new=case(1.0, 1.0), shared=case(1.0, 1.0))
+        rows = compare(baseline, current)
+        self.assertEqual([(row[0], row[4]) for row in rows], [('shared', 'skipped')])
+
+    def test_exit_status(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for name, data in (('base', results(a=case(1.0, 0.9))),
+                               ('same', results(a=case(1.0, 0.9))),
+                               ('slow', results(a=case(2.0, 1.8)))):
+                path = os.path.join(directory, name + '.json')
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                paths.append(path)
+            script = os.path.join(BENCHMARKS, 'compare.py')
+            statuses = [subprocess.run([sys.executable, script, paths[0], path],
+                                       stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL).returncode
+                        for path in paths[1:] + [os.path.join(directory, 'missing.json')]]
+        self.assertEqual(statuses, [0, 1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the JSON-lines calculation server
+"""
+
+import asyncio
+import json
+import unittest
+
+from calculation_server import CalculationServer
+from calculator_core import CalculatorCore
+
+
+class CalculationServerTest(unittest.TestCase):
+    def setUp(self):
+        self.core = CalculatorCore(history_file=None, stats_file=None, rates_dir=None,
+                                   workspace_file=None)
+
+    def tearDown(self):
+        self.core.close()
+
+    def exchange(self, lines, **options):
+        """Send every line at once on one connection and return the decoded replies"""
+        async def run():
+            server = CalculationServer(self.core, **options)
+            await server.start('127.0.0.1', 0)
+            host, port = server.addresses()[0][:2]
+            reader, writer = await asyncio.open_connection(host, port)
+            writer.write(''.join(line + '\n' for line in lines).encode('utf-8'))
+            await writer.drain()
+            replies = [json.loads(await asyncio.wait_for(reader.readline(), 10))
+                       for _ in lines]
+            writer.close()
+            await server.close()
+            return server, replies
+
+        return asyncio.run(run())
+
+    def test_pipelined_requests_answered_in_order(self):
+        lines = [json.dumps({'id': i, 'expression': f'{i}*2'}) for i in range(200)]
+        server, replies = self.exchange(lines, batch_size=16, max_pending=32)
+        self.assertEqual(replies, [{'id': i, 'result': i * 2} for i in range(200)])
+        self.assertEqual(server.requests, 200)
+        self.assertLess(server.batches, 200)
+        self.assertEqual(len(self.core.history), 200)
+
+    def test_operations_and_errors(self):
+        lines = [
+            json.dumps({'op': 'ping'}),
+            json.dumps({'id': 'c', 'op': 'convert', 'value': 100, 'type': 'length',
+                        'from': 'm', 'to': 'km'}),
+            json.dumps([{'expression': '1+1'}, {'expression': '1/0'}]),
+            json.dumps({'op': 'nope'}),
+            json.dumps({'expression': 5}),
+            '{not json',
+            '[1]',
+        ]
+        _, replies = self.exchange(lines, record=False)
+        self.assertEqual(replies[0], {'result': 'pong'})
+        self.assertEqual(replies[1], {'id': 'c', 'value': 100, 'result': 0.1})
+        self.assertEqual(replies[2][0], {'result': 2})
+        self.assertIn('error', replies[2][1])
+        for reply in replies[3:6]:
+            self.assertIn('error', reply)
+        self.assertEqual(replies[6], [{'error': "Expected a JSON object"}])
+        self.assertEqual(self.core.history, [])
+
+    def test_result_that_cannot_be_encoded(self):
+        # As with --no-limits; 2**20000 has more digits than int/str allows
+        self.core.set_limits(None)
+        lines = [
+            json.dumps({'id': 1, 'expression': '2**20000'}),
+            json.dumps([{'expression': '1+1'}, {'id': 'b', 'expression': '2**20000'}]),
+            json.dumps({'id': 2, 'expression': '1+1'}),
+        ]
+        _, replies = self.exchange(lines, record=False)
+        self.assertEqual(replies[0]['id'], 1)
+        self.assertIn('error', replies[0])
+        self.assertEqual(replies[1][0], {'result': 2})
+        self.assertEqual(replies[1][1]['id'], 'b')
+        self.assertIn('error', replies[1][1])
+        self.assertEqual(replies[2], {'id': 2, 'result': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
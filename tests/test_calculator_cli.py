@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the headless command line interface
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+from calculator_cli import write_csv, write_jsonl
+from tests import ROOT
+
+ROWS = [
+    ('1+1', 2, None),
+    ('2**20000', 2 ** 20000, None),
+    ('1/0', None, ZeroDivisionError('division by zero')),
+    ('2*3', 6, None),
+]
+
+
+class WritersTest(unittest.TestCase):
+    def test_csv_reports_unwritable_results_per_row(self):
+        out = io.StringIO()
+        self.assertEqual(write_csv(ROWS, out), 2)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], 'expression,result,error')
+        self.assertEqual(lines[1], '1+1,2,')
+        self.assertTrue(lines[2].startswith('2**20000,,'))
+        self.assertIn('4300', lines[2])
+        self.assertEqual(lines[3:], ['1/0,,division by zero', '2*3,6,'])
+
+    def test_jsonl_reports_unwritable_results_per_row(self):
+        out = io.StringIO()
+        self.assertEqual(write_jsonl(ROWS, out), 2)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(records[0], {'expression': '1+1', 'result': 2})
+        self.assertEqual(set(records[1]), {'expression', 'error'})
+        self.assertEqual(records[2], {'expression': '1/0', 'error': 'division by zero'})
+        self.assertEqual(records[3], {'expression': '2*3', 'result': 6})
+
+
+class MainTest(unittest.TestCase):
+    def run_cli(self, text, *args):
+        script = os.path.join(ROOT, 'calculator_cli.py')
+        return subprocess.run([sys.executable, script] + list(args), input=text,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              universal_newlines=True, cwd=ROOT, timeout=60)
+
+    def test_stream(self):
+        process = self.run_cli("# comment\n\nx = 2\nf(a) = a*x\nf(21)\n", '-f', 'jsonl')
+        self.assertEqual(process.returncode, 0, process.stderr)
+        self.assertEqual([json.loads(line) for line in process.stdout.splitlines()],
+                         [{'expression': 'x = 2', 'result': 2},
+                          {'expression': 'f(a) = a*x', 'result': None},
+                          {'expression': 'f(21)', 'result': 42}])
+
+    def test_huge_result_does_not_stop_the_stream(self):
+        process = self.run_cli("2**20000\n1+1\n", '--no-limits')
+        self.assertEqual(process.returncode, 1)
+        self.assertEqual(process.stderr, '')
+        self.assertEqual(process.stdout.splitlines()[-1], '1+1,2,')
+
+
+if __name__ == '__main__':
+    unittest.main()
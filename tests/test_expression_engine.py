@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the expression engine: tokenizer, parser, compiler and limits
+"""
+
+import json
+import unittest
+from decimal import Decimal
+from fractions import Fraction
+
+from combinatorics import EXACT_DIGITS
+from expression_engine import (BinOp, Call, EvaluationLimits, ExpressionEngine, ExpressionError,
+                               LimitError, MAX_INT_BITS, Name, Number, UnaryOp, compile_tree,
+                               parse, tokenize)
+from numeric_modes import get_mode
+
+
+def shape(node):
+    """Write a syntax tree as nested tuples, to compare trees"""
+    if isinstance(node, Number):
+        return node.value
+    if isinstance(node, Name):
+        return node.id
+    if isinstance(node, UnaryOp):
+        return (node.op, shape(node.operand))
+    if isinstance(node, BinOp):
+        return (shape(node.left), node.op, shape(node.right))
+    if isinstance(node, Call):
+        return (node.func,) + tuple(shape(arg) for arg in node.args)
+    raise TypeError(node)
+
+
+class TokenizerTest(unittest.TestCase):
+    def test_tokens(self):
+        self.assertEqual(tokenize(" 2j+.5e1*x1 // 3"),
+                         [('number', '2j', 1), ('op', '+', 3), ('number', '.5e1', 4),
+                          ('op', '*', 8), ('name', 'x1', 9), ('op', '//', 12),
+                          ('number', '3', 15), ('end', None, 16)])
+
+    def test_unexpected_character(self):
+        with self.assertRaises(ExpressionError) as raised:
+            tokenize("2 $ 3")
+        self.assertEqual(raised.exception.position, 2)
+
+
+class LiteralTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = ExpressionEngine()
+
+    def test_numbers(self):
+        for text, value in (("42", 42), ("3.25", 3.25), (".5", 0.5), ("7.", 7.0),
+                            ("1e3", 1000.0), ("2.5E-2", 0.025)):
+            result = self.engine.evaluate(text)
+            self.assertEqual(result, value, text)
+            self.assertIs(type(result), type(value), text)
+
+    def test_imaginary(self):
+        self.assertEqual(self.engine.evaluate("2j"), 2j)
+        self.assertEqual(self.engine.evaluate("1.5e3J"), 1500j)
+        self.assertEqual(self.engine.evaluate("(1+2j)*(1-2j)"), 5)
+        self.assertEqual(self.engine.evaluate("2j**2"), -4)
+
+    def test_exact_modes_read_the_source_text(self):
+        self.engine.set_mode(get_mode('fraction'))
+        self.assertEqual(self.engine.evaluate("0.1+0.2"), Fraction(3, 10))
+        self.assertEqual(self.engine.evaluate("2j*2"), 4j)
+        self.engine.set_mode(get_mode('decimal'))
+        self.assertEqual(self.engine.evaluate("0.1+0.2"), Decimal('0.3'))
+
+
+class ParserTest(unittest.TestCase):
+    def test_precedence(self):
+        for text, tree in (
+                ("2+3*4", (2, '+', (3, '*', 4))),
+                ("(2+3)*4", ((2, '+', 3), '*', 4)),
+                ("8-4-2", ((8, '-', 4), '-', 2)),
+                ("7//2*3%4", (((7, '//', 2), '*', 3), '%', 4)),
+                ("2**3**2", (2, '**', (3, '**', 2))),
+                ("-2**2", ('-', (2, '**', 2))),
+                ("2**-1", (2, '**', ('-', 1))),
+                ("2*-x", (2, '*', ('-', 'x'))),
+                ("pow(2, 1+1)", ('pow', 2, (1, '+', 1))),
+                ("f()", ('f',))):
+            self.assertEqual(shape(parse(text)), tree, text)
+
+    def test_evaluation_follows_python(self):
+        engine = ExpressionEngine()
+        for text in ("2+3*4", "2**3**2", "-2**2", "2**-1", "-7%3", "7//2*3", "-(-3)",
+                     "+-3", "10/4-1", "2*-3**2"):
+            self.assertEqual(engine.evaluate(text), eval(text), text)
+
+    def test_errors(self):
+        for text, position in (("", 0), ("1+", 2), ("(1+2", 4), ("1 2", 2),
+                               ("f(1 2)", 4), ("1+)", 2), ("3j2", 2)):
+            with self.assertRaises(ExpressionError) as raised:
+                parse(text)
+            self.assertEqual(raised.exception.position, position, text)
+
+
+class CompilerTest(unittest.TestCase):
+    def test_closure(self):
+        function = compile_tree(parse("a*x**2+sqrt(b)-pi*0"))
+        self.assertEqual(function({'a': 2, 'x': 3, 'b': 16}), 22)
+        self.assertEqual(function({'a': 1, 'x': 0, 'b': 0}), 0)
+
+    def test_unknown_names(self):
+        with self.assertRaisesRegex(ExpressionError, "Unknown function 'foo'"):
+            compile_tree(parse("foo(1)"))
+        function = compile_tree(parse("y+1"))
+        with self.assertRaisesRegex(ExpressionError, "Unknown name 'y'"):
+            function({})
+
+    def test_optimized_matches_plain(self):
+        engine = ExpressionEngine()
+        for text in ("sqrt(x)*sqrt(x)+sqrt(x)", "2**3**2+x", "log(8, 2)*x", "-x**2"):
+            plain = engine.compile(text, optimized=False).evaluate({'x': 4.0})
+            engine.clear_cache()
+            optimized = engine.compile(text, optimized=True).evaluate({'x': 4.0})
+            engine.clear_cache()
+            self.assertEqual(plain, optimized, text)
+
+
+class LimitsTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = ExpressionEngine(limits=EvaluationLimits())
+
+    def test_results_within_the_limit_can_be_encoded(self):
+        for text in ("2**13999", "3**8000", "(2**6999)*(2**6999)+1"):
+            result = self.engine.evaluate(text)
+            self.assertLessEqual(len(str(result)), EXACT_DIGITS)
+            json.dumps(result)
+
+    def test_default_int_limit(self):
+        self.assertLessEqual(MAX_INT_BITS * 0.30103 + 1, EXACT_DIGITS)
+        for text in ("2**20000", "2**14001", "(2**7000)*(2**7001)", "9**9**9",
+                     "pow(10, 10**8)"):
+            with self.assertRaises(LimitError) as raised:
+                self.engine.evaluate(text)
+            self.assertEqual(raised.exception.limit, 'int_bits', text)
+
+    def test_fraction_limit(self):
+        self.engine.set_mode(get_mode('fraction'))
+        self.assertEqual(self.engine.evaluate("(1/3)**2"), Fraction(1, 9))
+        with self.assertRaises(LimitError):
+            self.engine.evaluate("(1/3)**10000")
+
+    def test_float_results_are_not_limited(self):
+        self.assertEqual(self.engine.evaluate("2.0**1000"), 2.0 ** 1000)
+
+    def test_size_limits(self):
+        with self.assertRaises(LimitError) as raised:
+            self.engine.evaluate("1+" * 600 + "1")
+        self.assertEqual(raised.exception.limit, 'length')
+        with self.assertRaises(LimitError) as raised:
+            self.engine.evaluate("(" * 70 + "1" + ")" * 70)
+        self.assertEqual(raised.exception.limit, 'depth')
+        with self.assertRaises(LimitError) as raised:
+            self.engine.evaluate("+".join(["1"] * 300))
+        self.assertEqual(raised.exception.limit, 'nodes')
+
+    def test_time_budget(self):
+        engine = ExpressionEngine(limits=EvaluationLimits(time_budget=0.0))
+        with self.assertRaises(LimitError) as raised:
+            engine.evaluate("fact(3000)")
+        self.assertEqual(raised.exception.limit, 'time')
+
+    def test_limits_off(self):
+        engine = ExpressionEngine()
+        self.assertEqual(engine.evaluate("2**20000").bit_length(), 20001)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the streaming history exporter and the columnar format
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from fractions import Fraction
+
+from history_export import (COLUMNAR_MAGIC, HistoryExporter, format_for_path, iter_columns,
+                            read_columnar)
+from history_record import CONVERSION, HistoryRecord
+
+RECORDS = [
+    HistoryRecord('1/3', 0.3333333333333333, timestamp=1700000000.25),
+    HistoryRecord('2**100', 2 ** 100, timestamp=1700000001.0),
+    HistoryRecord('sqrt(-1)', 1j, timestamp=1700000002.0),
+    HistoryRecord('1/3', Decimal('0.3333333333333333333333333333'), timestamp=1700000003.0),
+    HistoryRecord('1/3', Fraction(1, 3), timestamp=1700000004.0),
+    HistoryRecord('5 m → ft', 16.4042, CONVERSION, 1700000005.0, 'ft'),
+    HistoryRecord('10 USD → EUR', 9.2, CONVERSION, 1700000006.0, 'EUR', 'ecb-42'),
+    HistoryRecord('x = ü', 'ü', timestamp=1700000007.0),
+]
+
+
+def batches(records, size):
+    for start in range(0, len(records), size):
+        stop = min(start + size, len(records))
+        yield records[start:stop], stop, len(records)
+
+
+class ExportTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def export(self, name, records=RECORDS, size=3):
+        path = os.path.join(self.directory.name, name)
+        exporter = HistoryExporter(batches(records, size), path)
+        exporter.run()
+        self.assertIsNone(exporter.error)
+        self.assertEqual(exporter.rows, len(records))
+        self.assertEqual(exporter.progress, 1.0)
+        return path
+
+    def test_columnar_round_trip(self):
+        path = self.export('history.hcol')
+        records = list(read_columnar(path))
+        self.assertEqual(records, RECORDS)
+        self.assertEqual([type(record.result) for record in records],
+                         [type(record.result) for record in RECORDS])
+
+    def test_columnar_chunks(self):
+        path = self.export('history.hcol', size=3)
+        self.assertEqual([len(columns['expression']) for columns in iter_columns(path)],
+                         [3, 3, 2])
+
+    def test_columnar_empty(self):
+        path = self.export('history.hcol', records=[])
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), COLUMNAR_MAGIC)
+        self.assertEqual(list(read_columnar(path)), [])
+
+    def test_columnar_truncated(self):
+        path = self.export('history.hcol')
+        with open(path, 'rb') as f:
+            data = f.read()
+        for size in (len(data) - 1, len(COLUMNAR_MAGIC) + 3):
+            with open(path, 'wb') as f:
+                f.write(data[:size])
+            with self.assertRaises(ValueError):
+                list(read_columnar(path))
+
+    def test_columnar_wrong_magic(self):
+        path = self.export('history.jsonl')
+        with self.assertRaises(ValueError):
+            list(read_columnar(path))
+
+    def test_json_lines_round_trip(self):
+        path = self.export('history.jsonl')
+        with open(path, 'r', encoding='utf-8') as f:
+            records = [HistoryRecord.from_dict(json.loads(line)) for line in f]
+        self.assertEqual(records, RECORDS)
+
+    def test_csv_and_text(self):
+        for name in ('history.csv', 'history.txt'):
+            path = self.export(name)
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            self.assertIn('10 USD → EUR', text)
+            self.assertIn('x = ü', text)
+
+    def test_format_for_path(self):
+        self.assertEqual(format_for_path('a.HCOL'), 'hcol')
+        self.assertEqual(format_for_path('a.jsonl'), 'jsonl')
+        self.assertEqual(format_for_path('a.log'), 'txt')
+
+    def test_cancel_leaves_no_file(self):
+        path = os.path.join(self.directory.name, 'history.hcol')
+        exporter = HistoryExporter(batches(RECORDS, 1), path)
+        exporter.cancel()
+        exporter.start()
+        self.assertTrue(exporter.wait(10))
+        self.assertTrue(exporter.cancelled)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_error_leaves_no_file(self):
+        def failing():
+            yield RECORDS[:1], 1, 2
+            raise OSError("disk full")
+
+        path = os.path.join(self.directory.name, 'history.hcol')
+        exporter = HistoryExporter(failing(), path)
+        exporter.run()
+        self.assertIsInstance(exporter.error, OSError)
+        self.assertTrue(exporter.done)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the append-only history log and loading it into the core
+"""
+
+import os
+import tempfile
+import unittest
+
+from calculator_core import CalculatorCore
+from combinatorics import ResultTooLarge
+from history_record import format_entry
+from history_store import CLEAR_MARKER, HistoryLog
+
+
+def entry(i):
+    return {'timestamp': 1700000000.0 + i, 'type': 'calculation',
+            'expression': f'{i}+1', 'result': i + 1}
+
+
+class HistoryLogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'history.jsonl')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def reopen(self, **options):
+        return list(HistoryLog(self.path, **options))
+
+    def test_round_trip(self):
+        log = HistoryLog(self.path)
+        log.append(entry(0))
+        log.extend([entry(1), entry(2)])
+        log.close()
+        self.assertEqual(self.reopen(), [entry(0), entry(1), entry(2)])
+
+    def test_records_reach_the_file_before_sync(self):
+        log = HistoryLog(self.path, fsync_every=1000, fsync_interval=1000)
+        log.append(entry(0))
+        self.assertEqual(self.reopen(), [entry(0)])
+        log.close()
+
+    def test_clear_discards_earlier_records(self):
+        log = HistoryLog(self.path, compact_min_bytes=1 << 30)
+        log.extend([entry(0), entry(1)])
+        log.clear()
+        log.append(entry(2))
+        log.close()
+        self.assertEqual(self.reopen(compact_min_bytes=1 << 30), [entry(2)])
+        with open(self.path, 'rb') as f:
+            self.assertIn(CLEAR_MARKER, f.read())
+
+    def test_clear_at_start_of_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(CLEAR_MARKER)
+        log = HistoryLog(self.path, compact_min_bytes=1 << 30)
+        log.append(entry(0))
+        log.close()
+        self.assertEqual(self.reopen(compact_min_bytes=1 << 30), [entry(0)])
+
+    def test_torn_last_line_is_dropped(self):
+        log = HistoryLog(self.path)
+        log.extend([entry(0), entry(1)])
+        log.close()
+        with open(self.path, 'ab') as f:
+            f.write(b'{"timestamp": 17000')
+        log = HistoryLog(self.path)
+        log.append(entry(2))
+        log.close()
+        self.assertEqual(self.reopen(), [entry(0), entry(1), entry(2)])
+
+    def test_corrupt_line_is_skipped(self):
+        log = HistoryLog(self.path)
+        log.append(entry(0))
+        log.close()
+        with open(self.path, 'ab') as f:
+            f.write(b'not json\n')
+        log = HistoryLog(self.path)
+        log.append(entry(1))
+        log.close()
+        self.assertEqual(self.reopen(), [entry(0), entry(1)])
+        batches = list(HistoryLog(self.path).iter_batches())
+        self.assertEqual([record for records, _, _ in batches for record in records],
+                         [entry(0), entry(1)])
+
+    def test_compaction_keeps_live_records(self):
+        log = HistoryLog(self.path, compact_min_bytes=0)
+        log.extend([entry(i) for i in range(10)])
+        log.clear()
+        log.append(entry(10))
+        log.close()
+        with open(self.path, 'rb') as f:
+            self.assertNotIn(CLEAR_MARKER, f.read())
+        self.assertEqual(self.reopen(), [entry(10)])
+
+    def test_compaction_on_open(self):
+        log = HistoryLog(self.path, compact_min_bytes=1 << 30)
+        log.extend([entry(i) for i in range(10)])
+        log.clear()
+        log.append(entry(10))
+        log.close()
+        size = os.path.getsize(self.path)
+        log = HistoryLog(self.path, compact_min_bytes=0)
+        log.open()
+        self.assertLess(log.size(), size)
+        self.assertEqual(list(log), [entry(10)])
+        log.close()
+
+    def test_batches_cover_a_snapshot(self):
+        log = HistoryLog(self.path)
+        log.extend([entry(i) for i in range(100)])
+        batches = log.iter_batches(batch_bytes=512)
+        records, done, total = next(batches)
+        log.append(entry(100))
+        for more, done, _ in batches:
+            records.extend(more)
+        log.close()
+        self.assertEqual(records, [entry(i) for i in range(100)])
+        self.assertEqual(done, total)
+
+    def test_missing_file_reads_empty(self):
+        log = HistoryLog(self.path)
+        self.assertEqual(list(log), [])
+        self.assertEqual(list(log.iter_batches()), [])
+        self.assertFalse(os.path.exists(self.path))
+
+
+class CoreHistoryLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'history.jsonl')
+        log = HistoryLog(self.path)
+        log.extend([entry(i) for i in range(3)])
+        log.close()
+        self.core = CalculatorCore(history_file=self.path, stats_file=None, rates_dir=None,
+                                   workspace_file=None)
+
+    def tearDown(self):
+        self.core.close()
+        self.directory.cleanup()
+
+    def test_load(self):
+        self.core.load_history()
+        self.assertEqual([record.expression for record in self.core.history],
+                         ['0+1', '1+1', '2+1'])
+
+    def test_entries_added_while_loading_come_last(self):
+        loader = self.core.load_history_batches()
+        next(loader)
+        self.core.add_history('9+1', 10)
+        for _ in loader:
+            pass
+        self.assertEqual([record.expression for record in self.core.history],
+                         ['0+1', '1+1', '2+1', '9+1'])
+        self.core.close()
+        self.assertEqual(len(list(HistoryLog(self.path))), 4)
+
+    def test_clear_while_loading_stops_it(self):
+        loader = self.core.load_history_batches()
+        next(loader)
+        self.core.clear_history()
+        self.core.add_history('9+1', 10)
+        for _ in loader:
+            pass
+        self.assertEqual([record.expression for record in self.core.history], ['9+1'])
+
+
+class CoreHistoryRecordTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'history.jsonl')
+        self.core = CalculatorCore(history_file=self.path, stats_file=None, rates_dir=None,
+                                   workspace_file=None)
+        # Only without limits can a result outgrow Python's int/str conversion
+        self.core.set_limits(None)
+
+    def tearDown(self):
+        self.core.close()
+        self.directory.cleanup()
+
+    def logged(self):
+        self.core.history_log.sync()
+        return [entry['expression'] for entry in HistoryLog(self.path)]
+
+    def test_results_too_long_for_text_are_not_recorded(self):
+        self.core.calculate("2**14000")
+        for expression in ("2**20000", "-(10**4300)"):
+            with self.assertRaises(ResultTooLarge):
+                self.core.calculate(expression)
+        self.core.calculate("1+1")
+        self.assertEqual([record.expression for record in self.core.history],
+                         ["2**14000", "1+1"])
+        self.assertEqual(self.logged(), ["2**14000", "1+1"])
+        self.assertEqual(self.core.statistics['errors'], 2)
+        for record in self.core.history:
+            format_entry(record)
+
+    def test_fractions_too_long_for_text_are_not_recorded(self):
+        self.core.set_numeric_mode('fraction')
+        with self.assertRaises(ResultTooLarge):
+            self.core.calculate("1/2**20000")
+        self.assertEqual(self.core.history, [])
+
+    def test_async_result_too_long_for_text(self):
+        task = self.core.calculate_async("2**20000")
+        with self.assertRaises(ResultTooLarge):
+            task.wait(30)
+        self.assertEqual(self.core.history, [])
+        self.assertEqual(self.logged(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for constant folding and shared subexpressions in the compiler
+"""
+
+import threading
+import unittest
+from decimal import Decimal
+
+from expression_engine import ExpressionEngine, ExpressionError, Name, Number, optimize, parse
+from numeric_modes import get_mode
+
+EXPRESSIONS = [
+    "sin(x)**2+cos(x)**2",
+    "(x+1)*(x+1)+(1+x)",
+    "sqrt(x*y+1)/sqrt(x*y+1)+x*y",
+    "2**10+x*(3*4)",
+    "(x-y)*(x-y)*(x-y)",
+    "log(x+y)+log(y+x)*2",
+    "-(x*y)+(x*y)**2",
+]
+
+ENVS = [{'x': 0.5, 'y': 2.0}, {'x': 3, 'y': 7}, {'x': -0.25, 'y': 2.5}]
+
+
+class OptimizerTest(unittest.TestCase):
+    def test_same_results(self):
+        plain = ExpressionEngine(optimize=False)
+        optimized = ExpressionEngine()
+        for text in EXPRESSIONS:
+            compiled = optimized.compile(text, optimized=True)
+            self.assertTrue(compiled.optimized)
+            for env in ENVS:
+                self.assertAlmostEqual(compiled.evaluate(env), plain.evaluate(text, env),
+                                       msg=f"{text} with {env}")
+
+    def test_same_results_exact_mode(self):
+        plain = ExpressionEngine(mode=get_mode('decimal', 40), optimize=False)
+        optimized = ExpressionEngine(mode=get_mode('decimal', 40))
+        env = {'x': Decimal('0.1'), 'y': Decimal('3')}
+        for text in ("(x+y)*(x+y)/(y+x)", "1/3+x*(x+1)+(x+1)"):
+            self.assertEqual(optimized.evaluate(text, env), plain.evaluate(text, env))
+
+    def test_constants_folded(self):
+        tree, lets = optimize(parse("2**10+3*4"))
+        self.assertIsInstance(tree, Number)
+        self.assertEqual(tree.value, 1036)
+        self.assertEqual(lets, [])
+
+    def test_repeated_subtree_shared(self):
+        tree, lets = optimize(parse("(x+y)*(y+x)"))
+        self.assertEqual(len(lets), 1)
+        slot = lets[0][0]
+        self.assertTrue(slot.startswith('#'))
+        self.assertIsInstance(tree.left, Name)
+        self.assertEqual(tree.left.id, slot)
+        self.assertEqual(tree.right.id, slot)
+
+    def test_environment_untouched(self):
+        engine = ExpressionEngine()
+        env = {'x': 2.0, 'y': 3.0}
+        self.assertEqual(engine.compile("(x+y)*(x+y)", optimized=True).evaluate(env), 25.0)
+        self.assertEqual(env, {'x': 2.0, 'y': 3.0})
+
+    def test_errors_surface_on_evaluation(self):
+        engine = ExpressionEngine()
+        compiled = engine.compile("1/(x-x)+1/(x-x)+1/0", optimized=True)
+        with self.assertRaises(ZeroDivisionError):
+            compiled.evaluate({'x': 1})
+        with self.assertRaisesRegex(ExpressionError, "Unknown name 'z'"):
+            engine.compile("(z+1)*(z+1)", optimized=True).evaluate({})
+
+    def test_threads_share_a_compiled_expression(self):
+        compiled = ExpressionEngine().compile("(x+1)*(x+1)-(x+1)", optimized=True)
+        errors = []
+
+        def run(value):
+            for _ in range(2000):
+                if compiled.evaluate({'x': value}) != (value + 1) ** 2 - (value + 1):
+                    errors.append(value)
+                    return
+
+        threads = [threading.Thread(target=run, args=(value,)) for value in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
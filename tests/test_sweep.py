@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for sweeps over ranges, on the stdlib and NumPy paths
+"""
+
+import io
+import math
+import unittest
+
+import sweep
+from expression_engine import ExpressionEngine
+from sweep import Sweep, evaluate_chunk, parse_ranges, write_sweep
+
+EXPRESSIONS = [
+    "x**2-3*x",
+    "1/x",
+    "1/(x-x)",
+    "x//(x-1)",
+    "x%(x+1)",
+    "log(x)",
+    "log10(abs(x))",
+    "sqrt(x)",
+    "0**x",
+    "10.0**(x*100)",
+    "pow(10, x*100)",
+    "1e308*10+x",
+    "1e308/1e-10+x",
+]
+
+RANGES = "x=-4:4:2001"
+
+
+def same(a, b):
+    return (math.isnan(a) and math.isnan(b)) or a == b or math.isclose(a, b, rel_tol=1e-12)
+
+
+class SweepTest(unittest.TestCase):
+    def evaluate(self, expression, use_numpy):
+        grid = Sweep(parse_ranges(RANGES))
+        return evaluate_chunk(ExpressionEngine(), expression, grid, 0, grid.size, use_numpy)
+
+    def test_failures_give_nan(self):
+        results = self.evaluate("1/x+log(x)", False)
+        self.assertTrue(math.isnan(results[0]))
+        self.assertTrue(math.isnan(results[1000]))
+        self.assertAlmostEqual(results[-1], 0.25 + math.log(4))
+
+    @unittest.skipIf(sweep.np is None, "NumPy is not installed")
+    def test_numpy_matches_stdlib(self):
+        for expression in EXPRESSIONS:
+            plain = self.evaluate(expression, False)
+            vector = self.evaluate(expression, True)
+            mismatches = [(i, a, b) for i, (a, b) in enumerate(zip(plain, vector))
+                          if not same(a, b)]
+            self.assertEqual(mismatches[:3], [], expression)
+
+    @unittest.skipIf(sweep.np is None, "NumPy is not installed")
+    def test_numpy_path_is_taken(self):
+        compiled = ExpressionEngine().compile("log(x)", optimized=True)
+        self.assertIsNotNone(sweep.vectorize(compiled.tree, {}))
+
+    def test_write_csv(self):
+        grid = Sweep(parse_ranges("x=0:2:3"))
+        results = evaluate_chunk(ExpressionEngine(), "1/x", grid, 0, grid.size, False)
+        out = io.StringIO()
+        failures = write_sweep(grid.names, [(0, grid.columns(0, 3), results)], out)
+        self.assertEqual(failures, 1)
+        self.assertEqual(out.getvalue(), "x,result\n0.0,nan\n1.0,1.0\n2.0,0.5\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for the worker process pool and the calculations run on it
+
+Tasks use standard library functions, which worker processes can import.
+"""
+
+import math
+import operator
+import time
+import unittest
+
+from calculator_core import CalculatorCore
+from task_pool import (CANCELLED, FAILED, FINISHED, TIMED_OUT, TaskCancelled, TaskPool,
+                       TaskTimeout)
+
+
+class TaskPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = TaskPool(workers=2, timeout=30)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_result(self):
+        task = self.pool.submit(math.factorial, 20)
+        self.assertEqual(task.wait(30), math.factorial(20))
+        self.assertEqual(task.state, FINISHED)
+        self.assertIsNotNone(task.elapsed)
+
+    def test_error(self):
+        task = self.pool.submit(operator.truediv, 1, 0)
+        with self.assertRaises(ZeroDivisionError):
+            task.wait(30)
+        self.assertEqual(task.state, FAILED)
+
+    def test_callback_runs_in_poll(self):
+        done = []
+        task = self.pool.submit(operator.add, 2, 3, callback=done.append)
+        self.assertEqual(done, [])
+        self.pool.wait([task], 30)
+        self.assertEqual(done, [task])
+
+    def test_timeout_replaces_the_worker(self):
+        task = self.pool.submit(time.sleep, 60, timeout=0.5)
+        self.pool.wait([task], 30)
+        self.assertEqual(task.state, TIMED_OUT)
+        with self.assertRaises(TaskTimeout):
+            task.wait()
+        self.assertEqual(self.pool.submit(operator.add, 1, 1).wait(30), 2)
+
+    def test_cancel_running(self):
+        done = []
+        task = self.pool.submit(time.sleep, 60, callback=done.append)
+        self.pool.poll()
+        start = time.perf_counter()
+        task.cancel()
+        self.assertLess(time.perf_counter() - start, 10)
+        self.assertEqual(task.state, CANCELLED)
+        self.assertEqual(done, [task])
+        with self.assertRaises(TaskCancelled):
+            task.wait()
+        self.assertEqual(self.pool.submit(operator.add, 1, 1).wait(30), 2)
+
+    def test_cancel_pending(self):
+        task = self.pool.submit(operator.add, 1, 1)
+        task.cancel()
+        self.assertTrue(task.cancelled)
+        self.assertEqual(self.pool.active, 0)
+
+    def test_map_keeps_order(self):
+        tasks = self.pool.map(operator.mul, [(i, i) for i in range(20)], timeout=30)
+        self.assertEqual([task.result for task in tasks], [i * i for i in range(20)])
+
+    def test_start(self):
+        self.assertIs(self.pool.start(1), self.pool)
+        self.assertEqual(len(self.pool._idle), 1)
+        self.pool.start(5)
+        self.assertEqual(len(self.pool._idle), 2)
+
+    def test_closed(self):
+        self.pool.close()
+        with self.assertRaises(RuntimeError):
+            self.pool.submit(operator.add, 1, 1)
+
+    def test_inline_without_workers(self):
+        pool = TaskPool(workers=0)
+        task = pool.submit(operator.add, 1, 2)
+        self.assertEqual(task.wait(), 3)
+        pool.close()
+
+
+class CoreTasksTest(unittest.TestCase):
+    def setUp(self):
+        self.core = CalculatorCore(history_file=None, stats_file=None, rates_dir=None,
+                                   workspace_file=None)
+
+    def tearDown(self):
+        self.core.close()
+
+    def test_warm_worker(self):
+        # What the application does once its first frame is up
+        self.core.get_task_pool().start(1)
+        self.assertEqual(len(self.core.task_pool._idle), 1)
+
+    def test_calculate_async(self):
+        done = []
+        task = self.core.calculate_async("2**10+1", callback=done.append)
+        self.assertEqual(task.wait(30), 1025)
+        self.assertEqual(done, [task])
+        self.assertEqual(self.core.workspace.env['ans'], 1025)
+        self.assertEqual(self.core.history[-1].expression, "2**10+1")
+
+    def test_definitions_async(self):
+        self.core.calculate_async("f(x) = x*2+a").wait(30)
+        self.core.calculate_async("a = 3").wait(30)
+        self.assertEqual(self.core.calculate_async("f(4)").wait(30), 11)
+
+    def test_calculate_async_error(self):
+        task = self.core.calculate_async("1/0")
+        with self.assertRaises(ZeroDivisionError):
+            task.wait(30)
+        self.assertEqual(self.core.history, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
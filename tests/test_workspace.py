@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for workspace variables, user functions and the workspace file
+"""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+from decimal import Decimal
+from fractions import Fraction
+
+from expression_engine import ExpressionEngine, ExpressionError
+from numeric_modes import get_mode
+from workspace import REGISTERS, WORKSPACE_VERSION, Workspace, parse_definition
+
+
+class DefinitionTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = ExpressionEngine()
+        self.workspace = Workspace(self.engine, None)
+
+    def evaluate(self, text):
+        return self.engine.evaluate(text, self.workspace.env)
+
+    def test_parse_definition(self):
+        self.assertEqual(parse_definition("x = 3.2"), ('x', None, '3.2'))
+        self.assertEqual(parse_definition("f(a, b) = a*b"), ('f', ('a', 'b'), 'a*b'))
+        self.assertEqual(parse_definition("g() = 1"), ('g', (), '1'))
+        self.assertIsNone(parse_definition("2+3"))
+        self.assertIsNone(parse_definition("f(x)+1 = 2"))
+        with self.assertRaises(ExpressionError):
+            parse_definition("f(a, a) = a")
+        with self.assertRaises(ExpressionError):
+            parse_definition("f(1) = 1")
+
+    def test_functions_and_variables(self):
+        self.workspace.define_function('f', ('x',), 'x**2+a')
+        self.workspace.assign('a', 1)
+        self.assertEqual(self.evaluate("f(3)"), 10)
+        self.workspace.assign('a', 2)
+        self.assertEqual(self.evaluate("f(3)"), 11)
+
+    def test_redefinition_reaches_compiled_callers(self):
+        self.workspace.define_function('f', ('x',), 'x+1')
+        self.workspace.define_function('g', ('x',), 'f(x)*2')
+        self.assertEqual(self.evaluate("g(1)"), 4)
+        self.workspace.define_function('f', ('x',), 'x+2')
+        self.assertEqual(self.evaluate("g(1)"), 6)
+
+    def test_parameters_shadow_variables(self):
+        self.workspace.assign('x', 100)
+        self.workspace.define_function('f', ('x',), 'x+1')
+        self.assertEqual(self.evaluate("f(1)+x"), 102)
+
+    def test_recursion_rejected(self):
+        with self.assertRaisesRegex(ExpressionError, "cannot call itself"):
+            self.workspace.define_function('g', ('x',), 'g(x)')
+        self.assertNotIn('g', self.workspace.functions)
+        self.assertNotIn('g', self.engine.user_functions)
+        self.workspace.define_function('f', ('x',), 'x+1')
+        self.workspace.define_function('g', ('x',), 'f(x)')
+        with self.assertRaisesRegex(ExpressionError, "cannot call itself"):
+            self.workspace.define_function('f', ('x',), 'g(x)')
+        self.assertEqual(self.workspace.functions['f'], (('x',), 'x+1'))
+
+    def test_arity_checked(self):
+        self.workspace.define_function('f', ('x', 'y'), 'x*y')
+        with self.assertRaisesRegex(ExpressionError, "takes 2 arguments"):
+            self.workspace.define_function('g', ('x',), 'f(x)')
+        with self.assertRaisesRegex(ExpressionError, "takes 2 arguments"):
+            self.evaluate("f(1)")
+
+    def test_names_rejected(self):
+        self.workspace.define_function('f', ('x',), 'x')
+        self.workspace.assign('v', 1)
+        for name in ('2x', 'a b', 'ans', 'pi', 'sin', 'f'):
+            with self.assertRaises(ExpressionError):
+                self.workspace.assign(name, 1)
+        with self.assertRaises(ExpressionError):
+            self.workspace.define_function('v', ('x',), 'x')
+        with self.assertRaises(ExpressionError):
+            self.workspace.define_function('h', ('pi',), 'pi')
+        with self.assertRaises(ExpressionError):
+            self.workspace.remove('missing')
+
+    def test_remove(self):
+        self.workspace.define_function('f', ('x',), 'x')
+        self.workspace.remove('f')
+        with self.assertRaises(ExpressionError):
+            self.evaluate("f(1)")
+        self.workspace.assign('v', 1)
+        self.workspace.remove('v')
+        self.assertEqual(self.workspace.env, {})
+
+    def test_sync(self):
+        self.workspace.define_function('f', ('x',), 'x*a')
+        self.workspace.assign('a', 3)
+        engine = ExpressionEngine()
+        other = Workspace(engine, None)
+        other.sync(self.workspace.state())
+        self.assertEqual(engine.evaluate("f(2)", other.env), 6)
+        self.workspace.remove('f')
+        other.sync(self.workspace.state())
+        self.assertEqual(other.functions, {})
+
+
+class RegisterTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = ExpressionEngine()
+        self.workspace = Workspace(self.engine, None)
+
+    def test_registers_are_variables(self):
+        self.workspace.assign('M3', 2.5)
+        self.assertEqual(self.engine.evaluate("M3*2", self.workspace.env), 5)
+
+    def test_register_list(self):
+        self.workspace.assign('rate', 1)
+        self.workspace.assign('M1', 1)
+        self.workspace.set_answer(1)
+        self.assertEqual(self.workspace.registers(), list(REGISTERS) + ['rate'])
+
+    def test_clear_register(self):
+        self.workspace.assign('M0', 1)
+        self.workspace.clear_register('M0')
+        self.assertNotIn('M0', self.workspace.env)
+        with self.assertRaisesRegex(ExpressionError, "is empty"):
+            self.workspace.clear_register('M0')
+
+    def test_clear_register_refuses_others(self):
+        self.workspace.set_answer(1)
+        self.workspace.define_function('f', ('x',), 'x')
+        for name in ('ans', 'f', 'M 1', ''):
+            with self.assertRaises(ExpressionError):
+                self.workspace.clear_register(name)
+        self.assertEqual(self.workspace.env['ans'], 1)
+        self.assertIn('f', self.workspace.functions)
+
+
+class WorkspaceFileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'workspace.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        workspace = Workspace(ExpressionEngine(), self.path)
+        workspace.assign('i', 2 ** 80)
+        workspace.assign('r', 0.1)
+        workspace.assign('d', Decimal('0.1000000000000000000001'))
+        workspace.assign('q', Fraction(1, 3))
+        workspace.define_function('f', ('x', 'y'), 'x*y+r')
+        workspace.define_function('g', ('x',), 'f(x, 2)+1')
+        workspace.set_answer(42)
+        workspace.close()
+
+        engine = ExpressionEngine()
+        loaded = Workspace(engine, self.path)
+        loaded.load()
+        self.assertEqual(loaded.values, workspace.values)
+        self.assertEqual({name: type(value) for name, value in loaded.values.items()},
+                         {name: type(value) for name, value in workspace.values.items()})
+        self.assertEqual(loaded.functions, workspace.functions)
+        self.assertAlmostEqual(engine.evaluate("g(3)", loaded.env), 7.1)
+
+    def test_functions_may_call_later_ones(self):
+        data = {'version': WORKSPACE_VERSION, 'variables': [{'name': 'a', 'value': 2}],
+                'functions': [{'name': 'g', 'params': ['x'], 'body': 'f(x)+1'},
+                              {'name': 'f', 'params': ['x'], 'body': 'a*x'}]}
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        engine = ExpressionEngine()
+        workspace = Workspace(engine, self.path)
+        workspace.load()
+        self.assertEqual(engine.evaluate("g(5)", workspace.env), 11)
+
+    def test_mode_conversion_keeps_stored_values(self):
+        engine = ExpressionEngine(mode=get_mode('fraction'))
+        workspace = Workspace(engine, self.path)
+        workspace.assign('x', 0.5)
+        workspace.assign('d', Decimal('0.25'))
+        workspace.save()
+        loaded = Workspace(engine, self.path)
+        loaded.load()
+        self.assertEqual(loaded.env['d'], Fraction(1, 4))
+        self.assertEqual(loaded.values['d'], Decimal('0.25'))
+        engine.set_mode(get_mode('float'))
+        loaded.refresh()
+        self.assertEqual(loaded.env['d'], 0.25)
+        self.assertIsInstance(loaded.values['d'], Decimal)
+
+    def test_changes_are_saved_at_close(self):
+        workspace = Workspace(ExpressionEngine(), self.path)
+        workspace.assign('a', 1)
+        workspace.define_function('f', ('x',), 'x+a')
+        self.assertFalse(os.path.exists(self.path))
+        workspace.close()
+        loaded = Workspace(ExpressionEngine(), self.path)
+        loaded.load()
+        self.assertEqual(loaded.values, {'a': 1})
+        self.assertEqual(list(loaded.functions), ['f'])
+
+    def test_burst_of_changes_is_one_write(self):
+        workspace = Workspace(ExpressionEngine(), self.path, save_delay=0.2)
+        writes = []
+        write = workspace._write
+        workspace._write = lambda *args: writes.append(write(*args))
+        workspace.start()
+        for i in range(100):
+            workspace.assign('M1', i)
+        deadline = time.monotonic() + 10
+        while not writes and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(writes), 1)
+        loaded = Workspace(ExpressionEngine(), self.path)
+        loaded.load()
+        self.assertEqual(loaded.values, {'M1': 99})
+        workspace.set_answer(5)
+        workspace.close()
+        self.assertEqual(len(writes), 2)
+        self.assertIsNone(workspace._thread)
+
+    def test_missing_file(self):
+        workspace = Workspace(ExpressionEngine(), self.path)
+        workspace.load()
+        self.assertEqual(workspace.env, {})
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_corrupt_file_keeps_state(self):
+        workspace = Workspace(ExpressionEngine(), self.path)
+        workspace.assign('a', 1)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('{"variables": [')
+        workspace.load()
+        self.assertEqual(workspace.env, {'a': 1})
+
+    def test_bad_function_is_skipped(self):
+        data = {'version': WORKSPACE_VERSION, 'variables': [],
+                'functions': [{'name': 'f', 'params': ['x'], 'body': 'x+'},
+                              {'name': 'g', 'params': ['x'], 'body': 'x*2'}]}
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        engine = ExpressionEngine()
+        workspace = Workspace(engine, self.path)
+        workspace.load()
+        self.assertEqual(list(workspace.functions), ['g'])
+        self.assertNotIn('f', engine.user_functions)
+        self.assertEqual(engine.evaluate("g(2)", workspace.env), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
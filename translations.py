@@ -0,0 +1,555 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Translations for Advanced Calculator Pro
+Per-language catalogs loaded on first use. Each locales/<lang>/translations.json
+is parsed once and snapshotted to a marshal cache next to it; later launches
+load the snapshot instead, as long as the JSON file's mtime and size match.
+"""
+
+import json
+import marshal
+import os
+
+LOCALES_DIR = 'locales'
+LANGUAGES = ["en", "ro", "es", "fr", "de"]
+
+# Bump when the cache layout changes so old snapshots are ignored
+CACHE_VERSION = 1
+CACHE_NAME = 'translations.cache'
+
+DEFAULT_TRANSLATIONS = {
+    "en": {
+        "app_title": "Advanced Calculator Pro",
+        "result_label": "Result:",
+        "history_label": "History:",
+        "clear_button": "Clear",
+        "clear_history": "Clear History",
+        "language_label": "Language:",
+        "theme_label": "Theme:",
+        "about_menu": "About",
+        "about_title": "About Calculator",
+        "about_message": "Advanced Calculator Pro v2.0\n\nFeatures:\n• Scientific calculations\n• Unit conversions\n• History tracking\n• 5-language support\n• Theme customization\n• Statistics\n\nCreated for: CIVIS BIP 2024-2025",
+        "error_title": "Error",
+        "error_message": "Invalid expression. Please try again.",
+        "memory_store": "Memory+",
+        "memory_recall": "Recall",
+        "memory_clear": "Clear Mem",
+        "export_button": "Export",
+        "stats_button": "Statistics",
+        "basic_tab": "Basic",
+        "scientific_tab": "Scientific",
+        "converter_tab": "Converter",
+        "history_tab": "History",
+        "light_theme": "Light",
+        "dark_theme": "Dark",
+        "length_label": "Length",
+        "weight_label": "Weight",
+        "temperature_label": "Temperature",
+        "currency_label": "Currency",
+        "from_label": "From:",
+        "to_label": "To:",
+        "convert_label": "Convert",
+        "value_label": "Value:",
+        "export_success": "Results exported successfully!",
+        "export_error": "Error exporting results.",
+        "stats_title": "Usage Statistics",
+        "stats_calculations": "Calculations:",
+        "stats_conversions": "Conversions:",
+        "stats_errors": "Errors:",
+        "close_button": "Close",
+        "search_button": "Search",
+        "show_all_button": "Show All",
+        "cancel_button": "Cancel",
+        "export_cancelled": "Export cancelled.",
+        "mode_label": "Mode:",
+        "precision_label": "Digits:",
+        "exact_result_title": "Exact Result",
+        "digits_label": "digits",
+        "save_exact_prompt": "Save the exact result to a file?",
+        "timeout_message": "The calculation took too long and was stopped.",
+        "limit_error": "The expression is too large or complex to calculate.",
+        "memoize_label": "Memoize functions",
+        "cache_hits": "Cache hits:",
+        "cache_misses": "Cache misses:",
+        "cache_evictions": "Evictions:",
+        "rates_label": "Rates:",
+        "refresh_rates": "Refresh rates",
+        "sweep_button": "Sweep",
+        "sweep_title": "Sweep",
+        "expression_label": "Expression:",
+        "ranges_label": "Ranges:",
+        "sweep_history": "To History",
+        "sweep_save": "Save...",
+        "sweep_error": "Invalid expression or ranges",
+        "sweep_too_large": "Too many points for the history; save them to a file.",
+        "sweep_done": "Sweep saved.",
+        "performance_button": "Performance",
+        "performance_title": "Performance",
+        "record_timings": "Record timings",
+        "stage_column": "Stage",
+        "count_column": "Count",
+        "mean_column": "Mean",
+        "max_column": "Max",
+        "reset_button": "Reset",
+        "save_json_button": "Save JSON...",
+        "stage_parse": "Parse",
+        "stage_evaluate": "Evaluate",
+        "stage_history_save": "History save",
+        "stage_stats_save": "Statistics save",
+        "stage_history_redraw": "History redraw",
+        "stage_conversion": "Conversion",
+        "workspace_button": "Workspace",
+        "workspace_title": "Workspace",
+        "definition_label": "Definition:",
+        "define_button": "Define",
+        "insert_button": "Insert",
+        "remove_button": "Remove",
+        "name_column": "Name",
+        "value_column": "Value",
+        "workspace_error": "Could not define it",
+        "register_label": "Register:"
+    },
+    "ro": {
+        "app_title": "Calculator Avansat Pro",
+        "result_label": "Rezultat:",
+        "history_label": "Istoric:",
+        "clear_button": "Șterge",
+        "clear_history": "Șterge Istoric",
+        "language_label": "Limba:",
+        "theme_label": "Temă:",
+        "about_menu": "Despre",
+        "about_title": "Despre Calculator",
+        "about_message": "Calculator Avansat Pro v2.0\n\nFuncționalități:\n• Calcule științifice\n• Conversii unități\n• Istoric calcule\n• Suport 5 limbi\n• Personalizare temă\n• Statistici\n\nCreat pentru: CIVIS BIP 2024-2025",
+        "error_title": "Eroare",
+        "error_message": "Expresie invalidă. Vă rugăm încercați din nou.",
+        "memory_store": "Memorie+",
+        "memory_recall": "Recuperează",
+        "memory_clear": "Șterge Mem",
+        "export_button": "Exportă",
+        "stats_button": "Statistici",
+        "basic_tab": "Bază",
+        "scientific_tab": "Științific",
+        "converter_tab": "Convertor",
+        "history_tab": "Istoric",
+        "light_theme": "Luminos",
+        "dark_theme": "Întunecat",
+        "length_label": "Lungime",
+        "weight_label": "Greutate",
+        "temperature_label": "Temperatură",
+        "currency_label": "Valută",
+        "from_label": "Din:",
+        "to_label": "În:",
+        "convert_label": "Convertește",
+        "value_label": "Valoare:",
+        "export_success": "Rezultate exportate cu succes!",
+        "export_error": "Eroare la exportare.",
+        "stats_title": "Statistici Utilizare",
+        "stats_calculations": "Calcule:",
+        "stats_conversions": "Conversii:",
+        "stats_errors": "Erori:",
+        "close_button": "Închide",
+        "search_button": "Caută",
+        "show_all_button": "Arată Tot",
+        "cancel_button": "Anulează",
+        "export_cancelled": "Export anulat.",
+        "mode_label": "Mod:",
+        "precision_label": "Cifre:",
+        "exact_result_title": "Rezultat Exact",
+        "digits_label": "cifre",
+        "save_exact_prompt": "Salvați rezultatul exact într-un fișier?",
+        "timeout_message": "Calculul a durat prea mult și a fost oprit.",
+        "limit_error": "Expresia este prea mare sau prea complexă pentru a fi calculată.",
+        "memoize_label": "Memorează funcțiile",
+        "cache_hits": "Găsite în cache:",
+        "cache_misses": "Ratări cache:",
+        "cache_evictions": "Eliminări:",
+        "rates_label": "Cursuri:",
+        "refresh_rates": "Actualizează cursurile",
+        "sweep_button": "Tabelare",
+        "sweep_title": "Tabelare",
+        "expression_label": "Expresie:",
+        "ranges_label": "Intervale:",
+        "sweep_history": "În istoric",
+        "sweep_save": "Salvează...",
+        "sweep_error": "Expresie sau intervale nevalide",
+        "sweep_too_large": "Prea multe puncte pentru istoric; salvați-le într-un fișier.",
+        "sweep_done": "Tabel salvat.",
+        "performance_button": "Performanță",
+        "performance_title": "Performanță",
+        "record_timings": "Înregistrează timpii",
+        "stage_column": "Etapă",
+        "count_column": "Număr",
+        "mean_column": "Medie",
+        "max_column": "Maxim",
+        "reset_button": "Resetează",
+        "save_json_button": "Salvează JSON...",
+        "stage_parse": "Analiză",
+        "stage_evaluate": "Evaluare",
+        "stage_history_save": "Salvare istoric",
+        "stage_stats_save": "Salvare statistici",
+        "stage_history_redraw": "Redesenare istoric",
+        "stage_conversion": "Conversie",
+        "workspace_button": "Spațiu de lucru",
+        "workspace_title": "Spațiu de lucru",
+        "definition_label": "Definiție:",
+        "define_button": "Definește",
+        "insert_button": "Inserează",
+        "remove_button": "Elimină",
+        "name_column": "Nume",
+        "value_column": "Valoare",
+        "workspace_error": "Nu s-a putut defini",
+        "register_label": "Registru:"
+    },
+    "es": {
+        "app_title": "Calculadora Avanzada Pro",
+        "result_label": "Resultado:",
+        "history_label": "Historial:",
+        "clear_button": "Borrar",
+        "clear_history": "Borrar Historial",
+        "language_label": "Idioma:",
+        "theme_label": "Tema:",
+        "about_menu": "Acerca de",
+        "about_title": "Acerca de la Calculadora",
+        "about_message": "Calculadora Avanzada Pro v2.0\n\nCaracterísticas:\n• Cálculos científicos\n• Conversiones\n• Historial\n• 5 idiomas\n• Temas personalizados\n• Estadísticas\n\nCreado para: CIVIS BIP 2024-2025",
+        "error_title": "Error",
+        "error_message": "Expresión inválida. Inténtelo de nuevo.",
+        "memory_store": "Memoria+",
+        "memory_recall": "Recuperar",
+        "memory_clear": "Borrar Mem",
+        "export_button": "Exportar",
+        "stats_button": "Estadísticas",
+        "basic_tab": "Básico",
+        "scientific_tab": "Científico",
+        "converter_tab": "Conversor",
+        "history_tab": "Historial",
+        "light_theme": "Claro",
+        "dark_theme": "Oscuro",
+        "length_label": "Longitud",
+        "weight_label": "Peso",
+        "temperature_label": "Temperatura",
+        "currency_label": "Moneda",
+        "from_label": "De:",
+        "to_label": "A:",
+        "convert_label": "Convertir",
+        "value_label": "Valor:",
+        "export_success": "¡Resultados exportados!",
+        "export_error": "Error al exportar.",
+        "stats_title": "Estadísticas de Uso",
+        "stats_calculations": "Cálculos:",
+        "stats_conversions": "Conversiones:",
+        "stats_errors": "Errores:",
+        "close_button": "Cerrar",
+        "search_button": "Buscar",
+        "show_all_button": "Mostrar Todo",
+        "cancel_button": "Cancelar",
+        "export_cancelled": "Exportación cancelada.",
+        "mode_label": "Modo:",
+        "precision_label": "Dígitos:",
+        "exact_result_title": "Resultado Exacto",
+        "digits_label": "dígitos",
+        "save_exact_prompt": "¿Guardar el resultado exacto en un archivo?",
+        "timeout_message": "El cálculo tardó demasiado y se detuvo.",
+        "limit_error": "La expresión es demasiado grande o compleja para calcularla.",
+        "memoize_label": "Memorizar funciones",
+        "cache_hits": "Aciertos de caché:",
+        "cache_misses": "Fallos de caché:",
+        "cache_evictions": "Desalojos:",
+        "rates_label": "Tasas:",
+        "refresh_rates": "Actualizar tasas",
+        "sweep_button": "Barrido",
+        "sweep_title": "Barrido",
+        "expression_label": "Expresión:",
+        "ranges_label": "Rangos:",
+        "sweep_history": "Al historial",
+        "sweep_save": "Guardar...",
+        "sweep_error": "Expresión o rangos no válidos",
+        "sweep_too_large": "Demasiados puntos para el historial; guárdelos en un archivo.",
+        "sweep_done": "Barrido guardado.",
+        "performance_button": "Rendimiento",
+        "performance_title": "Rendimiento",
+        "record_timings": "Registrar tiempos",
+        "stage_column": "Etapa",
+        "count_column": "Cantidad",
+        "mean_column": "Media",
+        "max_column": "Máximo",
+        "reset_button": "Restablecer",
+        "save_json_button": "Guardar JSON...",
+        "stage_parse": "Análisis",
+        "stage_evaluate": "Evaluación",
+        "stage_history_save": "Guardar historial",
+        "stage_stats_save": "Guardar estadísticas",
+        "stage_history_redraw": "Redibujar historial",
+        "stage_conversion": "Conversión",
+        "workspace_button": "Espacio de trabajo",
+        "workspace_title": "Espacio de trabajo",
+        "definition_label": "Definición:",
+        "define_button": "Definir",
+        "insert_button": "Insertar",
+        "remove_button": "Eliminar",
+        "name_column": "Nombre",
+        "value_column": "Valor",
+        "workspace_error": "No se pudo definir",
+        "register_label": "Registro:"
+    },
+    "fr": {
+        "app_title": "Calculatrice Avancée Pro",
+        "result_label": "Résultat:",
+        "history_label": "Historique:",
+        "clear_button": "Effacer",
+        "clear_history": "Effacer Historique",
+        "language_label": "Langue:",
+        "theme_label": "Thème:",
+        "about_menu": "À propos",
+        "about_title": "À propos",
+        "about_message": "Calculatrice Avancée Pro v2.0\n\nFonctionnalités:\n• Calculs scientifiques\n• Conversions\n• Historique\n• 5 langues\n• Thèmes\n• Statistiques\n\nCréé pour: CIVIS BIP 2024-2025",
+        "error_title": "Erreur",
+        "error_message": "Expression invalide. Réessayez.",
+        "memory_store": "Mémoire+",
+        "memory_recall": "Rappeler",
+        "memory_clear": "Effacer Mém",
+        "export_button": "Exporter",
+        "stats_button": "Statistiques",
+        "basic_tab": "Base",
+        "scientific_tab": "Scientifique",
+        "converter_tab": "Convertisseur",
+        "history_tab": "Historique",
+        "light_theme": "Clair",
+        "dark_theme": "Sombre",
+        "length_label": "Longueur",
+        "weight_label": "Poids",
+        "temperature_label": "Température",
+        "currency_label": "Devise",
+        "from_label": "De:",
+        "to_label": "À:",
+        "convert_label": "Convertir",
+        "value_label": "Valeur:",
+        "export_success": "Résultats exportés!",
+        "export_error": "Erreur d'exportation.",
+        "stats_title": "Statistiques",
+        "stats_calculations": "Calculs:",
+        "stats_conversions": "Conversions:",
+        "stats_errors": "Erreurs:",
+        "close_button": "Fermer",
+        "search_button": "Rechercher",
+        "show_all_button": "Tout Afficher",
+        "cancel_button": "Annuler",
+        "export_cancelled": "Exportation annulée.",
+        "mode_label": "Mode:",
+        "precision_label": "Chiffres:",
+        "exact_result_title": "Résultat Exact",
+        "digits_label": "chiffres",
+        "save_exact_prompt": "Enregistrer le résultat exact dans un fichier?",
+        "timeout_message": "Le calcul a pris trop de temps et a été arrêté.",
+        "limit_error": "L'expression est trop grande ou trop complexe pour être calculée.",
+        "memoize_label": "Mémoriser les fonctions",
+        "cache_hits": "Succès du cache:",
+        "cache_misses": "Échecs du cache:",
+        "cache_evictions": "Évictions:",
+        "rates_label": "Taux:",
+        "refresh_rates": "Actualiser les taux",
+        "sweep_button": "Balayage",
+        "sweep_title": "Balayage",
+        "expression_label": "Expression:",
+        "ranges_label": "Plages:",
+        "sweep_history": "Vers l'historique",
+        "sweep_save": "Enregistrer...",
+        "sweep_error": "Expression ou plages invalides",
+        "sweep_too_large": "Trop de points pour l'historique; enregistrez-les dans un fichier.",
+        "sweep_done": "Balayage enregistré.",
+        "performance_button": "Performances",
+        "performance_title": "Performances",
+        "record_timings": "Enregistrer les durées",
+        "stage_column": "Étape",
+        "count_column": "Nombre",
+        "mean_column": "Moyenne",
+        "max_column": "Max",
+        "reset_button": "Réinitialiser",
+        "save_json_button": "Enregistrer JSON...",
+        "stage_parse": "Analyse",
+        "stage_evaluate": "Évaluation",
+        "stage_history_save": "Sauvegarde de l'historique",
+        "stage_stats_save": "Sauvegarde des statistiques",
+        "stage_history_redraw": "Affichage de l'historique",
+        "stage_conversion": "Conversion",
+        "workspace_button": "Espace de travail",
+        "workspace_title": "Espace de travail",
+        "definition_label": "Définition:",
+        "define_button": "Définir",
+        "insert_button": "Insérer",
+        "remove_button": "Supprimer",
+        "name_column": "Nom",
+        "value_column": "Valeur",
+        "workspace_error": "Impossible de le définir",
+        "register_label": "Registre:"
+    },
+    "de": {
+        "app_title": "Erweiterter Rechner Pro",
+        "result_label": "Ergebnis:",
+        "history_label": "Verlauf:",
+        "clear_button": "Löschen",
+        "clear_history": "Verlauf Löschen",
+        "language_label": "Sprache:",
+        "theme_label": "Thema:",
+        "about_menu": "Über",
+        "about_title": "Über",
+        "about_message": "Erweiterter Rechner Pro v2.0\n\nFunktionen:\n• Wissenschaftliche Berechnungen\n• Umrechnungen\n• Verlauf\n• 5 Sprachen\n• Themen\n• Statistiken\n\nErstellt für: CIVIS BIP 2024-2025",
+        "error_title": "Fehler",
+        "error_message": "Ungültiger Ausdruck. Bitte erneut versuchen.",
+        "memory_store": "Speicher+",
+        "memory_recall": "Abrufen",
+        "memory_clear": "Speicher Löschen",
+        "export_button": "Exportieren",
+        "stats_button": "Statistiken",
+        "basic_tab": "Basis",
+        "scientific_tab": "Wissenschaftlich",
+        "converter_tab": "Umrechner",
+        "history_tab": "Verlauf",
+        "light_theme": "Hell",
+        "dark_theme": "Dunkel",
+        "length_label": "Länge",
+        "weight_label": "Gewicht",
+        "temperature_label": "Temperatur",
+        "currency_label": "Währung",
+        "from_label": "Von:",
+        "to_label": "Nach:",
+        "convert_label": "Umrechnen",
+        "value_label": "Wert:",
+        "export_success": "Erfolgreich exportiert!",
+        "export_error": "Exportfehler.",
+        "stats_title": "Statistiken",
+        "stats_calculations": "Berechnungen:",
+        "stats_conversions": "Umrechnungen:",
+        "stats_errors": "Fehler:",
+        "close_button": "Schließen",
+        "search_button": "Suchen",
+        "show_all_button": "Alle Anzeigen",
+        "cancel_button": "Abbrechen",
+        "export_cancelled": "Export abgebrochen.",
+        "mode_label": "Modus:",
+        "precision_label": "Stellen:",
+        "exact_result_title": "Exaktes Ergebnis",
+        "digits_label": "Stellen",
+        "save_exact_prompt": "Das exakte Ergebnis in einer Datei speichern?",
+        "timeout_message": "Die Berechnung hat zu lange gedauert und wurde abgebrochen.",
+        "limit_error": "Der Ausdruck ist zu groß oder zu komplex für eine Berechnung.",
+        "memoize_label": "Funktionen zwischenspeichern",
+        "cache_hits": "Cache-Treffer:",
+        "cache_misses": "Cache-Fehlzugriffe:",
+        "cache_evictions": "Verdrängungen:",
+        "rates_label": "Kurse:",
+        "refresh_rates": "Kurse aktualisieren",
+        "sweep_button": "Wertetabelle",
+        "sweep_title": "Wertetabelle",
+        "expression_label": "Ausdruck:",
+        "ranges_label": "Bereiche:",
+        "sweep_history": "In den Verlauf",
+        "sweep_save": "Speichern...",
+        "sweep_error": "Ungültiger Ausdruck oder Bereich",
+        "sweep_too_large": "Zu viele Punkte für den Verlauf; bitte in einer Datei speichern.",
+        "sweep_done": "Wertetabelle gespeichert.",
+        "performance_button": "Leistung",
+        "performance_title": "Leistung",
+        "record_timings": "Zeiten aufzeichnen",
+        "stage_column": "Phase",
+        "count_column": "Anzahl",
+        "mean_column": "Mittel",
+        "max_column": "Max",
+        "reset_button": "Zurücksetzen",
+        "save_json_button": "JSON speichern...",
+        "stage_parse": "Parsen",
+        "stage_evaluate": "Auswerten",
+        "stage_history_save": "Verlauf speichern",
+        "stage_stats_save": "Statistik speichern",
+        "stage_history_redraw": "Verlauf zeichnen",
+        "stage_conversion": "Umrechnung",
+        "workspace_button": "Arbeitsbereich",
+        "workspace_title": "Arbeitsbereich",
+        "definition_label": "Definition:",
+        "define_button": "Definieren",
+        "insert_button": "Einfügen",
+        "remove_button": "Entfernen",
+        "name_column": "Name",
+        "value_column": "Wert",
+        "workspace_error": "Konnte nicht definiert werden",
+        "register_label": "Register:"
+    }
+}
+
+
+class TranslationCatalog:
+    def __init__(self, locales_dir=LOCALES_DIR, languages=LANGUAGES, use_cache=True):
+        self.locales_dir = locales_dir
+        self.languages = list(languages)
+        self.use_cache = use_cache
+        self._catalogs = {}
+
+    def __contains__(self, lang):
+        return lang in self.languages
+
+    def __getitem__(self, lang):
+        catalog = self._catalogs.get(lang)
+        if catalog is None:
+            catalog = self.load(lang)
+        return catalog
+
+    def get(self, lang, default=None):
+        return self[lang] if lang in self.languages else default
+
+    def loaded(self):
+        """Return the languages loaded so far"""
+        return list(self._catalogs)
+
+    def load(self, lang):
+        """Load one language, merged over its built-in defaults"""
+        defaults = DEFAULT_TRANSLATIONS.get(lang, DEFAULT_TRANSLATIONS["en"])
+        file_path = os.path.join(self.locales_dir, lang, 'translations.json')
+        if os.path.exists(file_path):
+            try:
+                # Merge with defaults to ensure all keys exist
+                catalog = {**defaults, **self._read(file_path)}
+            except Exception as e:
+                print(f"Error loading {lang}: {e}")
+                catalog = dict(defaults)
+        else:
+            print(f"Creating translation file: {file_path}")
+            catalog = dict(defaults)
+            try:
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    json.dump(defaults, f, ensure_ascii=False, indent=4)
+            except Exception as e:
+                print(f"Warning: Could not create {file_path}: {e}")
+        self._catalogs[lang] = catalog
+        return catalog
+
+    def _read(self, file_path):
+        """Parse a translations file, through the marshal cache when it is fresh"""
+        if not self.use_cache:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        stat = os.stat(file_path)
+        stamp = (CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+        cache_path = os.path.join(os.path.dirname(file_path), CACHE_NAME)
+        try:
+            with open(cache_path, 'rb') as f:
+                # One read: marshal.load on a file object reads piecemeal
+                cached_stamp, data = marshal.loads(f.read())
+            if cached_stamp == stamp:
+                return data
+        except Exception:
+            # Missing, stale-format or corrupt cache: rebuild it below
+            pass
+
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        temp_path = cache_path + '.tmp'
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(marshal.dumps((stamp, data)))
+            os.replace(temp_path, cache_path)
+        except OSError:
+            # A read-only install still works, it just parses JSON every time
+            pass
+        return data
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unit Conversion for Advanced Calculator Pro
+Every unit is described as an affine transform of its category's base unit
+(unit = base * scale + offset). A ConversionTable composes the transform of
+every unit pair up front, so converting between any two units is one lookup
+and a single multiply-add. Bulk conversion works on whole columns of values
+with the standard library `array` module and uses NumPy when it is installed.
+"""
+
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: the stdlib path is always available
+    np = None
+
+# Below this many values the NumPy setup cost outweighs its speed
+NUMPY_MIN_SIZE = 1024
+
+
+def _snap(number):
+    """Round away float noise picked up when sampling a conversion function"""
+    return float(f"{number:.12g}")
+
+
+def unit_transform(rate, number=float):
+    """Return the (scale, offset) mapping a base value to a unit
+
+    A rate is either a number (units per base unit), a (scale, offset) pair,
+    the string 'base' for the base unit itself, or a function converting a
+    base value to the unit. Functions must be affine and are sampled at 0 and 1.
+    `number` builds the scale and offset, e.g. a Decimal or Fraction converter
+    for exact conversions.
+    """
+    if rate == 'base':
+        return number(1), number(0)
+    if isinstance(rate, tuple):
+        scale, offset = rate
+        return number(scale), number(offset)
+    if callable(rate):
+        offset = rate(0)
+        return number(_snap(rate(1) - offset)), number(_snap(offset))
+    return number(rate), number(0)
+
+
+def category_transforms(rates, number=float):
+    """Return {unit: (scale, offset)} for one category of conversion rates"""
+    return {unit: unit_transform(rate, number) for unit, rate in rates.items()}
+
+
+def pair_transform(from_transform, to_transform):
+    """Compose two unit transforms into the (scale, offset) for from -> to"""
+    from_scale, from_offset = from_transform
+    to_scale, to_offset = to_transform
+    scale = to_scale / from_scale
+    return scale, to_offset - from_offset * scale
+
+
+def _as_doubles(values):
+    """Expose raw byte buffers as a sequence of C doubles"""
+    if isinstance(values, (bytes, bytearray)):
+        return memoryview(values).cast('d')
+    if isinstance(values, memoryview) and values.format != 'd':
+        return values.cast('B').cast('d')
+    return values
+
+
+def _convert_stdlib(values, scale, offset):
+    """Convert with C-level map() calls, without per-element Python branching"""
+    if scale == 1.0 and offset == 0.0:
+        return array('d', values)
+    if offset == 0.0:
+        return array('d', map(scale.__mul__, values))
+    return array('d', map(offset.__add__, map(scale.__mul__, values)))
+
+
+def _convert_numpy(values, scale, offset, out):
+    """Convert with NumPy, writing into out when it is given"""
+    if isinstance(values, np.ndarray):
+        source = values.astype(np.float64, copy=False)
+    elif isinstance(values, (array, memoryview)):
+        source = np.frombuffer(values, dtype=np.float64)
+    else:
+        source = np.asarray(values, dtype=np.float64)
+
+    if out is None:
+        target = np.empty_like(source)
+    else:
+        target = np.frombuffer(out, dtype=np.float64)
+        if target.shape != source.shape:
+            raise ValueError("Output buffer size does not match the input")
+    np.multiply(source, scale, out=target)
+    if offset:
+        np.add(target, offset, out=target)
+    return memoryview(target)
+
+
+def convert_many(values, scale, offset=0.0, out=None, use_numpy=None):
+    """Apply value * scale + offset to a whole sequence or buffer of numbers
+
+    Returns an array('d'), or a memoryview when NumPy did the work or when a
+    writable double buffer was supplied as `out`. `use_numpy` forces the
+    NumPy path on or off; by default it is used for large inputs if present.
+    """
+    values = _as_doubles(values)
+    scale = float(scale)
+    offset = float(offset)
+
+    if use_numpy is None:
+        use_numpy = np is not None and (isinstance(values, np.ndarray)
+                                        or len(values) >= NUMPY_MIN_SIZE)
+    elif use_numpy and np is None:
+        raise RuntimeError("NumPy is not installed")
+
+    if use_numpy:
+        return _convert_numpy(values, scale, offset, out)
+
+    result = _convert_stdlib(values, scale, offset)
+    if out is None:
+        return result
+    target = memoryview(out).cast('B').cast('d')
+    if len(target) != len(result):
+        raise ValueError("Output buffer size does not match the input")
+    target[:] = memoryview(result)
+    return target
+
+
+class ConversionTable:
+    """Precomputed (scale, offset) matrix for every unit pair of every category
+
+    Adding a category only needs its rates; no conversion code changes.
+    """
+
+    def __init__(self, categories=None, version=None):
+        # Identifies the rates the table was built from, e.g. a currency snapshot
+        self.version = version
+        # {category: {from_unit: {to_unit: (scale, offset)}}}
+        self._matrix = {}
+        # Raw rates, and exact pairs built from them on demand
+        self._rates = {}
+        self._exact = {}
+        for name, rates in (categories or {}).items():
+            self.add_category(name, rates)
+
+    def add_category(self, name, rates):
+        """Register (or replace) a category and precompute all its unit pairs"""
+        self._rates[name] = dict(rates)
+        self._exact.clear()
+        transforms = category_transforms(rates)
+        self._matrix[name] = {
+            from_unit: {to_unit: pair_transform(from_transform, to_transform)
+                        for to_unit, to_transform in transforms.items()}
+            for from_unit, from_transform in transforms.items()
+        }
+
+    def categories(self):
+        """Return the registered category names"""
+        return list(self._matrix)
+
+    def units(self, category):
+        """Return the units of a category in declaration order"""
+        return list(self._matrix[category])
+
+    def pair(self, category, from_unit, to_unit):
+        """Return the (scale, offset) converting from_unit to to_unit"""
+        return self._matrix[category][from_unit][to_unit]
+
+    def convert(self, value, category, from_unit, to_unit):
+        """Convert a single value"""
+        scale, offset = self._matrix[category][from_unit][to_unit]
+        return value * scale + offset
+
+    def convert_exact(self, value, category, from_unit, to_unit, mode):
+        """Convert a single value with transforms built from the raw rates
+
+        mode.from_number turns each rate into the mode's exact type, so no
+        binary float rounding enters Decimal or Fraction conversions. The
+        transforms are cached per mode name and precision, which is all
+        from_number depends on.
+        """
+        key = (mode.name, mode.precision, category, from_unit, to_unit)
+        transform = self._exact.get(key)
+        if transform is None:
+            rates = self._rates[category]
+            transform = pair_transform(unit_transform(rates[from_unit], mode.from_number),
+                                       unit_transform(rates[to_unit], mode.from_number))
+            self._exact[key] = transform
+        scale, offset = transform
+        return value * scale + offset
+
+    def convert_many(self, values, category, from_unit, to_unit, out=None, use_numpy=None):
+        """Convert a whole sequence or buffer of values"""
+        scale, offset = self._matrix[category][from_unit][to_unit]
+        return convert_many(values, scale, offset, out=out, use_numpy=use_numpy)
+
+    def __len__(self):
+        return sum(len(row) for matrix in self._matrix.values() for row in matrix.values())
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Workspace for Advanced Calculator Pro
+Named variables (x = 3.2), user functions (f(x) = x**2+1) and ans, the last
+result, kept between calculations and saved to a JSON file. The memory
+registers M0-M9 are variables too, so expressions read them as M3. A function body
+is compiled once, when it is defined or loaded, and expressions call it
+like sin or sqrt. Variables are read from the environment each expression
+is evaluated in, so assigning one never invalidates a compiled expression.
+Changes are saved by a background thread a moment after they are made, so a
+burst of them costs one write, and at close.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+from expression_engine import BinOp, Call, ExpressionError, UnaryOp
+from history_record import NUMBER_TYPES, decode_number, encode_number
+
+WORKSPACE_FILE = 'calculator_workspace.json'
+WORKSPACE_VERSION = 1
+
+# Seconds the saver waits after a change, so the changes made meanwhile share
+# its write
+SAVE_DELAY = 2.0
+
+# Variable holding the last result, set by every calculation
+ANSWER = 'ans'
+
+# Variables the memory buttons offer before any named ones
+REGISTERS = tuple(f'M{i}' for i in range(10))
+
+DEFINITION_PATTERN = re.compile(r"\s*([A-Za-z_][A-Za-z_0-9]*)\s*(?:\(([^()]*)\))?\s*=(.*)",
+                                re.DOTALL)
+NAME_PATTERN = re.compile(r"[A-Za-z_][A-Za-z_0-9]*")
+
+
+def parse_definition(text):
+    """Split 'name = expression' or 'name(a, b) = expression' into (name, params, body)
+
+    params is None for a variable. Returns None when text is not a definition.
+    """
+    if '=' not in text:
+        return None
+    match = DEFINITION_PATTERN.fullmatch(text)
+    if match is None:
+        return None
+    name, params, body = match.groups()
+    if params is not None:
+        params = tuple(param.strip() for param in params.split(',')) if params.strip() else ()
+        for param in params:
+            if not NAME_PATTERN.fullmatch(param):
+                raise ExpressionError(f"Invalid parameter '{param}'")
+        if len(set(params)) != len(params):
+            raise ExpressionError(f"Repeated parameter in {name}()")
+    return name, params, body.strip()
+
+
+def function_calls(tree):
+    """Yield every Call node in a syntax tree"""
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Call):
+            yield node
+            stack.extend(node.args)
+        elif isinstance(node, BinOp):
+            stack.append(node.left)
+            stack.append(node.right)
+        elif isinstance(node, UnaryOp):
+            stack.append(node.operand)
+
+
+def called_functions(tree):
+    """Return the names of the functions an expression calls"""
+    return {call.func for call in function_calls(tree)}
+
+
+def convert_value(value, mode):
+    """Convert a variable to a numeric mode; values that cannot be are kept
+
+    Ints, and values already of the mode's own type, are kept exactly.
+    """
+    if isinstance(value, int) or isinstance(value, NUMBER_TYPES.get(mode.name, float)):
+        return value
+    try:
+        return mode.from_number(value) if mode.exact else float(value)
+    except (TypeError, ValueError, ArithmeticError):
+        return value
+
+
+class Frame(dict):
+    """Arguments of one user function call; other names are workspace variables"""
+
+    __slots__ = ('variables',)
+
+    def __missing__(self, name):
+        return self.variables[name]
+
+
+class Workspace:
+    """Variables and user functions for the expressions one engine evaluates
+
+    env maps every variable, ans included, to its value in the engine's
+    numeric mode, and is the environment to evaluate expressions in; values
+    holds them as they were stored, so switching modes back and forth does
+    not round them, and is what gets saved. functions maps each user
+    function's name to its (params, body) source.
+    """
+
+    def __init__(self, engine, path=WORKSPACE_FILE, save_delay=SAVE_DELAY):
+        self.engine = engine
+        self.path = path
+        self.save_delay = save_delay
+        self.env = {}
+        self.values = {}
+        self.functions = {}
+        # name -> (params, compiled body), read at every call
+        self._compiled = {}
+        # name -> user functions its body calls
+        self._calls = {}
+        self._definitions = None
+        self._dirty = False
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._write_lock = threading.Lock()
+        self._scheduled = False
+        self._closed = False
+        self._thread = None
+
+    # ------------------------------------------------------------------
+    # Definitions
+    # ------------------------------------------------------------------
+
+    def assign(self, name, value):
+        """Set a variable"""
+        self._check_name(name)
+        if name in self.functions:
+            raise ExpressionError(f"'{name}' is a function")
+        self.values[name] = self.env[name] = value
+        self._changed()
+
+    def set_answer(self, value):
+        """Remember the last result as ans; it is saved when the workspace closes"""
+        self.values[ANSWER] = self.env[ANSWER] = value
+        self._dirty = True
+
+    def check_function(self, name, params, body):
+        """Compile a function definition without defining it
+
+        Raises ExpressionError for anything define_function would reject.
+        Returns the compiled body and the user functions it calls.
+        """
+        self._check_name(name)
+        if name in self.env:
+            raise ExpressionError(f"'{name}' is a variable")
+        for param in params:
+            if param in self.engine.constants:
+                raise ExpressionError(f"'{param}' is a constant, not a parameter name")
+        new = name not in self.functions
+        if new:
+            # Known while compiling, so a call to itself is reported as such
+            self.engine.define_function(name, self._caller(name))
+        try:
+            compiled = self.engine.compile_body(body)
+        finally:
+            if new:
+                self.engine.remove_function(name)
+        for call in function_calls(compiled.tree):
+            if call.func in self.functions and call.func != name:
+                expected = len(self.functions[call.func][0])
+                if len(call.args) != expected:
+                    raise ExpressionError(f"{call.func}() takes {expected} arguments "
+                                          f"({len(call.args)} given)")
+        calls = called_functions(compiled.tree) & (set(self.functions) | {name})
+        # Nothing can stop a recursion, so the function may not reach itself
+        seen = set()
+        stack = list(calls)
+        while stack:
+            callee = stack.pop()
+            if callee == name:
+                raise ExpressionError(f"'{name}' cannot call itself, directly or through other functions")
+            if callee not in seen:
+                seen.add(callee)
+                stack.extend(self._calls.get(callee, ()))
+        return compiled, calls
+
+    def define_function(self, name, params, body):
+        """Define or replace a user function"""
+        compiled, calls = self.check_function(name, params, body)
+        self._install(name, params, body, compiled, calls)
+        self._changed()
+
+    def remove(self, name):
+        """Forget a variable or function"""
+        if name in self.functions:
+            self._drop(name)
+        elif name in self.env:
+            del self.env[name]
+            self.values.pop(name, None)
+        else:
+            raise ExpressionError(f"Unknown name '{name}'")
+        self._changed()
+
+    def clear_register(self, name):
+        """Empty a register; ans and functions are not registers"""
+        self._check_name(name)
+        if name not in self.env:
+            raise ExpressionError(f"Register '{name}' is empty")
+        self.remove(name)
+
+    def clear(self):
+        """Forget every variable and function"""
+        for name in list(self.functions):
+            self._drop(name)
+        self.env.clear()
+        self.values.clear()
+        self._changed()
+
+    def entries(self):
+        """Return (name, value or definition text) for display, variables first"""
+        rows = [(name, str(value)) for name, value in sorted(self.env.items())]
+        rows.extend((f"{name}({', '.join(params)})", body)
+                    for name, (params, body) in sorted(self.functions.items()))
+        return rows
+
+    def registers(self):
+        """Return M0-M9, then the other variables, which serve as named registers"""
+        named = sorted(name for name in self.env if name != ANSWER and name not in REGISTERS)
+        return list(REGISTERS) + named
+
+    def refresh(self):
+        """Recompile every function and convert the variables to the engine's
+        numeric mode; needed after its mode, limits or function cache change"""
+        mode = self.engine.mode
+        if mode is not None:
+            for name, value in self.values.items():
+                self.env[name] = convert_value(value, mode)
+        self._compile_all(list(self.functions.items()))
+
+    # ------------------------------------------------------------------
+    # Other processes
+    # ------------------------------------------------------------------
+
+    def definitions(self):
+        """Return the functions as a tuple of (name, params, body) in definition order"""
+        if self._definitions is None:
+            self._definitions = tuple((name, params, body)
+                                      for name, (params, body) in self.functions.items())
+        return self._definitions
+
+    def state(self):
+        """Return a picklable (definitions, variables) snapshot for sync()"""
+        return self.definitions(), dict(self.env)
+
+    def sync(self, state):
+        """Match another workspace's state(), recompiling functions only if they changed"""
+        definitions, env = state
+        if definitions != self.definitions():
+            for name in list(self.functions):
+                self._drop(name)
+            self._compile_all([(name, (params, body)) for name, params, body in definitions])
+            self._definitions = definitions
+        self.env.clear()
+        self.env.update(env)
+        self.values = self.env.copy()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self, path=None):
+        """Read variables and functions saved in a workspace file (default: path)"""
+        path = path or self.path
+        if path is None:
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            variables = {item['name']: decode_number(item['value'], item.get('number'))
+                         for item in data.get('variables', [])}
+            definitions = [(item['name'], (tuple(item['params']), item['body']))
+                           for item in data.get('functions', [])]
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Error loading workspace: {e}")
+            return
+        mode = self.engine.mode
+        self.values.update(variables)
+        for name, value in variables.items():
+            self.env[name] = value if mode is None else convert_value(value, mode)
+        self._compile_all(definitions)
+        self._definitions = None
+
+    def start(self):
+        """Start the background thread saving changes shortly after they are made
+
+        Until it runs, changes are saved only at close.
+        """
+        if self.path is None or self._thread is not None:
+            return
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="workspace-saver",
+                                        daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not (self._closed or self._scheduled):
+                    self._wakeup.wait()
+                deadline = time.monotonic() + self.save_delay
+                while not self._closed and time.monotonic() < deadline:
+                    self._wakeup.wait(deadline - time.monotonic())
+                self._scheduled = False
+                closed = self._closed
+            if self._dirty:
+                self.save()
+            if closed:
+                return
+
+    def save(self):
+        """Write the variables and functions to the workspace file"""
+        if self.path is None:
+            return
+        with self._write_lock:
+            # Cleared before copying, so a change made during the copy is
+            # saved again; copying a dict is atomic, iterating one is not
+            self._dirty = False
+            values = self.values.copy()
+            functions = self.functions.copy()
+            self._write(values, functions)
+
+    def _write(self, values, functions):
+        variables = []
+        for name, value in values.items():
+            value, number_type = encode_number(value)
+            item = {'name': name, 'value': value}
+            if number_type is not None:
+                item['number'] = number_type
+            variables.append(item)
+        data = {
+            'version': WORKSPACE_VERSION,
+            'variables': variables,
+            'functions': [{'name': name, 'params': list(params), 'body': body}
+                          for name, (params, body) in functions.items()]
+        }
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"Error saving workspace: {e}")
+            self._dirty = True
+
+    def close(self):
+        """Stop the saver and write changes not yet written, such as the last ans"""
+        thread = self._thread
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        if thread is not None:
+            thread.join()
+            self._thread = None
+        if self._dirty:
+            self.save()
+
+    # ------------------------------------------------------------------
+
+    def _check_name(self, name):
+        engine = self.engine
+        if not NAME_PATTERN.fullmatch(name):
+            raise ExpressionError(f"'{name}' is not a valid name")
+        if name == ANSWER:
+            raise ExpressionError(f"'{ANSWER}' is set by every calculation")
+        if name in engine.constants:
+            raise ExpressionError(f"'{name}' is a constant")
+        if name in engine.functions:
+            raise ExpressionError(f"'{name}' is a built-in function")
+
+    def _changed(self):
+        self._definitions = None
+        self._dirty = True
+        with self._lock:
+            if not self._scheduled:
+                self._scheduled = True
+                self._wakeup.notify()
+
+    def _caller(self, name):
+        """Return what compiled expressions call for a user function: it runs
+        the current definition, so redefining one needs no recompiling"""
+        compiled = self._compiled
+        variables = self.env
+
+        def call(*args):
+            try:
+                params, body = compiled[name]
+            except KeyError:
+                raise ExpressionError(f"Unknown function '{name}'") from None
+            if len(args) != len(params):
+                raise ExpressionError(f"{name}() takes {len(params)} arguments "
+                                      f"({len(args)} given)")
+            frame = Frame(zip(params, args))
+            frame.variables = variables
+            return body(frame)
+        call.__name__ = name
+        return call
+
+    def _install(self, name, params, body, compiled, calls):
+        if name not in self.engine.user_functions:
+            self.engine.define_function(name, self._caller(name))
+        self.functions[name] = (params, body)
+        self._compiled[name] = (params, compiled.evaluate)
+        self._calls[name] = calls
+
+    def _compile_all(self, definitions):
+        """Compile (name, (params, body)) definitions, such as ones already checked"""
+        # Every name first, so bodies can call functions defined after them
+        for name, _ in definitions:
+            self.engine.define_function(name, self._caller(name))
+        names = {name for name, _ in definitions}
+        for name, (params, body) in definitions:
+            try:
+                compiled = self.engine.compile_body(body)
+            except Exception as e:
+                print(f"Error compiling {name}(): {e}")
+                self.engine.remove_function(name)
+                self.functions.pop(name, None)
+                self._compiled.pop(name, None)
+                self._calls.pop(name, None)
+                continue
+            self._install(name, params, body, compiled, called_functions(compiled.tree) & names)
+
+    def _drop(self, name):
+        self.engine.remove_function(name)
+        del self.functions[name]
+        del self._compiled[name]
+        del self._calls[name]